@@ -12,6 +12,7 @@ from src.clientes import contar_clientes
 from src.mascotas import contar_mascotas
 from src.veterinarios import listar_veterinarios
 from src.citas import listar_citas
+from src.database import sesion_de_pagina
 
 # =====================================
 # CONFIGURACIÓN PÁGINA
@@ -122,21 +123,23 @@ else:
     # MÉTRICAS PRINCIPALES
     # =====================================
     
-    try:
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("👥 Clientes", contar_clientes())
-        with col2:
-            st.metric("🐾 Mascotas", contar_mascotas())
-        with col3:
-            veterinarios = listar_veterinarios()
-            st.metric("🩺 Veterinarios", len(veterinarios) if veterinarios else 0)
-        with col4:
-            citas = listar_citas()
-            st.metric("📅 Citas", len(citas) if citas else 0)
-    except Exception as e:
-        st.error("❌ Error cargando estadísticas")
-        Logger.log_excepcion(e, "Dashboard")
+    # La conexión de este hilo vuelve al pool aunque algo falle
+    with sesion_de_pagina():
+        try:
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("👥 Clientes", contar_clientes())
+            with col2:
+                st.metric("🐾 Mascotas", contar_mascotas())
+            with col3:
+                veterinarios = listar_veterinarios()
+                st.metric("🩺 Veterinarios", len(veterinarios) if veterinarios else 0)
+            with col4:
+                citas = listar_citas()
+                st.metric("📅 Citas", len(citas) if citas else 0)
+        except Exception as e:
+            st.error("❌ Error cargando estadísticas")
+            Logger.log_excepcion(e, "Dashboard")
     
     st.divider()
     
@@ -0,0 +1,100 @@
+"""
+título: benchmark de búsqueda de texto
+fecha: 16.10.2026
+descripción: compara la latencia de la búsqueda antigua (LIKE '%texto%')
+con la búsqueda indexada FTS5 de src.busqueda sobre una BD temporal.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_busqueda [num_clientes]    (por defecto 1.000.000)
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import insert, or_
+
+from src import database
+from src.database import Cliente, session, configurar_base_datos, obtener_engine
+from src.busqueda import _BuscadorTexto
+
+NOMBRES = ["Ramón", "María", "José", "Lucía", "Álvaro", "Inés", "Marcos", "Micaela",
+           "Alejandro", "Sofía", "Jesús", "Nuria", "Óscar", "Elena", "Raúl", "Begoña"]
+APELLIDOS = ["García", "González", "López", "Pérez", "Sánchez", "Martínez", "Gómez",
+             "Fernández", "Núñez", "Ramos", "Muñoz", "Jiménez", "Ruiz", "Díaz"]
+# Todas existen en los datos de poblar(): apellido sin acento, nombre, prefijo de apellido,
+# prefijo de teléfono y de DNI (clientes 1230-1239), email y nombre + apellido
+CONSULTAS = ["garcia", "Ramón", "nune", "60000123", "0000123", "cliente42", "maria lopez"]
+REPETICIONES = 5
+
+
+def poblar(engine_bench, num_clientes: int):
+    """Inserta num_clientes clientes en lotes (los triggers alimentan el índice FTS5)"""
+    rnd = random.Random(7)
+    lote = 50_000
+    with engine_bench.begin() as conn:
+        for inicio in range(0, num_clientes, lote):
+            conn.execute(insert(Cliente), [
+                dict(
+                    nombre=f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}",
+                    dni=f"{i:08d}{'TRWAGMYFPDXBNJZSQVHLCKE'[i % 23]}",
+                    telefono=f"6{i:08d}",
+                    email=f"cliente{i}@correo.es",
+                )
+                for i in range(inicio, min(inicio + lote, num_clientes))
+            ])
+
+
+def buscar_like(texto: str):
+    """La búsqueda anterior: LIKE '%texto%' (sin índice posible, sin plegar acentos)"""
+    columnas = [Cliente.nombre, Cliente.dni, Cliente.email, Cliente.telefono]
+    return session.query(Cliente).filter(
+        or_(*[c.like(f"%{texto}%") for c in columnas])
+    ).order_by(Cliente.nombre).limit(50).all()
+
+
+def buscar_fts(texto: str):
+    return _BuscadorTexto.buscar(Cliente, texto, limite=50)
+
+
+def medir(funcion, texto: str):
+    """Devuelve (mediana en ms, número de resultados)"""
+    tiempos = []
+    for _ in range(REPETICIONES):
+        session.expunge_all()
+        inicio = time.perf_counter()
+        resultados = funcion(texto)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), len(resultados)
+
+
+def main():
+    num_clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    ruta = os.path.join(tempfile.mkdtemp(), "bench_busqueda.db")
+    # BD de la aplicación apuntando al fichero temporal: mismas tablas, migraciones y FTS5
+    configurar_base_datos(f"sqlite:///{ruta}")
+    engine_bench = obtener_engine()
+    if not database.FTS_DISPONIBLE:
+        print("⚠ Este SQLite no tiene FTS5")
+        return
+
+    print(f"Poblando {num_clientes} clientes en {ruta} ...")
+    inicio = time.perf_counter()
+    poblar(engine_bench, num_clientes)
+    print(f"  {time.perf_counter() - inicio:.1f} s (incluye mantenimiento del índice FTS5)")
+
+    try:
+        print(f"\n{'consulta':<14}{'LIKE ms':>12}{'filas':>7}{'FTS5 ms':>12}{'filas':>7}")
+        for texto in CONSULTAS:
+            ms_like, n_like = medir(buscar_like, texto)
+            ms_fts, n_fts = medir(buscar_fts, texto)
+            print(f"{texto:<14}{ms_like:>12.2f}{n_like:>7}{ms_fts:>12.2f}{n_fts:>7}")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+título: benchmark de índices de citas
+fecha: 16.10.2026
+descripción: compara el plan de consulta (EXPLAIN QUERY PLAN) y el tiempo
+de los métodos de _RepositorioCita y de las vistas semana/mes de analisis
+sobre una BD temporal, primero SIN los índices de citas y luego CON ellos.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_indices_citas [num_citas]
+
+Se capturan las sentencias SQL que emite cada método real del repositorio
+y se ejecuta EXPLAIN QUERY PLAN sobre ellas: con índices debe pasar de
+SCAN citas a SEARCH citas USING INDEX ...
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, time as dt_time, timedelta
+
+from sqlalchemy import event, insert
+
+from src.database import (
+    Cliente, Mascota, Veterinario, Cita, session, migrar_indices, configurar_base_datos, obtener_engine
+)
+from src.citas import _RepositorioCita
+from src import analisis
+
+NUM_VETERINARIOS = 80
+NUM_MASCOTAS = 5000
+HORAS = [dt_time(h, m) for h in range(9, 17) for m in (0, 30)]
+ESTADOS = ["Pendiente", "Confirmada", "Realizada", "Cancelada"]
+
+
+def poblar(engine_bench, num_citas: int):
+    """Inserta clientes, mascotas, veterinarios y num_citas citas aleatorias"""
+    rnd = random.Random(42)
+    hoy = date.today()
+    with engine_bench.begin() as conn:
+        conn.execute(insert(Cliente), [
+            dict(id=i, nombre=f"Cliente {i}", dni=f"{i:08d}C") for i in range(1, NUM_MASCOTAS + 1)
+        ])
+        conn.execute(insert(Mascota), [
+            dict(id=i, nombre=f"Mascota {i}", especie="Perro", cliente_id=i) for i in range(1, NUM_MASCOTAS + 1)
+        ])
+        conn.execute(insert(Veterinario), [
+            dict(id=i, nombre=f"Vet {i}", dni=f"{i:08d}V") for i in range(1, NUM_VETERINARIOS + 1)
+        ])
+        conn.execute(insert(Cita), [
+            dict(
+                fecha=hoy + timedelta(days=rnd.randint(-365, 365)),
+                hora=rnd.choice(HORAS),
+                estado=rnd.choice(ESTADOS),
+                mascota_id=rnd.randint(1, NUM_MASCOTAS),
+                veterinario_id=rnd.randint(1, NUM_VETERINARIOS),
+            )
+            for _ in range(num_citas)
+        ])
+
+
+def casos():
+    """(nombre, llamada) de cada consulta caliente a medir"""
+    hoy = date.today()
+    return [
+        ("verificar_disponibilidad", lambda: _RepositorioCita.verificar_disponibilidad(7, hoy, dt_time(10, 0))),
+        ("obtener_por_veterinario", lambda: _RepositorioCita.obtener_por_veterinario(7)),
+        ("obtener_por_mascota", lambda: _RepositorioCita.obtener_por_mascota(42)),
+        ("obtener_por_estado", lambda: _RepositorioCita.obtener_por_estado("Pendiente")),
+        ("contar_por_estado", lambda: _RepositorioCita.contar_por_estado("Pendiente")),
+        ("obtener_por_fecha", lambda: _RepositorioCita.obtener_por_fecha(hoy)),
+        ("obtener_futuras", lambda: _RepositorioCita.obtener_futuras()),
+        ("analisis.semana", analisis.obtener_proximas_citas_semana),
+        ("analisis.mes", analisis.obtener_proximas_citas_mes),
+    ]
+
+
+def medir(engine_bench):
+    """Ejecuta cada caso y devuelve {nombre: (plan, milisegundos)}"""
+    capturadas = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            capturadas.append((statement, parameters))
+
+    event.listen(engine_bench, "before_cursor_execute", capturar)
+    resultados = {}
+    try:
+        for nombre, llamada in casos():
+            capturadas.clear()
+            inicio = time.perf_counter()
+            llamada()
+            ms = (time.perf_counter() - inicio) * 1000
+            session.expunge_all()
+
+            sql, params = capturadas[0]
+            raw = engine_bench.raw_connection()
+            try:
+                filas = raw.cursor().execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            finally:
+                raw.close()
+            plan = " | ".join(f[-1] for f in filas if "citas" in f[-1]) or "-"
+            resultados[nombre] = (plan, ms)
+    finally:
+        event.remove(engine_bench, "before_cursor_execute", capturar)
+    return resultados
+
+
+def main():
+    num_citas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    ruta = os.path.join(tempfile.mkdtemp(), "bench_indices.db")
+    # BD de la aplicación apuntando al fichero temporal: mismas tablas, migraciones y PRAGMA
+    configurar_base_datos(f"sqlite:///{ruta}")
+    engine_bench = obtener_engine()
+    for indice in Cita.__table__.indexes:
+        indice.drop(bind=engine_bench)
+
+    print(f"Poblando {num_citas} citas en {ruta} ...")
+    poblar(engine_bench, num_citas)
+
+    try:
+        sin_indices = medir(engine_bench)
+        print(f"Índices creados: {', '.join(migrar_indices(engine_bench))}")
+        con_indices = medir(engine_bench)
+    finally:
+        session.close()
+
+    for nombre, (plan_antes, ms_antes) in sin_indices.items():
+        plan_despues, ms_despues = con_indices[nombre]
+        print(f"\n{nombre}")
+        print(f"  SIN índices ({ms_antes:8.2f} ms): {plan_antes}")
+        print(f"  CON índices ({ms_despues:8.2f} ms): {plan_despues}")
+
+
+if __name__ == "__main__":
+    main()
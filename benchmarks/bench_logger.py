@@ -0,0 +1,74 @@
+"""
+título: benchmark del logger
+fecha: 16.10.2026
+descripción: mide lo que cuesta cada llamada a Logger.info / Logger.debug en
+el hilo que la hace, con escritura directa en el archivo (asincrono=False) y
+con cola + hilo escritor (asincrono=True), con uno y con varios hilos a la vez
+(como varias sesiones de Streamlit), y con muestreo de DEBUG.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_logger [num_llamadas]    (por defecto 20.000)
+
+El tiempo del modo asíncrono no incluye la escritura en disco (la hace el
+hilo escritor); la columna "vaciar ms" es lo que tarda después en terminarla.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from src.logger import Logger
+
+HILOS = [1, 8]
+REPETICIONES = 3
+
+
+def medir_llamadas(funcion, num_llamadas: int, hilos: int) -> float:
+    """µs por llamada vistos por cada hilo (mediana de los hilos)"""
+    por_hilo = num_llamadas // hilos
+    tiempos = []
+
+    def trabajo():
+        inicio = time.perf_counter()
+        for i in range(por_hilo):
+            funcion(f"Cliente {i} actualizado")
+        tiempos.append((time.perf_counter() - inicio) / por_hilo * 1e6)
+
+    trabajadores = [threading.Thread(target=trabajo) for _ in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    return statistics.median(tiempos)
+
+
+def medir(nombre: str, funcion, num_llamadas: int, hilos: int, **opciones):
+    ruta = os.path.join(tempfile.mkdtemp(), "bench.log")
+    Logger.configurar_logger(archivo=ruta, max_bytes=50 * 2 ** 20, **opciones)
+    resultados = []
+    for _ in range(REPETICIONES):
+        us = medir_llamadas(funcion, num_llamadas, hilos)
+        inicio = time.perf_counter()
+        Logger.vaciar()
+        resultados.append((us, (time.perf_counter() - inicio) * 1000))
+    Logger.detener()
+    us, vaciar = min(resultados)
+    print(f"{nombre:<26}{hilos:>6}{us:>12.2f}{vaciar:>12.1f}")
+
+
+def main():
+    num_llamadas = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    print(f"{num_llamadas} llamadas por prueba\n")
+    print(f"{'modo':<26}{'hilos':>6}{'µs/llamada':>12}{'vaciar ms':>12}")
+    for hilos in HILOS:
+        medir("info síncrono", Logger.info, num_llamadas, hilos, asincrono=False, muestreo_debug=1)
+        medir("info asíncrono", Logger.info, num_llamadas, hilos, asincrono=True, muestreo_debug=1)
+        medir("debug asíncrono", Logger.debug, num_llamadas, hilos, asincrono=True, muestreo_debug=1)
+        medir("debug asíncrono 1/10", Logger.debug, num_llamadas, hilos, asincrono=True, muestreo_debug=10)
+
+
+if __name__ == "__main__":
+    main()
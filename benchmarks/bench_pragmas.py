@@ -0,0 +1,144 @@
+"""
+título: benchmark de perfiles de PRAGMA de SQLite
+fecha: 16.10.2026
+descripción: mide el rendimiento de lecturas y escrituras concurrentes sobre
+una copia de clinica.db con cada perfil de PERFILES_SQLITE (database.py).
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_pragmas [segundos] [lectores] [escritores]
+    (por defecto 5 segundos, 8 hilos lectores y 2 escritores)
+
+Cada lector repite las consultas típicas de las páginas (listado de clientes,
+citas de un día, recuento por estado); cada escritor inserta un cliente y
+hace commit, como el formulario de alta. Se trabaja sobre una copia para no
+tocar la base de datos real (RUTA_BD_DEFECTO, la misma que usa la aplicación
+aunque el benchmark se lance desde otro directorio). La copia se hace con la
+API de backup de SQLite: es una instantánea coherente que incluye lo que aún
+esté en el -wal, aunque la aplicación esté abierta. Después pasa por las
+mismas migraciones que la aplicación (preparar_esquema).
+
+Solo cuentan como bloqueos los errores "database is locked"; cualquier otro
+error para el benchmark, para no confundir un fallo de montaje con un resultado.
+"""
+
+import os
+import pathlib
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import closing
+from datetime import date
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Cliente, Cita, PERFILES_SQLITE, RUTA_BD_DEFECTO, crear_engine, preparar_esquema
+
+RUTA_ORIGEN = RUTA_BD_DEFECTO
+
+
+def copiar_bd(origen: str, destino: str) -> None:
+    """Copia origen en destino con la API de backup de SQLite (lectura, con lo que haya en el -wal)"""
+    uri = pathlib.Path(origen).resolve().as_uri() + "?mode=ro"
+    with closing(sqlite3.connect(uri, uri=True)) as fuente, closing(sqlite3.connect(destino)) as copia:
+        fuente.backup(copia)
+
+
+def _es_bloqueo(error: OperationalError) -> bool:
+    """Solo la espera por el lock de SQLite cuenta como bloqueo"""
+    return "database is locked" in str(error.orig)
+
+
+def lector(Sesion, fin: float, contador: dict, candado):
+    """Consultas de solo lectura hasta fin; cuenta operaciones y bloqueos"""
+    sesion = Sesion()
+    ops = bloqueos = 0
+    try:
+        while time.perf_counter() < fin:
+            try:
+                sesion.query(Cliente).order_by(Cliente.nombre, Cliente.id).limit(25).all()
+                sesion.query(Cita).filter(Cita.fecha == date.today()).all()
+                sesion.query(Cita.estado, func.count(Cita.id)).group_by(Cita.estado).all()
+                sesion.rollback()  # cerrar la transacción de lectura, como al acabar una ejecución
+                ops += 1
+            except OperationalError as e:
+                sesion.rollback()
+                if not _es_bloqueo(e):
+                    contador["errores"].append(e)
+                    break
+                bloqueos += 1
+    finally:
+        sesion.close()
+    with candado:
+        contador["lecturas"] += ops
+        contador["bloqueos"] += bloqueos
+
+
+def escritor(Sesion, fin: float, contador: dict, candado, numero: int):
+    """Inserta clientes con un commit cada uno hasta fin"""
+    sesion = Sesion()
+    ops = bloqueos = 0
+    try:
+        while time.perf_counter() < fin:
+            try:
+                sesion.add(Cliente(nombre=f"Bench {numero}-{ops}", dni=f"B{numero:02d}{ops:09d}"))
+                sesion.commit()
+                ops += 1
+            except OperationalError as e:
+                sesion.rollback()
+                if not _es_bloqueo(e):
+                    contador["errores"].append(e)
+                    break
+                bloqueos += 1
+    finally:
+        sesion.close()
+    with candado:
+        contador["escrituras"] += ops
+        contador["bloqueos"] += bloqueos
+
+
+def medir(perfil: str, segundos: float, lectores: int, escritores: int) -> dict:
+    """Ejecuta lectores y escritores a la vez sobre una copia nueva de clinica.db"""
+    ruta = os.path.join(tempfile.mkdtemp(), f"bench_{perfil}.db")
+    if os.path.exists(RUTA_ORIGEN):
+        copiar_bd(RUTA_ORIGEN, ruta)
+
+    # El pool debe admitir una conexión por hilo
+    motor = crear_engine(f"sqlite:///{ruta}", perfil=perfil, pool_size=lectores + escritores)
+    preparar_esquema(motor)
+    Sesion = sessionmaker(bind=motor)
+
+    contador = dict(lecturas=0, escrituras=0, bloqueos=0, errores=[])
+    candado = threading.Lock()
+    fin = time.perf_counter() + segundos
+    hilos = [threading.Thread(target=lector, args=(Sesion, fin, contador, candado)) for _ in range(lectores)]
+    hilos += [threading.Thread(target=escritor, args=(Sesion, fin, contador, candado, i)) for i in range(escritores)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    motor.dispose()
+    shutil.rmtree(os.path.dirname(ruta), ignore_errors=True)
+    if contador["errores"]:
+        raise RuntimeError(f"Perfil {perfil}: {len(contador['errores'])} hilo(s) fallaron") from contador["errores"][0]
+    return contador
+
+
+def main():
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    lectores = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    escritores = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+    print(f"{segundos:g} s, {lectores} lectores, {escritores} escritores sobre una copia de {RUTA_ORIGEN}\n")
+    print(f"{'perfil':<14}{'lecturas/s':>12}{'escrituras/s':>14}{'bloqueos':>10}")
+    for perfil in PERFILES_SQLITE:
+        r = medir(perfil, segundos, lectores, escritores)
+        print(f"{perfil:<14}{r['lecturas'] / segundos:>12.1f}{r['escrituras'] / segundos:>14.1f}{r['bloqueos']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+título: benchmark del modo resumen
+fecha: 16.10.2026
+descripción: compara la latencia y la memoria de los listados de los
+repositorios con entidades ORM completas y en modo resumen (resumen=True,
+una query de columnas que devuelve namedtuples) sobre una BD temporal.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_resumen [num_filas]    (por defecto 100.000)
+
+La memoria es el pico de tracemalloc mientras se construye la lista, e incluye
+el identity map de la sesión en el modo ORM.
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from src.database import Cliente, Mascota, Veterinario, Cita, session, configurar_base_datos, obtener_engine
+from src.clientes import listar_clientes
+from src.mascotas import listar_mascotas
+from src.citas import listar_citas
+
+NUM_VETERINARIOS = 50
+ESPECIES = ["Perro", "Gato", "Conejo", "Hurón", "Loro"]
+HORAS = [f"{h:02d}:{m:02d}" for h in range(9, 17) for m in (0, 30)]
+REPETICIONES = 3
+
+
+def poblar(engine_bench, num_filas: int):
+    """Inserta num_filas clientes, mascotas y citas"""
+    rnd = random.Random(3)
+    hoy = date.today()
+    with engine_bench.begin() as conn:
+        conn.execute(insert(Veterinario), [
+            dict(id=i, nombre=f"Vet {i}", dni=f"{i:08d}V") for i in range(1, NUM_VETERINARIOS + 1)
+        ])
+        conn.execute(insert(Cliente), [
+            dict(id=i, nombre=f"Cliente {i}", dni=f"{i:08d}C", telefono=f"6{i:08d}", email=f"c{i}@correo.es")
+            for i in range(1, num_filas + 1)
+        ])
+        conn.execute(insert(Mascota), [
+            dict(id=i, nombre=f"Mascota {i}", especie=rnd.choice(ESPECIES), cliente_id=i)
+            for i in range(1, num_filas + 1)
+        ])
+        conn.execute(insert(Cita), [
+            dict(
+                fecha=hoy + timedelta(days=rnd.randint(-365, 365)),
+                hora=rnd.choice(HORAS),
+                mascota_id=rnd.randint(1, num_filas),
+                veterinario_id=rnd.randint(1, NUM_VETERINARIOS),
+            )
+            for _ in range(num_filas)
+        ])
+
+
+def medir(funcion, resumen: bool):
+    """Devuelve (mediana en ms, pico de memoria en MB, filas)"""
+    tiempos = []
+    for _ in range(REPETICIONES):
+        session.expunge_all()
+        inicio = time.perf_counter()
+        filas = funcion(resumen=resumen)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        del filas
+
+    session.expunge_all()
+    tracemalloc.start()
+    filas = funcion(resumen=resumen)
+    pico = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return statistics.median(tiempos), pico, len(filas)
+
+
+def main():
+    num_filas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    ruta = os.path.join(tempfile.mkdtemp(), "bench_resumen.db")
+    # BD de la aplicación apuntando al fichero temporal: mismas tablas, migraciones y PRAGMA
+    configurar_base_datos(f"sqlite:///{ruta}")
+    engine_bench = obtener_engine()
+
+    print(f"Poblando {num_filas} clientes, mascotas y citas en {ruta} ...")
+    poblar(engine_bench, num_filas)
+
+    try:
+        print(f"\n{'listado':<18}{'ORM ms':>10}{'MB':>8}{'resumen ms':>12}{'MB':>8}{'filas':>9}")
+        for nombre, funcion in [("listar_clientes", listar_clientes),
+                                ("listar_mascotas", listar_mascotas),
+                                ("listar_citas", listar_citas)]:
+            ms_orm, mb_orm, filas = medir(funcion, False)
+            ms_res, mb_res, _ = medir(funcion, True)
+            print(f"{nombre:<18}{ms_orm:>10.1f}{mb_orm:>8.1f}{ms_res:>12.1f}{mb_res:>8.1f}{filas:>9}")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
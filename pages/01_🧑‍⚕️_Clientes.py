@@ -12,6 +12,7 @@ CÓMO FUNCIONA:
 
 2. ListarClientes: Muestra listado de todos los clientes
    └─ Métrica de total
+   └─ Una página cada vez (paginación keyset) con botones anterior/siguiente
    └─ Expanders con información completa
    └─ Muestra mascotas asociadas
 
@@ -32,12 +33,14 @@ ARQUITECTURA:
 
 import streamlit as st
 from src.clientes import (
-    crear_cliente, listar_clientes, obtener_cliente_por_id,
+    crear_cliente, listar_clientes_paginado, obtener_cliente_por_id,
     buscar_cliente_por_dni, buscar_cliente_por_nombre,
     modificar_cliente, eliminar_cliente, contar_clientes
 )
 from src.mascotas import obtener_mascotas_por_cliente
+from src.busqueda import buscar_clientes
 from src.utils import Utilidades
+from src.database import sesion_de_pagina
 from src.exceptions import ClienteNoEncontradoException, DNIDuplicadoException, ValidacionException
 
 # ✅ PROTECCIÓN DE LOGIN
@@ -132,25 +135,49 @@ class RegistrarCliente:
 class ListarClientes:
     """Responsabilidad: Mostrar listado de todos los clientes"""
     
+    TAMANO_PAGINA = 25
+    
     @staticmethod
     def mostrar():
-        """Renderiza el tab de listado"""
+        """Renderiza el tab de listado (una página cada vez)"""
         st.header("Lista de todos los clientes")
         
         try:
-            clientes = listar_clientes()
+            total = contar_clientes()
             
-            if not clientes:
+            if not total:
                 st.info("ℹ No hay clientes registrados")
                 return
             
-            st.metric("Total de clientes", len(clientes))
+            st.metric("Total de clientes", total)
             st.markdown("---")
-            ListarClientes._mostrar_clientes(clientes)
+            
+            cursor, hacia_atras = st.session_state.get("pag_clientes", (None, False))
+            pagina = listar_clientes_paginado(ListarClientes.TAMANO_PAGINA, cursor, hacia_atras)
+            if not pagina.elementos and cursor:
+                # La página guardada ya no existe (p.ej. se borraron clientes): volver al inicio
+                st.session_state.pag_clientes = (None, False)
+                st.rerun()
+            
+            ListarClientes._mostrar_clientes(pagina.elementos)
+            ListarClientes._controles_paginacion(pagina)
         
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
     
+    @staticmethod
+    def _controles_paginacion(pagina):
+        """Botones anterior/siguiente: guardan el cursor en session_state y relanzan"""
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("⬅ Anterior", disabled=not pagina.cursor_anterior, key="pag_clientes_ant", use_container_width=True):
+                st.session_state.pag_clientes = (pagina.cursor_anterior, True)
+                st.rerun()
+        with col2:
+            if st.button("Siguiente ➡", disabled=not pagina.cursor_siguiente, key="pag_clientes_sig", use_container_width=True):
+                st.session_state.pag_clientes = (pagina.cursor_siguiente, False)
+                st.rerun()
+    
     @staticmethod
     def _mostrar_clientes(clientes):
         """Renderiza cada cliente en un expander"""
@@ -210,14 +237,16 @@ class BuscadorCliente:
         
         tipo = st.selectbox(
             "Buscar por:", 
-            ["DNI", "Nombre"],
+            ["DNI", "Nombre", "Texto libre"],
             key="tipo_busqueda_cliente"
         )
         
         if tipo == "DNI":
             BuscadorCliente._buscar_por_dni()
-        else:
+        elif tipo == "Nombre":
             BuscadorCliente._buscar_por_nombre()
+        else:
+            BuscadorCliente._buscar_texto_libre()
     
     @staticmethod
     def _buscar_por_dni():
@@ -262,6 +291,28 @@ class BuscadorCliente:
             except Exception as e:
                 st.error(f"❌ Error: {str(e)}")
     
+    @staticmethod
+    def _buscar_texto_libre():
+        """Busca a la vez en nombre, DNI, email y teléfono (índice de texto)"""
+        texto = st.text_input("Nombre, DNI, email o teléfono", placeholder="Ej: ramon 600", key="buscar_texto_cliente")
+        
+        if st.button("🔍 Buscar", use_container_width=True, key="btn_buscar_texto_cliente"):
+            if not texto:
+                st.warning("⚠ Introduce algún texto")
+                return
+            
+            try:
+                clientes = buscar_clientes(texto)
+                if clientes:
+                    st.success(f"✅ {len(clientes)} encontrado(s)")
+                    for cliente in clientes:
+                        with st.expander(f"👤 {cliente.nombre} - DNI: {cliente.dni}"):
+                            BuscadorCliente._mostrar_detalle(cliente)
+                else:
+                    st.info(f"ℹ Sin resultados para: {texto}")
+            except Exception as e:
+                st.error(f"❌ Error: {str(e)}")
+    
     @staticmethod
     def _mostrar_detalle(cliente):
         tab1, tab2 = st.tabs(["Ficha del cliente", "Mascotas"])
@@ -330,7 +381,7 @@ class EditorCliente:
                 return
             
             try:
-                cliente = buscar_cliente_por_dni(dni)
+                cliente = buscar_cliente_por_dni(dni, dto=True)
                 if cliente:
                     st.session_state.cliente_seleccionado = cliente
                     st.session_state.confirmar_eliminacion_cliente = False
@@ -389,7 +440,8 @@ class EditorCliente:
                         cliente.id,
                         nombre=Utilidades.formatear_nombre(nuevo_nombre),
                         telefono=Utilidades.formatear_telefono(nuevo_telefono),
-                        email=Utilidades.formatear_email(nuevo_email)
+                        email=Utilidades.formatear_email(nuevo_email),
+                        dto=True
                     )
                     st.success("✅ Cliente actualizado")
                     st.session_state.cliente_seleccionado = cliente_act
@@ -433,13 +485,15 @@ class EditorCliente:
 # MAIN - RENDERIZACIÓN
 # ========================
 
-tab1, tab2, tab3, tab4 = st.tabs(["Registrar", "Listar", "Buscar", "Editar/Eliminar"])
-
-with tab1:
-    RegistrarCliente.mostrar()
-with tab2:
-    ListarClientes.mostrar()
-with tab3:
-    BuscadorCliente.mostrar()
-with tab4:
-    EditorCliente.mostrar()
\ No newline at end of file
+# Devolver la conexión de este hilo al pool al terminar, también tras st.rerun()/st.stop()
+with sesion_de_pagina():
+    tab1, tab2, tab3, tab4 = st.tabs(["Registrar", "Listar", "Buscar", "Editar/Eliminar"])
+
+    with tab1:
+        RegistrarCliente.mostrar()
+    with tab2:
+        ListarClientes.mostrar()
+    with tab3:
+        BuscadorCliente.mostrar()
+    with tab4:
+        EditorCliente.mostrar()
@@ -6,13 +6,16 @@ descripción: interfaz Streamlit para gestión completa de mascotas.
 
 import streamlit as st
 from src.mascotas import (
-    registrar_mascota, listar_mascotas, obtener_mascota_por_id,
+    registrar_mascota, listar_mascotas_paginado, obtener_mascota_por_id,
     obtener_mascotas_por_cliente, obtener_mascotas_por_especie,
     modificar_mascota, eliminar_mascota, contar_mascotas,
     ver_historial_mascota
 )
 from src.clientes import buscar_cliente_por_dni, obtener_cliente_por_id
+from src.analisis import obtener_mascotas_por_especie as distribucion_especies
+from src.busqueda import buscar_mascotas
 from src.utils import Utilidades
+from src.database import sesion_de_pagina
 from src.exceptions import MascotaNoEncontradaException, ClienteNoEncontradoException, ValidacionException
 
 # ✅ PROTECCIÓN DE LOGIN
@@ -120,36 +123,63 @@ class RegistrarMascota:
 class ListarMascotas:
     """Responsabilidad: Mostrar listado de todas las mascotas"""
     
+    TAMANO_PAGINA = 25
+    
     @staticmethod
     def mostrar():
-        """Renderiza el tab de listado"""
+        """Renderiza el tab de listado (una página cada vez)"""
         st.header("Lista de todas las mascotas")
         
         try:
-            mascotas = listar_mascotas()
+            total = contar_mascotas()
             
-            if not mascotas:
+            if not total:
                 st.info("ℹ No hay mascotas registradas")
                 return
             
-            st.metric("Total de mascotas", len(mascotas))
+            st.metric("Total de mascotas", total)
             
-            especies = list(set([m.especie for m in mascotas if m.especie]))
+            filtro_especie = None
+            especies = sorted(distribucion_especies().keys())
             if especies:
-                filtro_especie = st.selectbox(
+                seleccion = st.selectbox(
                     "Filtrar por especie:",
-                    ["Todas"] + sorted(especies),
+                    ["Todas"] + especies,
                     key="filtro_esp"
                 )
-                if filtro_especie != "Todas":
-                    mascotas = [m for m in mascotas if m.especie == filtro_especie]
+                filtro_especie = None if seleccion == "Todas" else seleccion
+            
+            # Si cambia el filtro, se vuelve a la primera página
+            if st.session_state.get("pag_mascotas_filtro") != filtro_especie:
+                st.session_state.pag_mascotas_filtro = filtro_especie
+                st.session_state.pag_mascotas = (None, False)
             
             st.markdown("---")
-            ListarMascotas._mostrar_mascotas(mascotas)
+            cursor, hacia_atras = st.session_state.get("pag_mascotas", (None, False))
+            pagina = listar_mascotas_paginado(ListarMascotas.TAMANO_PAGINA, cursor, hacia_atras, filtro_especie)
+            if not pagina.elementos and cursor:
+                st.session_state.pag_mascotas = (None, False)
+                st.rerun()
+            
+            ListarMascotas._mostrar_mascotas(pagina.elementos)
+            ListarMascotas._controles_paginacion(pagina)
         
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
     
+    @staticmethod
+    def _controles_paginacion(pagina):
+        """Botones anterior/siguiente: guardan el cursor en session_state y relanzan"""
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("⬅ Anterior", disabled=not pagina.cursor_anterior, key="pag_mascotas_ant", use_container_width=True):
+                st.session_state.pag_mascotas = (pagina.cursor_anterior, True)
+                st.rerun()
+        with col2:
+            if st.button("Siguiente ➡", disabled=not pagina.cursor_siguiente, key="pag_mascotas_sig", use_container_width=True):
+                st.session_state.pag_mascotas = (pagina.cursor_siguiente, False)
+                st.rerun()
+    
     @staticmethod
     def _mostrar_mascotas(mascotas):
         """Renderiza cada mascota en un expander"""
@@ -173,7 +203,7 @@ class ListarMascotas:
                             st.markdown(f"**Sexo:** {mascota.sexo or 'No registrado'}")
                         
                         try:
-                            cliente = obtener_cliente_por_id(mascota.cliente_id)
+                            cliente = obtener_cliente_por_id(mascota.cliente_id, dto=True)
                             if cliente:
                                 st.markdown(f"**Propietario:** {cliente.nombre} ({cliente.dni})")
                         except:
@@ -182,7 +212,7 @@ class ListarMascotas:
                         citas = ver_historial_mascota(mascota.id)
                         if citas:
                             for cita in citas:
-                                st.markdown(f"**Fecha y hora**: el **{Utilidades.formatear_fecha(cita.fecha)}** a las **{cita.hora}**")
+                                st.markdown(f"**Fecha y hora**: el **{Utilidades.formatear_fecha(cita.fecha)}** a las **{Utilidades.convertir_hora_a_string(cita.hora)}**")
                                 st.markdown(f"**Motivo:** {cita.motivo}")
                                 st.markdown(f"**Con:** {cita.veterinario.nombre} ({cita.veterinario.especialidad})")
                                 st.markdown(f"**Estado:** {cita.estado}")
@@ -206,7 +236,7 @@ class BuscadorMascota:
         
         tipo = st.selectbox(
             "Buscar por:",
-            ["ID Mascota", "DNI Cliente", "Especie"],
+            ["ID Mascota", "DNI Cliente", "Especie", "Texto libre"],
             key="tipo_busqueda_masc"
         )
         
@@ -214,8 +244,10 @@ class BuscadorMascota:
             BuscadorMascota._buscar_por_id()
         elif tipo == "DNI Cliente":
             BuscadorMascota._buscar_por_cliente()
-        else:
+        elif tipo == "Especie":
             BuscadorMascota._buscar_por_especie()
+        else:
+            BuscadorMascota._buscar_texto_libre()
     
     @staticmethod
     def _buscar_por_id():
@@ -223,7 +255,7 @@ class BuscadorMascota:
         
         if st.button("🔍 Buscar", use_container_width=True, key="btn_buscar_id_masc"):
             try:
-                mascota = obtener_mascota_por_id(mascota_id)
+                mascota = obtener_mascota_por_id(mascota_id, dto=True)
                 st.success("✅ Encontrada")
                 BuscadorMascota._mostrar_detalle(mascota)
             except MascotaNoEncontradaException:
@@ -274,6 +306,28 @@ class BuscadorMascota:
             except Exception as e:
                 st.error(f"❌ Error: {str(e)}")
     
+    @staticmethod
+    def _buscar_texto_libre():
+        """Busca a la vez en nombre, especie y raza (índice de texto)"""
+        texto = st.text_input("Nombre, especie o raza", placeholder="Ej: siames", key="buscar_texto_masc")
+        
+        if st.button("🔍 Buscar", use_container_width=True, key="btn_buscar_texto_masc"):
+            if not texto:
+                st.warning("⚠ Introduce algún texto")
+                return
+            
+            try:
+                mascotas = buscar_mascotas(texto)
+                if mascotas:
+                    st.success(f"✅ {len(mascotas)} mascota(s) encontrada(s)")
+                    for m in mascotas:
+                        with st.expander(f"{Utilidades.computarEmoticonoEspecie(m.especie)} {m.nombre} - {m.especie}"):
+                            BuscadorMascota._mostrar_detalle(m)
+                else:
+                    st.info(f"ℹ Sin resultados para: {texto}")
+            except Exception as e:
+                st.error(f"❌ Error: {str(e)}")
+    
     @staticmethod
     def _mostrar_detalle(mascota):
         tab1, tab2 = st.tabs(["Ficha de mascota", "Historial de citas"])
@@ -292,7 +346,7 @@ class BuscadorMascota:
                 st.markdown(f"**Sexo:** {mascota.sexo or 'No registrado'}")
             
             try:
-                cliente = obtener_cliente_por_id(mascota.cliente_id)
+                cliente = obtener_cliente_por_id(mascota.cliente_id, dto=True)
                 if cliente:
                     st.markdown(f"**Propietario:** {cliente.nombre} ({cliente.dni})")
             except:
@@ -301,7 +355,7 @@ class BuscadorMascota:
             citas = ver_historial_mascota(mascota.id)
             if citas:
                 for cita in citas:
-                    st.markdown(f"**Fecha y hora**: el **{Utilidades.formatear_fecha(cita.fecha)}** a las **{cita.hora}**")
+                    st.markdown(f"**Fecha y hora**: el **{Utilidades.formatear_fecha(cita.fecha)}** a las **{Utilidades.convertir_hora_a_string(cita.hora)}**")
                     st.markdown(f"**Motivo:** {cita.motivo}")
                     st.markdown(f"**Con:** {cita.veterinario.nombre} ({cita.veterinario.especialidad})")
                     st.markdown(f"**Estado:** {cita.estado}")
@@ -368,7 +422,7 @@ class EditorMascota:
                     st.error(f"❌ No existe cliente con DNI: {cliente_dni}")
                     return
                 
-                mascotas = obtener_mascotas_por_cliente(cliente.id)
+                mascotas = obtener_mascotas_por_cliente(cliente.id, dto=True)
                 if mascotas:
                     st.session_state.mascotas_encontradas = mascotas
                     st.session_state.mascota_seleccionada = None
@@ -455,7 +509,8 @@ class EditorMascota:
                         raza=nueva_raza if nueva_raza != (mascota.raza or "") else None,
                         edad=nueva_edad if nueva_edad != (mascota.edad or 0) else None,
                         peso=nuevo_peso if nuevo_peso != (mascota.peso or 0.0) else None,
-                        sexo=nuevo_sexo if nuevo_sexo != (mascota.sexo or "No especificado") else None
+                        sexo=nuevo_sexo if nuevo_sexo != (mascota.sexo or "No especificado") else None,
+                        dto=True
                     )
                     st.success("✅ Mascota actualizada")
                     st.session_state.mascota_seleccionada = masc_act
@@ -499,13 +554,15 @@ class EditorMascota:
 # MAIN - RENDERIZACIÓN
 # ========================
 
-tab1, tab2, tab3, tab4 = st.tabs(["Registrar", "Listar", "Buscar", "Editar/Eliminar"])
+# Devolver la conexión de este hilo al pool al terminar, también tras st.rerun()/st.stop()
+with sesion_de_pagina():
+    tab1, tab2, tab3, tab4 = st.tabs(["Registrar", "Listar", "Buscar", "Editar/Eliminar"])
 
-with tab1:
-    RegistrarMascota.mostrar()
-with tab2:
-    ListarMascotas.mostrar()
-with tab3:
-    BuscadorMascota.mostrar()
-with tab4:
-    EditorMascota.mostrar()
\ No newline at end of file
+    with tab1:
+        RegistrarMascota.mostrar()
+    with tab2:
+        ListarMascotas.mostrar()
+    with tab3:
+        BuscadorMascota.mostrar()
+    with tab4:
+        EditorMascota.mostrar()
@@ -31,16 +31,19 @@ ARQUITECTURA:
 
 import streamlit as st
 from src.veterinarios import (
-    crear_veterinario, listar_veterinarios, obtener_veterinario_por_id,
+    crear_veterinario, obtener_veterinario_por_id,
     buscar_veterinario_por_dni, buscar_veterinario_por_nombre,
     modificar_veterinario, eliminar_veterinario, veterinario_existe,
-    obtener_veterinarios_por_especialidad
+    obtener_veterinarios_por_especialidad, contar_veterinarios,
+    listar_veterinarios_paginado, listar_especialidades
 )
 from src.clientes import obtener_cliente_por_id
+from src.busqueda import buscar_veterinarios
 
 from src.citas import obtener_citas_por_veterinario
 
 from src.utils import Utilidades
+from src.database import sesion_de_pagina
 from src.exceptions import DNIDuplicadoException, ValidacionException, VeterinarioNoEncontradoException
 
 # ✅ PROTECCIÓN DE LOGIN
@@ -152,39 +155,66 @@ class RegistrarVeterinario:
 class ListarVeterinarios:
     """Responsabilidad: Mostrar listado de todos los veterinarios"""
     
+    TAMANO_PAGINA = 25
+    
     @staticmethod
     def mostrar():
-        """Renderiza el tab de listado"""
+        """Renderiza el tab de listado (una página cada vez)"""
         st.header("Lista de todos los veterinarios")
         
         try:
-            # OBTENER TODOS LOS VETERINARIOS
-            veterinarios = listar_veterinarios()
+            # TOTAL (COUNT, sin cargar veterinarios)
+            total = contar_veterinarios()
             
-            if not veterinarios:
+            if not total:
                 st.info("ℹ No hay veterinarios registrados")
                 return
             
             # MÉTRICA: Total
-            st.metric("Total de veterinarios", len(veterinarios))
+            st.metric("Total de veterinarios", total)
             
             # OPCIONALES: Filtro por especialidad
-            especialidades = list(set([v.especialidad for v in veterinarios if v.especialidad]))
+            filtro_especialidad = None
+            especialidades = listar_especialidades()
             if especialidades:
-                filtro_especialidad = st.selectbox(
+                seleccion = st.selectbox(
                     "Filtrar por especialidad:", 
                     ["Todas"] + especialidades, 
                     key="filtro_esp"
                 )
-                if filtro_especialidad != "Todas":
-                    veterinarios = [v for v in veterinarios if v.especialidad == filtro_especialidad]
+                filtro_especialidad = None if seleccion == "Todas" else seleccion
+            
+            # Si cambia el filtro, se vuelve a la primera página
+            if st.session_state.get("pag_veterinarios_filtro") != filtro_especialidad:
+                st.session_state.pag_veterinarios_filtro = filtro_especialidad
+                st.session_state.pag_veterinarios = (None, False)
             
             st.markdown("---")
-            ListarVeterinarios._mostrar_veterinarios(veterinarios)
+            cursor, hacia_atras = st.session_state.get("pag_veterinarios", (None, False))
+            pagina = listar_veterinarios_paginado(ListarVeterinarios.TAMANO_PAGINA, cursor, hacia_atras, filtro_especialidad)
+            if not pagina.elementos and cursor:
+                st.session_state.pag_veterinarios = (None, False)
+                st.rerun()
+            
+            ListarVeterinarios._mostrar_veterinarios(pagina.elementos)
+            ListarVeterinarios._controles_paginacion(pagina)
         
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
     
+    @staticmethod
+    def _controles_paginacion(pagina):
+        """Botones anterior/siguiente: guardan el cursor en session_state y relanzan"""
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("⬅ Anterior", disabled=not pagina.cursor_anterior, key="pag_veterinarios_ant", use_container_width=True):
+                st.session_state.pag_veterinarios = (pagina.cursor_anterior, True)
+                st.rerun()
+        with col2:
+            if st.button("Siguiente ➡", disabled=not pagina.cursor_siguiente, key="pag_veterinarios_sig", use_container_width=True):
+                st.session_state.pag_veterinarios = (pagina.cursor_siguiente, False)
+                st.rerun()
+    
     @staticmethod
     def _mostrar_veterinarios(veterinarios):
         """Renderiza cada veterinario en un expander"""
@@ -223,7 +253,7 @@ class ListarVeterinarios:
                                     st.markdown(f"**Peso:** {cita.mascota.peso or 'N/A'} kg")
                                     st.markdown(f"**Sexo:** {cita.mascota.sexo or 'No registrado'}")
                             with tab2:
-                                st.markdown(f"**Fecha y hora**: el **{Utilidades.formatear_fecha(cita.fecha)}** a las **{cita.hora}**")
+                                st.markdown(f"**Fecha y hora**: el **{Utilidades.formatear_fecha(cita.fecha)}** a las **{Utilidades.convertir_hora_a_string(cita.hora)}**")
                                 st.markdown(f"**Motivo:** {cita.motivo}")
                             st.divider()
                     else:
@@ -244,7 +274,7 @@ class BuscadorVeterinario:
         
         tipo = st.selectbox(
             "Buscar por:", 
-            ["DNI", "Nombre", "Especialidad"],
+            ["DNI", "Nombre", "Especialidad", "Texto libre"],
             key="tipo_busqueda_vet"
         )
         
@@ -252,8 +282,10 @@ class BuscadorVeterinario:
             BuscadorVeterinario._buscar_por_dni()
         elif tipo == "Nombre":
             BuscadorVeterinario._buscar_por_nombre()
-        else:
+        elif tipo == "Especialidad":
             BuscadorVeterinario._buscar_por_especialidad()
+        else:
+            BuscadorVeterinario._buscar_texto_libre()
     
     @staticmethod
     def _buscar_por_dni():
@@ -314,6 +346,27 @@ class BuscadorVeterinario:
             except Exception as e:
                 st.error(f"❌ Error: {str(e)}")
     
+    @staticmethod
+    def _buscar_texto_libre():
+        """Busca a la vez en nombre, DNI, especialidad, cargo, email y teléfono (índice de texto)"""
+        texto = st.text_input("Nombre, DNI, especialidad, email...", placeholder="Ej: cirugia", key="buscar_texto_vet")
+        
+        if st.button("🔍 Buscar", use_container_width=True, key="btn_buscar_texto_vet"):
+            if not texto:
+                st.warning("⚠ Introduce algún texto")
+                return
+            try:
+                veterinarios = buscar_veterinarios(texto)
+                if veterinarios:
+                    st.success(f"✅ {len(veterinarios)} encontrado(s)")
+                    for vet in veterinarios:
+                        with st.expander(f"🔹 {vet.nombre} - {vet.especialidad or 'N/A'}"):
+                            BuscadorVeterinario._mostrar_detalle(vet)
+                else:
+                    st.info(f"ℹ Sin resultados para: {texto}")
+            except Exception as e:
+                st.error(f"❌ Error: {str(e)}")
+    
     @staticmethod
     def _mostrar_detalle(veterinario):
         tab1, tab2 = st.tabs(["Ficha del veterinario", "Citas"])
@@ -349,7 +402,7 @@ class BuscadorVeterinario:
                             st.markdown(f"**Peso:** {cita.mascota.peso or 'N/A'} kg")
                             st.markdown(f"**Sexo:** {cita.mascota.sexo or 'No registrado'}")
                     with tab2:
-                        st.markdown(f"**Fecha y hora**: el **{Utilidades.formatear_fecha(cita.fecha)}** a las **{cita.hora}**")
+                        st.markdown(f"**Fecha y hora**: el **{Utilidades.formatear_fecha(cita.fecha)}** a las **{Utilidades.convertir_hora_a_string(cita.hora)}**")
                         st.markdown(f"**Motivo:** {cita.motivo}")
                     st.divider()
 
@@ -401,7 +454,7 @@ class EditorVeterinario:
                 st.warning("⚠ Introduce un DNI")
                 return
             try:
-                veterinario = buscar_veterinario_por_dni(dni)
+                veterinario = buscar_veterinario_por_dni(dni, dto=True)
                 if veterinario:
                     st.session_state.veterinario_seleccionado = veterinario
                     st.success(f"✅ {veterinario.nombre}")
@@ -480,7 +533,8 @@ class EditorVeterinario:
                             cargo=nuevo_cargo if nuevo_cargo != (veterinario.cargo or "") else None,
                             especialidad=nueva_especialidad if nueva_especialidad != (veterinario.especialidad or "") else None,
                             telefono=nuevo_tel_fmt if nuevo_tel_fmt != (veterinario.telefono or "") else None,
-                            email=nuevo_email_fmt if nuevo_email_fmt != (veterinario.email or "") else None
+                            email=nuevo_email_fmt if nuevo_email_fmt != (veterinario.email or "") else None,
+                            dto=True
                         )
                         st.success("✅ Actualizado")
                         st.session_state.veterinario_seleccionado = vet_act
@@ -526,13 +580,15 @@ class EditorVeterinario:
 # MAIN - RENDERIZACIÓN
 # ========================
 
-tab1, tab2, tab3, tab4 = st.tabs(["Registrar", "Listar", "Buscar", "Editar/Eliminar"])
-
-with tab1:
-    RegistrarVeterinario.mostrar()
-with tab2:
-    ListarVeterinarios.mostrar()
-with tab3:
-    BuscadorVeterinario.mostrar()
-with tab4:
-    EditorVeterinario.mostrar()
\ No newline at end of file
+# Devolver la conexión de este hilo al pool al terminar, también tras st.rerun()/st.stop()
+with sesion_de_pagina():
+    tab1, tab2, tab3, tab4 = st.tabs(["Registrar", "Listar", "Buscar", "Editar/Eliminar"])
+
+    with tab1:
+        RegistrarVeterinario.mostrar()
+    with tab2:
+        ListarVeterinarios.mostrar()
+    with tab3:
+        BuscadorVeterinario.mostrar()
+    with tab4:
+        EditorVeterinario.mostrar()
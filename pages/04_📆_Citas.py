@@ -5,17 +5,25 @@ descripción: interfaz Streamlit para gestión completa de citas veterinarias.
 """
 
 import streamlit as st
-from datetime import datetime, date
+import pandas as pd
+import calendar
+import tempfile
+from collections import defaultdict
+from datetime import datetime, date, time, timedelta
 from src.citas import (
-    crear_cita, listar_citas, obtener_cita_por_id,
+    crear_cita, listar_citas_paginado, contar_citas, obtener_cita_por_id,
     obtener_citas_por_mascota, obtener_citas_por_veterinario,
     obtener_citas_por_fecha, obtener_citas_por_estado,
-    modificar_cita, cancelar_cita
+    modificar_cita, cancelar_cita, modificar_ocurrencia, cancelar_ocurrencia,
+    obtener_ocupacion_calendario, version_datos_citas
 )
-from src.mascotas import listar_mascotas, obtener_mascota_por_id
-from src.veterinarios import listar_veterinarios, obtener_veterinario_por_id
-from src.clientes import obtener_cliente_por_id
+from src.series import crear_serie
+from src.mascotas import listar_opciones_mascotas
+from src.veterinarios import listar_opciones_veterinarios
+from src.exportacion import exportar_citas, formatos_disponibles
+from src.disponibilidad import obtener_huecos_libres_veterinario, HUECOS
 from src.utils import Utilidades
+from src.database import sesion_de_pagina
 from src.exceptions import ValidacionException
 
 # ✅ PROTECCIÓN DE LOGIN
@@ -37,114 +45,179 @@ st.markdown("---")
 
 
 
+def _nombre_cita(cita):
+    """"Cita 12", o "Serie 3 (dd/mm/aaaa)" para una ocurrencia que aún no es cita"""
+    if cita.id is None:
+        return f"Serie {cita.serie_id} ({Utilidades.formatear_fecha(cita.fecha_serie)})"
+    return f"Cita {cita.id}"
+
+
 # =========================================================
 #  CLASE 1 — REGISTRAR CITA
 # =========================================================
 class RegistrarCita:
     HORAS = ["09:00", "09:30", "10:00", "10:30", "11:00", "11:30", "12:00", "12:30",
              "13:00", "13:30", "14:00", "14:30", "15:00", "15:30", "16:00", "16:30", "17:00"]
+    REPETICION = {"No se repite": None, "Cada día": "DIARIA", "Cada semana": "SEMANAL", "Cada mes": "MENSUAL"}
 
     @staticmethod
     def mostrar():
         st.header("Registrar nueva cita")
 
+        # Veterinario y fecha fuera del formulario: al cambiarlos se recalculan los huecos libres
+        col1, col2 = st.columns(2)
+        with col1:
+            vet_id = RegistrarCita._select_vet()
+        with col2:
+            fecha = st.date_input("Fecha *", min_value=date.today(), value=date.today())
+
         with st.form("form_registrar_cita"):
             col1, col2 = st.columns(2)
 
             with col1:
                 mascota_id = RegistrarCita._select_mascota()
-                fecha = st.date_input("Fecha *", min_value=date.today(), value=date.today())
                 motivo = st.text_area("Motivo", placeholder="Ej: Vacunación, revisión...")
 
             with col2:
-                vet_id = RegistrarCita._select_vet()
-                hora = RegistrarCita._select_hora()
+                hora = RegistrarCita._select_hora(vet_id, fecha)
                 estado = st.selectbox("Estado", ["Pendiente", "Confirmada", "Realizada", "Cancelada"])
+                frecuencia = RegistrarCita.REPETICION[st.selectbox("Repetir", list(RegistrarCita.REPETICION))]
+                repeticiones = st.number_input("Número de citas (0 = sin final)", min_value=0, value=10)
 
             submit = st.form_submit_button("Registrar cita", use_container_width=True)
 
-            if submit:
+            if submit and frecuencia:
+                RegistrarCita._procesar_serie(mascota_id, vet_id, fecha, hora, motivo, frecuencia, repeticiones)
+            elif submit:
                 RegistrarCita._procesar(mascota_id, vet_id, fecha, hora, motivo, estado)
 
     @staticmethod
     def _select_mascota():
-        mascotas = listar_mascotas()
-        if not mascotas:
+        # {id: etiqueta}: una consulta (y solo si cambian los datos), no dos por mascota
+        opciones = dict(listar_opciones_mascotas())
+        if not opciones:
             st.warning("No hay mascotas registradas")
             return None
-        opciones = {f"{m.nombre} (Propietario: {obtener_cliente_por_id(m.cliente_id).nombre} ({obtener_cliente_por_id(m.cliente_id).dni}))": m.id for m in mascotas}
-        return opciones[st.selectbox("Mascota *", list(opciones.keys()))]
+        return st.selectbox("Mascota *", list(opciones), format_func=opciones.get)
 
     @staticmethod
     def _select_vet():
-        vets = listar_veterinarios()
-        if not vets:
+        opciones = dict(listar_opciones_veterinarios())
+        if not opciones:
             st.warning("No hay veterinarios registrados")
             return None
-        opciones = {f"{v.nombre} ({v.especialidad or 'General'})": v.id for v in vets}
-        return opciones[st.selectbox("Veterinario *", list(opciones.keys()))]
+        return st.selectbox("Veterinario *", list(opciones), format_func=opciones.get)
 
     @staticmethod
-    def _select_hora():
-        hora_str = st.selectbox("Hora *", RegistrarCita.HORAS)
-        return datetime.strptime(hora_str, "%H:%M").time()
+    def _select_hora(vet_id, fecha):
+        """Solo ofrece los huecos libres del veterinario ese día"""
+        if not vet_id:
+            return None
+        huecos = obtener_huecos_libres_veterinario(vet_id, fecha)
+        if not huecos:
+            st.warning("El veterinario no tiene huecos libres ese día")
+            return None
+        return st.selectbox("Hora *", huecos, format_func=Utilidades.convertir_hora_a_string)
 
     @staticmethod
     def _procesar(mascota_id, vet_id, fecha, hora, motivo, estado):
         if not mascota_id or not vet_id:
             st.error("Debes seleccionar mascota y veterinario")
             return
+        if not hora:
+            st.error("Elige otro día u otro veterinario: no quedan huecos libres")
+            return
         try:
             cita = crear_cita(mascota_id, vet_id, fecha, hora, motivo or None, estado)
             st.success(f"✅ Cita creada con ID {cita.id}")
         except Exception as e:
             st.error(str(e))
 
+    @staticmethod
+    def _procesar_serie(mascota_id, vet_id, fecha, hora, motivo, frecuencia, repeticiones):
+        """Las citas de la serie no se crean ahora: aparecen al consultar cada día"""
+        if not mascota_id or not vet_id or not hora:
+            st.error("Debes seleccionar mascota, veterinario y hora")
+            return
+        try:
+            serie = crear_serie(mascota_id, vet_id, fecha, hora, frecuencia,
+                                repeticiones=int(repeticiones) or None, motivo=motivo or None)
+            st.success(f"✅ Serie de citas creada con ID {serie.id}")
+        except Exception as e:
+            st.error(str(e))
+
 
 # =========================================================
 #  CLASE 2 — LISTAR CITAS
 # =========================================================
 class ListarCitas:
+    TAMANO_PAGINA = 25
+
     @staticmethod
     def mostrar():
         st.header("Listado de Citas")
 
-        citas = listar_citas()
-        if not citas:
+        total = contar_citas()
+        if not total:
             st.info("No hay citas registradas")
             return
 
-        st.metric("Total citas", len(citas))
+        st.metric("Total citas", total)
 
         filtro = st.selectbox("Filtrar por estado:",
                               ["Todas", "Pendiente", "Confirmada", "Realizada", "Cancelada"])
+        estado = None if filtro == "Todas" else filtro
 
-        if filtro != "Todas":
-            citas = [c for c in citas if c.estado == filtro]
+        # Si cambia el filtro, se vuelve a la primera página
+        if st.session_state.get("pag_citas_filtro") != estado:
+            st.session_state.pag_citas_filtro = estado
+            st.session_state.pag_citas = (None, False)
 
         st.markdown("---")
 
-        for c in citas:
+        # Mascota, cliente y veterinario vienen precargados en la misma consulta
+        cursor, hacia_atras = st.session_state.get("pag_citas", (None, False))
+        pagina = listar_citas_paginado(ListarCitas.TAMANO_PAGINA, cursor, hacia_atras, estado)
+        if not pagina.elementos and cursor:
+            st.session_state.pag_citas = (None, False)
+            st.rerun()
+
+        for c in pagina.elementos:
             ListarCitas._expander(c)
 
+        ListarCitas._controles_paginacion(pagina)
+
+    @staticmethod
+    def _controles_paginacion(pagina):
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("⬅ Anterior", disabled=not pagina.cursor_anterior, key="pag_citas_ant", use_container_width=True):
+                st.session_state.pag_citas = (pagina.cursor_anterior, True)
+                st.rerun()
+        with col2:
+            if st.button("Siguiente ➡", disabled=not pagina.cursor_siguiente, key="pag_citas_sig", use_container_width=True):
+                st.session_state.pag_citas = (pagina.cursor_siguiente, False)
+                st.rerun()
+
     @staticmethod
     def _expander(cita):
-        mascota = obtener_mascota_por_id(cita.mascota_id)
-        vet = obtener_veterinario_por_id(cita.veterinario_id)
-        cliente = obtener_cliente_por_id(mascota.cliente_id) if mascota else None
+        mascota = cita.mascota
+        vet = cita.veterinario
+        cliente = mascota.cliente if mascota else None
 
         icono = Utilidades.obtener_icono_estado_cita(cita.estado)
+        nombre_vet = vet.nombre if vet else "sin veterinario"
 
-        with st.expander(f"🔹{Utilidades.obtener_icono_estado_cita(cita.estado)} **Cita {cita.id}** - Para **{cita.veterinario.nombre}** el **{Utilidades.formatear_fecha(cita.fecha)}** a las **{cita.hora}**"):
+        with st.expander(f"🔹{icono} **Cita {cita.id}** - Para **{nombre_vet}** el **{Utilidades.formatear_fecha(cita.fecha)}** a las **{Utilidades.convertir_hora_a_string(cita.hora)}**"):
             st.subheader(f"Cita {cita.id}")
             col1, col2 = st.columns(2)
             with col1:
                 st.markdown(f"**Fecha:** {Utilidades.formatear_fecha(cita.fecha)}")
-                st.markdown(f"**Hora:** {cita.hora}")
+                st.markdown(f"**Hora:** {Utilidades.convertir_hora_a_string(cita.hora)}")
             with col2:
-                st.markdown(f"**Estado:** {Utilidades.obtener_icono_estado_cita(cita.estado)} {cita.estado}")
-                st.markdown(f"**Mascota:** {Utilidades.computarEmoticonoEspecie(mascota.especie) + mascota.nombre + ' ' + obtener_cliente_por_id(mascota.cliente_id).nombre + ' (' + obtener_cliente_por_id(mascota.cliente_id).dni + ')' if mascota else 'N/A'}")
-                st.markdown(f"**Veterinario:** {vet.nombre + ' (' + vet.especialidad + ')' if vet else 'N/A'}")
+                st.markdown(f"**Estado:** {icono} {cita.estado}")
+                st.markdown(f"**Mascota:** {Utilidades.computarEmoticonoEspecie(mascota.especie) + mascota.nombre + ' ' + cliente.nombre + ' (' + cliente.dni + ')' if mascota else 'N/A'}")
+                st.markdown(f"**Veterinario:** {vet.nombre + ' (' + (vet.especialidad or 'General') + ')' if vet else 'N/A'}")
             
             st.divider()
             st.markdown(f"**Motivo/Notas:** {cita.motivo if cita.motivo else 'N/A'}")
@@ -179,19 +252,20 @@ class BuscadorCita:
 
     @staticmethod
     def _mostrar(cita):
-        mascota = obtener_mascota_por_id(cita.mascota_id)
-        vet = obtener_veterinario_por_id(cita.veterinario_id)
+        """cita es un CitaDTO: mascota, propietario y veterinario vienen ya en él"""
+        mascota, vet = cita.mascota, cita.veterinario
+        nombre = _nombre_cita(cita)
     
-        with st.expander(f"🔹{Utilidades.obtener_icono_estado_cita(cita.estado)} **Cita {cita.id}** - Para **{cita.veterinario.nombre}** el **{Utilidades.formatear_fecha(cita.fecha)}** a las **{cita.hora}**"):
-            st.subheader(f"Cita {cita.id}")
+        with st.expander(f"🔹{Utilidades.obtener_icono_estado_cita(cita.estado)} **{nombre}** - Para **{vet.nombre if vet else 'N/A'}** el **{Utilidades.formatear_fecha(cita.fecha)}** a las **{Utilidades.convertir_hora_a_string(cita.hora)}**"):
+            st.subheader(nombre)
             col1, col2 = st.columns(2)
             with col1:
                 st.markdown(f"**Fecha:** {Utilidades.formatear_fecha(cita.fecha)}")
-                st.markdown(f"**Hora:** {cita.hora}")
+                st.markdown(f"**Hora:** {Utilidades.convertir_hora_a_string(cita.hora)}")
             with col2:
                 st.markdown(f"**Estado:** {Utilidades.obtener_icono_estado_cita(cita.estado)} {cita.estado}")
-                st.markdown(f"**Mascota:** {Utilidades.computarEmoticonoEspecie(mascota.especie) + mascota.nombre + ' ' + obtener_cliente_por_id(mascota.cliente_id).nombre + ' (' + obtener_cliente_por_id(mascota.cliente_id).dni + ')' if mascota else 'N/A'}")
-                st.markdown(f"**Veterinario:** {vet.nombre + ' (' + vet.especialidad + ')' if vet else 'N/A'}")
+                st.markdown(f"**Mascota:** {Utilidades.computarEmoticonoEspecie(mascota.especie) + mascota.nombre + ' ' + mascota.cliente.nombre + ' (' + mascota.cliente.dni + ')' if mascota else 'N/A'}")
+                st.markdown(f"**Veterinario:** {vet.nombre + ' (' + (vet.especialidad or 'General') + ')' if vet else 'N/A'}")
             
             st.divider()
             st.markdown(f"**Motivo/Notas:** {cita.motivo if cita.motivo else 'N/A'}")
@@ -201,7 +275,7 @@ class BuscadorCita:
         cita_id = st.number_input("ID", min_value=1)
         if st.button("Buscar ID"):
             try:
-                cita = obtener_cita_por_id(cita_id)
+                cita = obtener_cita_por_id(cita_id, dto=True)
                 BuscadorCita._mostrar(cita)
             except:
                 st.error("No encontrada")
@@ -210,7 +284,7 @@ class BuscadorCita:
     def _por_fecha():
         fecha = st.date_input("Fecha")
         if st.button("Buscar fecha"):
-            citas = obtener_citas_por_fecha(fecha)
+            citas = obtener_citas_por_fecha(fecha, dto=True)
             if citas:
                 for c in citas:
                     BuscadorCita._mostrar(c)
@@ -219,12 +293,11 @@ class BuscadorCita:
 
     @staticmethod
     def _por_mascota():
-        mascotas = listar_mascotas()
-        opciones = {f"{m.nombre} (ID {m.id})": m.id for m in mascotas}
-        mascota_id = opciones[st.selectbox("Mascota", list(opciones.keys()))]
+        opciones = dict(listar_opciones_mascotas())
+        mascota_id = st.selectbox("Mascota", list(opciones), format_func=opciones.get)
 
         if st.button("Buscar mascota"):
-            citas = obtener_citas_por_mascota(mascota_id)
+            citas = obtener_citas_por_mascota(mascota_id, dto=True)
             if citas:
                 for c in citas:
                     BuscadorCita._mostrar(c)
@@ -233,12 +306,11 @@ class BuscadorCita:
 
     @staticmethod
     def _por_vet():
-        vets = listar_veterinarios()
-        opciones = {v.nombre: v.id for v in vets}
-        vet_id = opciones[st.selectbox("Veterinario", list(opciones.keys()),key=("2"))]
+        opciones = dict(listar_opciones_veterinarios())
+        vet_id = st.selectbox("Veterinario", list(opciones), format_func=opciones.get, key="2")
 
         if st.button("Buscar veterinario"):
-            citas = obtener_citas_por_veterinario(vet_id)
+            citas = obtener_citas_por_veterinario(vet_id, dto=True)
             if citas:
                 for c in citas:
                     BuscadorCita._mostrar(c)
@@ -249,7 +321,7 @@ class BuscadorCita:
     def _por_estado():
         estado = st.selectbox("Estado", ["Pendiente", "Confirmada", "Realizada", "Cancelada"])
         if st.button("Buscar estado"):
-            citas = obtener_citas_por_estado(estado)
+            citas = obtener_citas_por_estado(estado, dto=True)
             if citas:
                 for c in citas:
                     BuscadorCita._mostrar(c)
@@ -288,30 +360,28 @@ class EditorCita:
         cita_id = st.number_input("ID cita", min_value=1)
         if st.button("Buscar cita ID"):
             try:
-                st.session_state.cita_sel = obtener_cita_por_id(cita_id)
+                st.session_state.cita_sel = obtener_cita_por_id(cita_id, dto=True)
             except:
                 st.error("Cita no encontrada")
                 st.session_state.cita_sel = None
 
     @staticmethod
     def _buscar_vet():
-        vets = listar_veterinarios()
-        opciones = {v.nombre: v.id for v in vets}
-        vet_id = opciones[st.selectbox("Veterinario", opciones.keys())]
+        opciones = dict(listar_opciones_veterinarios())
+        vet_id = st.selectbox("Veterinario", list(opciones), format_func=opciones.get)
 
         if st.button("Buscar citas vet"):
-            st.session_state.citas_lista = obtener_citas_por_veterinario(vet_id)
+            st.session_state.citas_lista = obtener_citas_por_veterinario(vet_id, dto=True)
 
         EditorCita._lista()
 
     @staticmethod
     def _buscar_masc():
-        mascotas = listar_mascotas()
-        opciones = {m.nombre: m.id for m in mascotas}
-        masc_id = opciones[st.selectbox("Mascota", opciones.keys())]
+        opciones = dict(listar_opciones_mascotas())
+        masc_id = st.selectbox("Mascota", list(opciones), format_func=opciones.get)
 
         if st.button("Buscar citas mascota"):
-            st.session_state.citas_lista = obtener_citas_por_mascota(masc_id)
+            st.session_state.citas_lista = obtener_citas_por_mascota(masc_id, dto=True)
 
         EditorCita._lista()
     
@@ -319,7 +389,7 @@ class EditorCita:
     def _buscar_fecha():
         fecha = st.date_input("Fecha")
         if st.button("Buscar fecha"):
-            st.session_state.citas_lista = obtener_citas_por_fecha(fecha)
+            st.session_state.citas_lista = obtener_citas_por_fecha(fecha, dto=True)
         if st.session_state.citas_lista:
             EditorCita._lista()
         else: 
@@ -333,9 +403,9 @@ class EditorCita:
             return
 
         for c in st.session_state.citas_lista:
-            titulo = f"ID {c.id} — {Utilidades.formatear_fecha(c.fecha)} {c.hora}"
+            titulo = f"{_nombre_cita(c)} — {Utilidades.formatear_fecha(c.fecha)} {Utilidades.convertir_hora_a_string(c.hora)}"
             with st.expander(titulo):
-                if st.button(f"Editar {c.id}"):
+                if st.button(f"Editar {_nombre_cita(c)}"):
                     st.session_state.cita_sel = c
                     st.session_state.citas_lista = None
                     st.rerun()
@@ -351,14 +421,15 @@ class EditorCita:
         cita = st.session_state.cita_sel
 
         st.markdown("---")
-        st.subheader(f"Editando cita {cita.id}")
+        st.subheader(f"Editando {_nombre_cita(cita).lower()}")
 
         with st.form("form_edit_cita"):
             col1, col2 = st.columns(2)
 
             with col1:
                 nueva_fecha = st.date_input("Fecha", value=cita.fecha)
-                hora_idx = EditorCita.HORAS.index(cita.hora) if cita.hora in EditorCita.HORAS else 0
+                hora_actual = Utilidades.convertir_hora_a_string(cita.hora)
+                hora_idx = EditorCita.HORAS.index(hora_actual) if hora_actual in EditorCita.HORAS else 0
                 hora_str = st.selectbox("Hora", EditorCita.HORAS, index=hora_idx)
                 nueva_hora = datetime.strptime(hora_str, "%H:%M").time()
                 nuevo_estado = st.selectbox("Estado", ["Pendiente", "Confirmada", "Realizada"],
@@ -373,14 +444,18 @@ class EditorCita:
 
         if actualizar:
             try:
-                cita_mod = modificar_cita(
-                    cita.id,
+                cambios = dict(
                     fecha=nueva_fecha if nueva_fecha != cita.fecha else None,
-                    hora=nueva_hora if nueva_hora.strftime("%H:%M") != cita.hora else None,
+                    hora=nueva_hora if nueva_hora != cita.hora else None,
                     motivo=motivo if motivo != (cita.motivo or "") else None,
                     estado=nuevo_estado if nuevo_estado != cita.estado else None,
                     diagnostico=diag if diag != (cita.diagnostico or "") else None
                 )
+                # Una ocurrencia de una serie se convierte en cita al modificarla
+                if cita.id is None:
+                    cita_mod = modificar_ocurrencia(cita.serie_id, cita.fecha_serie, **cambios, dto=True)
+                else:
+                    cita_mod = modificar_cita(cita.id, **cambios, dto=True)
                 st.success("Cita actualizada")
                 st.session_state.cita_sel = cita_mod
             except Exception as e:
@@ -388,7 +463,10 @@ class EditorCita:
 
         if cancelar:
             try:
-                cita_canc = cancelar_cita(cita.id)
+                if cita.id is None:
+                    cita_canc = cancelar_ocurrencia(cita.serie_id, cita.fecha_serie, dto=True)
+                else:
+                    cita_canc = cancelar_cita(cita.id, dto=True)
                 st.success("Cita cancelada")
                 st.session_state.cita_sel = cita_canc
             except Exception as e:
@@ -396,16 +474,160 @@ class EditorCita:
 
 
 # =========================================================
-#  MAIN
+#  CLASE 5 — EXPORTAR HISTORIAL
+# =========================================================
+class ExportarCitas:
+    TIPOS_MIME = {"csv": "text/csv", "jsonl": "application/jsonl", "parquet": "application/vnd.apache.parquet"}
+
+    @staticmethod
+    def mostrar():
+        st.header("Exportar historial de citas")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            desde = st.date_input("Desde", value=date.today() - timedelta(days=365), key="exp_desde")
+            hasta = st.date_input("Hasta", value=date.today(), key="exp_hasta")
+        with col2:
+            estado = st.selectbox("Estado", ["Todos", "Pendiente", "Confirmada", "Realizada", "Cancelada"], key="exp_estado")
+            opciones = {None: "Todos", **dict(listar_opciones_veterinarios())}
+            vet_id = st.selectbox("Veterinario", list(opciones), format_func=opciones.get, key="exp_vet")
+        formato = st.radio("Formato", formatos_disponibles(), horizontal=True, key="exp_formato")
+
+        if st.button("Preparar exportación", type="primary"):
+            # Las filas se escriben por lotes en un fichero temporal, no en una lista en memoria;
+            # al botón de descarga solo llega el resultado ya serializado
+            try:
+                with tempfile.TemporaryFile() as fichero:
+                    total = exportar_citas(fichero, formato, desde, hasta,
+                                           None if estado == "Todos" else estado, vet_id)
+                    fichero.seek(0)
+                    contenido = fichero.read()
+            except Exception as e:
+                st.error(f"❌ Error al exportar: {str(e)}")
+                return
+            if not total:
+                st.info("No hay citas con esos filtros")
+                return
+            st.success(f"{total} citas listas para descargar")
+            st.download_button(
+                f"⬇ Descargar citas.{formato}",
+                data=contenido,
+                file_name=f"citas_{desde}_{hasta}.{formato}",
+                mime=ExportarCitas.TIPOS_MIME[formato],
+            )
+
+
+# =========================================================
+#  CLASE 6 — CALENDARIO
 # =========================================================
+@st.cache_data(show_spinner=False, max_entries=64)
+def _ocupacion_ventana(desde, hasta, vet_ids, version):
+    """
+    Una consulta por ventana visible. version (version_datos_citas) forma parte
+    de la clave: al escribir citas cambia y la ventana se vuelve a pedir
+    """
+    return obtener_ocupacion_calendario(desde, hasta, list(vet_ids))
+
+
+class CalendarioCitas:
+    DIAS = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
+
+    @staticmethod
+    def mostrar():
+        st.header("Calendario")
+
+        opciones = dict(listar_opciones_veterinarios())
+        if not opciones:
+            st.info("No hay veterinarios registrados")
+            return
+
+        col1, col2, col3 = st.columns([1, 1, 2])
+        with col1:
+            vista = st.radio("Vista", ["Semana", "Mes"], horizontal=True, key="cal_vista")
+        with col2:
+            dia = st.date_input("Día", value=date.today(), key="cal_dia")
+        with col3:
+            elegidos = st.multiselect("Veterinarios", list(opciones), default=list(opciones)[:3],
+                                      format_func=opciones.get, key="cal_vets")
+        if not elegidos:
+            st.info("Elige al menos un veterinario")
+            return
 
-tab1, tab2, tab3, tab4 = st.tabs(["Registrar", "Listar", "Buscar", "Editar/Cancelar"])
+        desde, hasta = CalendarioCitas._ventana(vista, dia)
+        ocupacion = _ocupacion_ventana(desde, hasta, tuple(elegidos), version_datos_citas())
+        por_vet = defaultdict(list)
+        for celda in ocupacion:
+            por_vet[celda.veterinario_id].append(celda)
+
+        st.caption(f"{Utilidades.formatear_fecha(desde)} – {Utilidades.formatear_fecha(hasta)}  ·  "
+                   + "  ".join(f"{Utilidades.obtener_icono_estado_cita(e)} {e}"
+                               for e in ["Pendiente", "Confirmada", "Realizada", "Cancelada"]))
+        for vet_id in elegidos:
+            celdas = por_vet[vet_id]
+            st.subheader(f"{opciones[vet_id]} ({sum(c.total for c in celdas if c.estado != 'Cancelada')} citas)")
+            if vista == "Semana":
+                tabla = CalendarioCitas._tabla_semana(celdas, desde)
+            else:
+                tabla = CalendarioCitas._tabla_mes(celdas, desde, hasta)
+            st.dataframe(tabla, use_container_width=True)
+
+    @staticmethod
+    def _ventana(vista, dia):
+        """Semana de lunes a domingo, o mes completo, que contiene dia"""
+        if vista == "Semana":
+            lunes = dia - timedelta(days=dia.weekday())
+            return lunes, lunes + timedelta(days=6)
+        return dia.replace(day=1), dia.replace(day=calendar.monthrange(dia.year, dia.month)[1])
+
+    @staticmethod
+    def _tabla_semana(celdas, lunes):
+        """Filas = huecos de 30 min, columnas = días; cada celda, un icono por cita"""
+        iconos = defaultdict(str)
+        for c in celdas:
+            hueco = time(c.hora.hour, c.hora.minute // 30 * 30)
+            iconos[(c.fecha, hueco)] += Utilidades.obtener_icono_estado_cita(c.estado) * c.total
+        dias = [lunes + timedelta(days=i) for i in range(7)]
+        return pd.DataFrame(
+            {f"{CalendarioCitas.DIAS[d.weekday()]} {d:%d/%m}": [iconos[(d, h)] for h in HUECOS] for d in dias},
+            index=[Utilidades.convertir_hora_a_string(h) for h in HUECOS],
+        )
+
+    @staticmethod
+    def _tabla_mes(celdas, desde, hasta):
+        """Filas = semanas, columnas = días de la semana; cada celda, día y número de citas"""
+        totales = defaultdict(int)
+        for c in celdas:
+            if c.estado != "Cancelada":
+                totales[c.fecha] += c.total
+        inicio = desde - timedelta(days=desde.weekday())
+        semanas = []
+        while inicio <= hasta:
+            dias = [inicio + timedelta(days=i) for i in range(7)]
+            semanas.append([
+                (f"{d.day} · {totales[d]}" if totales[d] else str(d.day)) if desde <= d <= hasta else ""
+                for d in dias
+            ])
+            inicio += timedelta(days=7)
+        return pd.DataFrame(semanas, columns=CalendarioCitas.DIAS)
+
+
+# =========================================================
+#  MAIN
+# =========================================================
 
-with tab1:
-    RegistrarCita.mostrar()
-with tab2:
-    ListarCitas.mostrar()
-with tab3:
-    BuscadorCita.mostrar()
-with tab4:
-    EditorCita.mostrar()
\ No newline at end of file
+# Devolver la conexión de este hilo al pool al terminar, también tras st.rerun()/st.stop()
+with sesion_de_pagina():
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Registrar", "Listar", "Calendario", "Buscar", "Editar/Cancelar", "Exportar"])
+
+    with tab1:
+        RegistrarCita.mostrar()
+    with tab2:
+        ListarCitas.mostrar()
+    with tab3:
+        CalendarioCitas.mostrar()
+    with tab4:
+        BuscadorCita.mostrar()
+    with tab5:
+        EditorCita.mostrar()
+    with tab6:
+        ExportarCitas.mostrar()
@@ -20,6 +20,8 @@ from src.analisis import (
     obtener_especie_mas_comun
 )
 import time
+from src.database import sesion_de_pagina, version_datos
+from src.utils import Utilidades
 
 
 # ✅ PROTECCIÓN DE LOGIN
@@ -33,6 +35,22 @@ st.markdown("""
     background: linear-gradient(to top, rgb(194, 211, 255), rgb(255, 255, 255));
 </style>
 """, unsafe_allow_html=True)
+
+# =========================
+# CACHÉ POR VERSIÓN DE DATOS
+# =========================
+# version forma parte de la clave: si las tablas cambian, se vuelve a consultar
+
+@st.cache_data(show_spinner=False)
+def _carga_veterinarios(version):
+    return obtener_carga_veterinarios()
+
+
+@st.cache_data(show_spinner=False)
+def _mascotas_por_especie(version):
+    return obtener_mascotas_por_especie()
+
+
 # =========================
 # CLASES DE VISUALIZACIÓN (SOLID)
 # =========================
@@ -59,7 +77,7 @@ class AnalisisCargaVeterinaria:
     @staticmethod
     def mostrar():
         try:
-            carga = obtener_carga_veterinarios()
+            carga = _carga_veterinarios(version_datos("veterinarios", "citas"))
             
             if not carga:
                 st.info("No hay veterinarios ni citas registradas")
@@ -98,14 +116,13 @@ class AnalisisByEspecie:
     @staticmethod
     def mostrar():
         try:
-            especiedict = obtener_mascotas_por_especie()
+            especiedict = _mascotas_por_especie(version_datos("mascotas"))
             
             if not especiedict:
                 st.info("No hay mascotas registradas.")
                 return
                         
             st.subheader("🐶 Mascotas registradas por especie")
-            print(">>> especiedict=", especiedict)
             df = pd.DataFrame([
     {"Especie": k, "Cantidad": v}
     for k, v in especiedict.items()
@@ -161,9 +178,9 @@ class AnalisisProximasCitas:
                         data = []
                         for c in citas:
                             data.append({
-                                'ID': c.id,
+                                'ID': c.id if c.id is not None else f"Serie {c.serie_id}",
                                 'Fecha': str(c.fecha),
-                                'Hora': c.hora,
+                                'Hora': Utilidades.convertir_hora_a_string(c.hora),
                                 'Mascota': c.mascota.nombre,
                                 'Cliente': c.mascota.cliente.nombre,
                                 'Veterinario': c.veterinario.nombre,
@@ -250,4 +267,6 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Devolver la conexión de este hilo al pool al terminar, también tras st.rerun()/st.stop()
+    with sesion_de_pagina():
+        main()
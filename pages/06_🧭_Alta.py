@@ -0,0 +1,211 @@
+"""
+título: página de alta de clientes
+fecha: 16.10.2026
+descripción: asistente Streamlit para dar de alta un cliente con sus mascotas
+y sus primeras citas en un solo paso (una transacción: o se guarda todo o nada).
+"""
+
+import streamlit as st
+from datetime import date
+from src.transacciones import transaccion
+from src.clientes import crear_cliente, buscar_cliente_por_dni
+from src.mascotas import registrar_mascota
+from src.citas import crear_cita
+from src.veterinarios import listar_opciones_veterinarios
+from src.disponibilidad import HUECOS
+from src.utils import Utilidades
+from src.database import sesion_de_pagina
+
+# ✅ PROTECCIÓN DE LOGIN
+if not st.session_state.get("logged_in", False):
+    st.warning("⚠ Debes iniciar sesión para acceder")
+    st.stop()
+
+
+# ============= Configuración =============
+st.set_page_config(page_title="Alta de Clientes", page_icon="🧭", layout="wide")
+st.title("🧭 Alta de Clientes")
+st.markdown("""
+<style>
+.stApp {
+    background: linear-gradient(to top, rgb(194, 211, 255), rgb(255, 255, 255));
+</style>
+""", unsafe_allow_html=True)
+st.markdown("---")
+
+# Estado del asistente: nada se guarda en la BD hasta el paso final
+if "alta_paso" not in st.session_state:
+    st.session_state.alta_paso = 1
+    st.session_state.alta_cliente = None      # dict con los datos del cliente
+    st.session_state.alta_mascotas = []       # lista de dicts, cada uno con su "cita" opcional
+
+
+def _reiniciar():
+    st.session_state.alta_paso = 1
+    st.session_state.alta_cliente = None
+    st.session_state.alta_mascotas = []
+
+
+# =========================================================
+#  PASO 1 — DATOS DEL CLIENTE
+# =========================================================
+class PasoCliente:
+    @staticmethod
+    def mostrar():
+        st.header("1. Datos del cliente")
+        previo = st.session_state.alta_cliente or {}
+
+        with st.form("form_alta_cliente"):
+            col1, col2 = st.columns(2)
+            with col1:
+                nombre = st.text_input("Nombre completo *", value=previo.get("nombre", ""))
+                dni = st.text_input("DNI *", value=previo.get("dni", ""), placeholder="Ej: 12345678A")
+            with col2:
+                telefono = st.text_input("Teléfono", value=previo.get("telefono") or "")
+                email = st.text_input("Email", value=previo.get("email") or "")
+
+            if st.form_submit_button("Siguiente ➡", use_container_width=True):
+                PasoCliente._procesar(nombre, dni, telefono, email)
+
+    @staticmethod
+    def _procesar(nombre, dni, telefono, email):
+        if not nombre or not dni:
+            st.error("❌ Nombre y DNI son obligatorios")
+            return
+        if not Utilidades.validar_dni(dni):
+            st.error("❌ El DNI debe tener formato: 12345678A")
+            return
+        dni = Utilidades.formatear_dni(dni)
+        if buscar_cliente_por_dni(dni):
+            st.error(f"❌ Ya existe un cliente con DNI {dni}")
+            return
+        st.session_state.alta_cliente = dict(
+            nombre=Utilidades.formatear_nombre(nombre), dni=dni,
+            telefono=telefono or None, email=email or None,
+        )
+        st.session_state.alta_paso = 2
+        st.rerun()
+
+
+# =========================================================
+#  PASO 2 — MASCOTAS Y PRIMERAS CITAS
+# =========================================================
+class PasoMascotas:
+    ESPECIES = ["Perro", "Gato", "Conejo", "Pájaro", "Otros"]
+    SIN_CITA = "Sin cita"
+
+    @staticmethod
+    def mostrar():
+        st.header("2. Mascotas y primeras citas")
+        PasoMascotas._lista()
+
+        veterinarios = dict(listar_opciones_veterinarios())
+        with st.form("form_alta_mascota", clear_on_submit=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                nombre = st.text_input("Nombre mascota *")
+                especie = st.selectbox("Especie *", PasoMascotas.ESPECIES)
+                raza = st.text_input("Raza")
+            with col2:
+                vet_id = st.selectbox("Primera cita con", [PasoMascotas.SIN_CITA] + list(veterinarios),
+                                      format_func=lambda v: veterinarios.get(v, v))
+                fecha = st.date_input("Fecha", min_value=date.today(), value=date.today())
+                hora = st.selectbox("Hora", HUECOS, format_func=Utilidades.convertir_hora_a_string)
+                motivo = st.text_input("Motivo", placeholder="Ej: Primera visita")
+
+            if st.form_submit_button("Añadir mascota", use_container_width=True):
+                PasoMascotas._anadir(nombre, especie, raza, vet_id, fecha, hora, motivo)
+
+        col1, col2 = st.columns(2)
+        if col1.button("⬅ Atrás", use_container_width=True):
+            st.session_state.alta_paso = 1
+            st.rerun()
+        if col2.button("Siguiente ➡", use_container_width=True, disabled=not st.session_state.alta_mascotas):
+            st.session_state.alta_paso = 3
+            st.rerun()
+
+    @staticmethod
+    def _lista():
+        for i, mascota in enumerate(st.session_state.alta_mascotas):
+            col1, col2 = st.columns([5, 1])
+            col1.write(f"{Utilidades.computarEmoticonoEspecie(mascota['especie'])} **{mascota['nombre']}** "
+                       f"— {PasoMascotas._texto_cita(mascota['cita'])}")
+            if col2.button("🗑", key=f"alta_quitar_{i}"):
+                st.session_state.alta_mascotas.pop(i)
+                st.rerun()
+
+    @staticmethod
+    def _texto_cita(cita):
+        if not cita:
+            return PasoMascotas.SIN_CITA
+        return f"cita el {Utilidades.formatear_fecha(cita['fecha'])} a las {Utilidades.convertir_hora_a_string(cita['hora'])}"
+
+    @staticmethod
+    def _anadir(nombre, especie, raza, vet_id, fecha, hora, motivo):
+        if not nombre:
+            st.error("❌ El nombre de la mascota es obligatorio")
+            return
+        if not Utilidades.validar_nombre(nombre):
+            st.error("❌ El nombre solo puede contener letras")
+            return
+        cita = None
+        if vet_id != PasoMascotas.SIN_CITA:
+            cita = dict(veterinario_id=vet_id, fecha=fecha, hora=hora, motivo=motivo or None)
+        st.session_state.alta_mascotas.append(dict(
+            nombre=Utilidades.formatear_nombre(nombre), especie=especie, raza=raza or None, cita=cita,
+        ))
+        st.rerun()
+
+
+# =========================================================
+#  PASO 3 — CONFIRMAR
+# =========================================================
+class PasoConfirmar:
+    @staticmethod
+    def mostrar():
+        st.header("3. Confirmar alta")
+        cliente = st.session_state.alta_cliente
+        st.write(f"**Cliente:** {cliente['nombre']} ({cliente['dni']})")
+        for mascota in st.session_state.alta_mascotas:
+            st.write(f"- {mascota['nombre']} ({mascota['especie']}): {PasoMascotas._texto_cita(mascota['cita'])}")
+
+        col1, col2 = st.columns(2)
+        if col1.button("⬅ Atrás", use_container_width=True):
+            st.session_state.alta_paso = 2
+            st.rerun()
+        if col2.button("✅ Confirmar alta", use_container_width=True, type="primary"):
+            PasoConfirmar._guardar(cliente, st.session_state.alta_mascotas)
+
+    @staticmethod
+    def _guardar(datos_cliente, datos_mascotas):
+        """Todo en una transacción: un solo commit, y si algo falla no queda nada a medias"""
+        try:
+            with transaccion():
+                cliente = crear_cliente(**datos_cliente)
+                citas = 0
+                for datos in datos_mascotas:
+                    mascota = registrar_mascota(datos["nombre"], datos["especie"], cliente.id, raza=datos["raza"])
+                    if datos["cita"]:
+                        crear_cita(mascota.id, **datos["cita"])
+                        citas += 1
+        except Exception as e:
+            st.error(f"❌ No se ha guardado nada: {str(e)}")
+            return
+        _reiniciar()
+        st.success(f"✅ Cliente {cliente.nombre} dado de alta con {len(datos_mascotas)} mascota(s) y {citas} cita(s)")
+
+
+# =========================================================
+#  MAIN
+# =========================================================
+
+# Devolver la conexión de este hilo al pool al terminar, también tras st.rerun()/st.stop()
+with sesion_de_pagina():
+    st.progress(st.session_state.alta_paso / 3, text=f"Paso {st.session_state.alta_paso} de 3")
+
+    if st.session_state.alta_paso == 1:
+        PasoCliente.mostrar()
+    elif st.session_state.alta_paso == 2:
+        PasoMascotas.mostrar()
+    else:
+        PasoConfirmar.mostrar()
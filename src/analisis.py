@@ -6,40 +6,121 @@ Cubre los requisitos funcionales RF12 (carga de trabajo) y RF16 (próximas citas
 Proporciona dashboards y análisis de datos.
 """
 
-from src.database import session, Cliente, Mascota, Veterinario, Cita
+from src.database import session, Cliente, Mascota, Veterinario, Cita, en_transaccion
+from src.series import expandir_series
+from sqlalchemy import func, and_, select
 from datetime import date, timedelta
-from collections import Counter
+from types import MappingProxyType
+import threading
+import time
 
 
-def obtener_estadisticas_generales():
+# ========================
+# CACHÉ DE ESTADÍSTICAS
+# ========================
+# La instantánea se reutiliza durante ttl segundos y los repositorios
+# la invalidan explícitamente al crear/eliminar (o cambiar el estado de una cita)
+
+class _CacheEstadisticas:
+    """Caché en proceso de la última instantánea de estadísticas generales"""
+
+    ttl = 30.0
+    aciertos = 0
+    fallos = 0
+    _instantanea = None
+    _expira = 0.0
+    _lock = threading.Lock()
+
+    @classmethod
+    def obtener(cls):
+        """Devuelve la instantánea vigente o None si no hay / ha caducado"""
+        with cls._lock:
+            if cls._instantanea is not None and time.monotonic() < cls._expira:
+                cls.aciertos += 1
+                return cls._instantanea
+            cls.fallos += 1
+            return None
+
+    @classmethod
+    def guardar(cls, instantanea):
+        with cls._lock:
+            cls._instantanea = instantanea
+            cls._expira = time.monotonic() + cls.ttl
+
+    @classmethod
+    def invalidar(cls):
+        with cls._lock:
+            cls._instantanea = None
+            cls._expira = 0.0
+
+
+def configurar_cache_estadisticas(ttl_segundos: float) -> None:
+    """Cambia el TTL (en segundos) de la caché de estadísticas. 0 la desactiva"""
+    if ttl_segundos < 0:
+        raise ValueError("El TTL no puede ser negativo")
+    _CacheEstadisticas.ttl = float(ttl_segundos)
+    _CacheEstadisticas.invalidar()
+
+
+def invalidar_cache_estadisticas() -> None:
+    """Descarta la instantánea cacheada (lo llaman los repositorios tras sus commits)"""
+    _CacheEstadisticas.invalidar()
+
+
+def obtener_metricas_cache_estadisticas():
+    """
+    Devuelve los contadores de la caché de estadísticas
+    Return: dict con aciertos (int), fallos (int), ttl (float)
+    """
+    return dict(
+        aciertos=_CacheEstadisticas.aciertos,
+        fallos=_CacheEstadisticas.fallos,
+        ttl=_CacheEstadisticas.ttl
+    )
+
+
+def _calcular_estadisticas_generales():
+    """Los cinco COUNT como subconsultas escalares de una única sentencia SELECT"""
+    consulta = select(
+        select(func.count(Cliente.id)).scalar_subquery().label("total_clientes"),
+        select(func.count(Mascota.id)).scalar_subquery().label("total_mascotas"),
+        select(func.count(Veterinario.id)).scalar_subquery().label("total_veterinarios"),
+        select(func.count(Cita.id)).scalar_subquery().label("total_citas"),
+        select(func.count(Cita.id)).where(Cita.estado == 'Pendiente').scalar_subquery().label("citas_pendientes"),
+    )
+    fila = session.execute(consulta).one()
+    return MappingProxyType(dict(fila._mapping))
+
+
+def obtener_estadisticas_generales(usar_cache: bool = True):
     """
     Devuelve estadísticas generales de la clínica
-    Return: dict con total_clientes, total_mascotas, total_veterinarios, 
+    Una sola consulta; el resultado es una instantánea inmutable cacheada con TTL
+    Args: usar_cache (bool): False fuerza la consulta a la BD
+    Return: mapping de solo lectura con total_clientes, total_mascotas, total_veterinarios, 
             total_citas, citas_pendientes
     """
     try:
-        total_clientes = session.query(Cliente).count()
-        total_mascotas = session.query(Mascota).count()
-        total_veterinarios = session.query(Veterinario).count()
-        total_citas = session.query(Cita).count()
-        citas_pendientes = session.query(Cita).filter(Cita.estado == 'Pendiente').count()
-        
-        return dict(
-            total_clientes=total_clientes,
-            total_mascotas=total_mascotas,
-            total_veterinarios=total_veterinarios,
-            total_citas=total_citas,
-            citas_pendientes=citas_pendientes
-        )
+        # Dentro de transaccion() los recuentos incluyen cambios aún sin confirmar
+        usar_cache = usar_cache and not en_transaccion()
+        if usar_cache:
+            instantanea = _CacheEstadisticas.obtener()
+            if instantanea is not None:
+                return instantanea
+
+        instantanea = _calcular_estadisticas_generales()
+        if usar_cache:
+            _CacheEstadisticas.guardar(instantanea)
+        return instantanea
     except Exception as e:
         print(f"Error en obtener_estadisticas_generales: {str(e)}")
-        return {
+        return MappingProxyType({
             'total_clientes': 0,
             'total_mascotas': 0,
             'total_veterinarios': 0,
             'total_citas': 0,
             'citas_pendientes': 0
-        }
+        })
 
 
 def obtener_total_clientes():
@@ -62,37 +143,69 @@ def obtener_citas_pendientes():
     return obtener_estadisticas_generales()['citas_pendientes']
 
 
-def obtener_carga_veterinarios():
+def obtener_carga_veterinarios(fecha_desde: date = None, fecha_hasta: date = None, desglose_estado: bool = False):
     """
     Devuelve carga de trabajo de cada veterinario (RF12)
+    Se resuelve con UNA consulta agrupada (veterinarios LEFT OUTER JOIN citas),
+    así que los veterinarios sin citas aparecen con num_citas = 0.
+    Args: fecha_desde, fecha_hasta (date, opcionales): rango cerrado de fechas de cita
+          desglose_estado (bool): si True, añade 'por_estado' {estado: num_citas}
     Return: Lista de dicts con: veterinario_id (int), nombre (str), num_citas (int)
+            num_citas no cuenta las citas canceladas (el desglose sí las incluye)
     """
     try:
-        veterinarios = session.query(Veterinario).all()
-        data = []
-        for v in veterinarios:
-            num_citas = session.query(Cita).filter(
-                Cita.veterinario_id == v.id,
-                Cita.estado != "Cancelada"
-            ).count()
-            data.append(dict(
-                veterinario_id=v.id,
-                nombre=v.nombre,
-                num_citas=num_citas
+        condicion = [Cita.veterinario_id == Veterinario.id]
+        if fecha_desde:
+            condicion.append(Cita.fecha >= fecha_desde)
+        if fecha_hasta:
+            condicion.append(Cita.fecha <= fecha_hasta)
+
+        if not desglose_estado:
+            filas = session.query(
+                Veterinario.id, Veterinario.nombre, func.count(Cita.id)
+            ).outerjoin(
+                Cita, and_(*condicion, Cita.estado != "Cancelada")
+            ).group_by(Veterinario.id, Veterinario.nombre).order_by(Veterinario.id).all()
+
+            return [
+                dict(veterinario_id=vet_id, nombre=nombre, num_citas=num_citas)
+                for vet_id, nombre, num_citas in filas
+            ]
+
+        # Con desglose: una fila por (veterinario, estado), se pliega en Python
+        filas = session.query(
+            Veterinario.id, Veterinario.nombre, Cita.estado, func.count(Cita.id)
+        ).outerjoin(
+            Cita, and_(*condicion)
+        ).group_by(Veterinario.id, Veterinario.nombre, Cita.estado).order_by(Veterinario.id).all()
+
+        data = {}
+        for vet_id, nombre, estado, num in filas:
+            fila = data.setdefault(vet_id, dict(
+                veterinario_id=vet_id,
+                nombre=nombre,
+                num_citas=0,
+                por_estado={}
             ))
-        return data
+            if estado is None:  # veterinario sin citas (fila del OUTER JOIN)
+                continue
+            fila["por_estado"][estado] = num
+            if estado != "Cancelada":
+                fila["num_citas"] += num
+        return list(data.values())
     except Exception as e:
         print(f"Error en obtener_carga_veterinarios: {str(e)}")
         return []
 
 
-def obtener_veterinario_con_mas_citas():
+def obtener_veterinario_con_mas_citas(fecha_desde: date = None, fecha_hasta: date = None):
     """
     Encuentra veterinario con más citas asignadas
+    Reutiliza obtener_carga_veterinarios() (misma consulta agrupada)
     Return: dict con id (int), nombre (str), num_citas (int)
     """
     try:
-        lista = obtener_carga_veterinarios()
+        lista = obtener_carga_veterinarios(fecha_desde, fecha_hasta)
         if not lista:
             return None
         
@@ -110,36 +223,72 @@ def obtener_veterinario_con_mas_citas():
         return None
 
 
-def obtener_especie_mas_comun():
+def obtener_especie_mas_comun(cliente_id: int = None, raza: str = None, sexo: str = None):
     """
     Devuelve la especie de mascota más registrada
+    Se resuelve en SQL (GROUP BY + ORDER BY count DESC LIMIT 1), sin construir el dict completo
     Return: Nombre de la especie (str)
     """
     try:
-        especie_stats = obtener_mascotas_por_especie()
-        if not especie_stats:
-            return None
-        return max(especie_stats, key=especie_stats.get)
+        conteo = func.count(Mascota.id)
+        fila = _consulta_mascotas_por_especie(cliente_id, raza, sexo).order_by(
+            conteo.desc(), Mascota.especie
+        ).limit(1).first()
+        return fila[0] if fila else None
     except Exception as e:
         print(f"Error en obtener_especie_mas_comun: {str(e)}")
         return None
 
 
-def obtener_mascotas_por_especie():
+def _consulta_mascotas_por_especie(cliente_id: int = None, raza: str = None, sexo: str = None):
+    """Query agrupada (especie, num_mascotas) con los filtros opcionales aplicados"""
+    q = session.query(Mascota.especie, func.count(Mascota.id)).filter(
+        Mascota.especie.isnot(None),
+        Mascota.especie != ""
+    )
+    if cliente_id is not None:
+        q = q.filter(Mascota.cliente_id == cliente_id)
+    if raza:
+        q = q.filter(Mascota.raza == raza)
+    if sexo:
+        q = q.filter(Mascota.sexo == sexo)
+    return q.group_by(Mascota.especie)
+
+
+def iterar_mascotas_por_especie(cliente_id: int = None, raza: str = None, sexo: str = None):
+    """
+    Recorre el conteo de mascotas por especie calculado en la BD
+    Solo viajan tuplas (especie, cantidad), nunca objetos Mascota
+    Args: cliente_id (int), raza (str), sexo (str) - filtros opcionales
+    Return: generador de tuplas (especie (str), cantidad (int))
+    """
+    for especie, cantidad in _consulta_mascotas_por_especie(cliente_id, raza, sexo):
+        yield especie, cantidad
+
+
+def obtener_mascotas_por_especie(cliente_id: int = None, raza: str = None, sexo: str = None):
     """
-    Cuenta mascotas agrupadas por especie
+    Cuenta mascotas agrupadas por especie (GROUP BY en SQL)
+    Args: cliente_id (int), raza (str), sexo (str) - filtros opcionales
     Return: dict con especie (str): cantidad (int)
     """
     try:
-        mascotas = session.query(Mascota).all()
-        conteo = Counter([m.especie for m in mascotas if m.especie])
-        print(dict(conteo)) # Funciona: {'Perro': 3, 'Pájaro': 1}
-        return dict(conteo)
+        return dict(iterar_mascotas_por_especie(cliente_id, raza, sexo))
     except Exception as e:
         print(f"Error en obtener_mascotas_por_especie: {str(e)}")
         return {}
 
 
+def _citas_no_canceladas(fecha_desde: date, fecha_hasta: date):
+    """Citas no canceladas del rango (incluido) más las ocurrencias de las series, por fecha y hora"""
+    citas = session.query(Cita).filter(
+        Cita.fecha >= fecha_desde,
+        Cita.fecha <= fecha_hasta,
+        Cita.estado != "Cancelada"
+    ).order_by(Cita.fecha, Cita.hora).all()
+    return sorted(citas + expandir_series(fecha_desde, fecha_hasta), key=lambda c: (c.fecha, c.hora))
+
+
 def obtener_proximas_citas_hoy():
     """
     Devuelve citas programadas para hoy (RF16)
@@ -147,11 +296,7 @@ def obtener_proximas_citas_hoy():
     """
     try:
         hoy = date.today()
-        citas = session.query(Cita).filter(
-            Cita.fecha == hoy,
-            Cita.estado != "Cancelada"
-        ).order_by(Cita.hora).all()
-        return citas
+        return _citas_no_canceladas(hoy, hoy)
     except Exception as e:
         print(f"Error en obtener_proximas_citas_hoy: {str(e)}")
         return []
@@ -160,17 +305,11 @@ def obtener_proximas_citas_hoy():
 def obtener_proximas_citas_semana():
     """
     Devuelve citas de la próxima semana (RF16)
-    Return: Lista de citas de los próximos 7 días
+    Return: Lista de citas de los próximos 7 días (incluidas las de series)
     """
     try:
         hoy = date.today()
-        semana = hoy + timedelta(days=7)
-        citas = session.query(Cita).filter(
-            Cita.fecha >= hoy,
-            Cita.fecha < semana,
-            Cita.estado != "Cancelada"
-        ).order_by(Cita.fecha, Cita.hora).all()
-        return citas
+        return _citas_no_canceladas(hoy, hoy + timedelta(days=6))
     except Exception as e:
         print(f"Error en obtener_proximas_citas_semana: {str(e)}")
         return []
@@ -179,17 +318,11 @@ def obtener_proximas_citas_semana():
 def obtener_proximas_citas_mes():
     """
     Devuelve citas del próximo mes (RF16)
-    Return: Lista de citas de los próximos 30 días
+    Return: Lista de citas de los próximos 30 días (incluidas las de series)
     """
     try:
         hoy = date.today()
-        mes = hoy + timedelta(days=30)
-        citas = session.query(Cita).filter(
-            Cita.fecha >= hoy,
-            Cita.fecha < mes,
-            Cita.estado != "Cancelada"
-        ).order_by(Cita.fecha, Cita.hora).all()
-        return citas
+        return _citas_no_canceladas(hoy, hoy + timedelta(days=29))
     except Exception as e:
         print(f"Error en obtener_proximas_citas_mes: {str(e)}")
         return []
@@ -0,0 +1,140 @@
+"""
+título: módulo de búsqueda de texto
+fecha: 16.10.2026
+descripción: búsqueda indexada (SQLite FTS5) de clientes, mascotas y veterinarios.
+
+CÓMO FUNCIONA:
+===============
+
+1. Las tablas clientes_fts, mascotas_fts y veterinarios_fts (database.py) indexan
+   nombre, DNI, email, teléfono, especie, raza y especialidad. Los triggers las
+   mantienen al día en cada INSERT/UPDATE/DELETE.
+
+2. _BuscadorTexto: convierte el texto del usuario en una consulta MATCH
+   └─ cada palabra se busca como prefijo ("ram" encuentra "Ramón")
+   └─ sin distinguir acentos ni mayúsculas
+   └─ resultados ordenados por relevancia (bm25)
+
+3. Interfaz pública: buscar_clientes(), buscar_mascotas(), buscar_veterinarios(),
+   reconstruir_indices_busqueda()
+
+Si el SQLite no trae FTS5, se usa LIKE '%texto%' como antes.
+
+USO DESDE CONSOLA:
+    python -m src.busqueda --reconstruir
+    python -m src.busqueda clientes "ramon garcia"
+"""
+
+import argparse
+import re
+
+from sqlalchemy import or_, text
+
+import src.database as database
+from src.database import session, Cliente, Mascota, Veterinario
+from src.logger import Logger
+
+LIMITE_DEFECTO = 50
+
+
+class _BuscadorTexto:
+    """Traduce búsquedas de texto a consultas FTS5 (o LIKE de respaldo)"""
+
+    @staticmethod
+    def construir_match(texto: str, columnas: tuple = None) -> str:
+        """
+        Convierte texto libre en una expresión MATCH segura
+        Ejemplo: ("ramón ga", ("nombre",)) -> '{nombre} : ("ramón"* "ga"*)'
+        Return: expresión MATCH, o "" si el texto no tiene palabras
+        """
+        palabras = re.findall(r"\w+", texto or "")
+        if not palabras:
+            return ""
+        # Entre comillas para que FTS5 no interprete operadores (AND, NEAR, -...)
+        expresion = " ".join(f'"{p}"*' for p in palabras)
+        if columnas:
+            expresion = "{" + " ".join(columnas) + "} : (" + expresion + ")"
+        return expresion
+
+    @staticmethod
+    def buscar(modelo, texto: str, columnas: tuple = None, limite: int = LIMITE_DEFECTO):
+        """
+        Devuelve las entidades de modelo que casan con texto, de más a menos relevante
+        columnas restringe la búsqueda (por defecto todas las indexadas)
+        limite None = sin límite
+        """
+        tabla = modelo.__tablename__
+        if not database.FTS_DISPONIBLE:
+            return _BuscadorTexto._buscar_like(modelo, texto, columnas or database.TABLAS_BUSQUEDA[tabla], limite)
+
+        expresion = _BuscadorTexto.construir_match(texto, columnas)
+        if not expresion:
+            return []
+
+        sql = text(
+            f"SELECT {tabla}.* FROM {tabla}_fts "
+            f"JOIN {tabla} ON {tabla}.id = {tabla}_fts.rowid "
+            f"WHERE {tabla}_fts MATCH :expresion "
+            f"ORDER BY {tabla}_fts.rank, {tabla}.nombre "
+            f"LIMIT :limite"
+        )
+        return session.query(modelo).from_statement(sql).params(
+            expresion=expresion, limite=-1 if limite is None else limite
+        ).all()
+
+    @staticmethod
+    def _buscar_like(modelo, texto: str, columnas: tuple, limite: int):
+        """Respaldo sin FTS5: LIKE %texto% sobre las columnas (escaneo completo)"""
+        condiciones = [getattr(modelo, c).like(f"%{texto}%") for c in columnas]
+        q = session.query(modelo).filter(or_(*condiciones)).order_by(modelo.nombre)
+        return (q.limit(limite) if limite is not None else q).all()
+
+
+# ========================
+# INTERFAZ PÚBLICA
+# ========================
+
+def buscar_clientes(texto: str, limite: int = LIMITE_DEFECTO):
+    """Busca clientes por nombre, DNI, email o teléfono (prefijos, sin acentos, por relevancia)"""
+    return _BuscadorTexto.buscar(Cliente, texto, limite=limite)
+
+def buscar_mascotas(texto: str, limite: int = LIMITE_DEFECTO):
+    """Busca mascotas por nombre, especie o raza (prefijos, sin acentos, por relevancia)"""
+    return _BuscadorTexto.buscar(Mascota, texto, limite=limite)
+
+def buscar_veterinarios(texto: str, limite: int = LIMITE_DEFECTO):
+    """Busca veterinarios por nombre, DNI, especialidad, cargo, email o teléfono"""
+    return _BuscadorTexto.buscar(Veterinario, texto, limite=limite)
+
+def reconstruir_indices_busqueda():
+    """Crea (si faltan) y regenera los índices de búsqueda de una BD existente"""
+    database.FTS_DISPONIBLE = database.preparar_busqueda()
+    if not database.FTS_DISPONIBLE:
+        Logger.warning("SQLite sin soporte FTS5: la búsqueda usará LIKE")
+        return False
+    database.reconstruir_busqueda()
+    Logger.info("Índices de búsqueda reconstruidos")
+    return True
+
+
+def main(argv=None):
+    """Punto de entrada de consola: reconstruir índices o hacer una búsqueda rápida"""
+    parser = argparse.ArgumentParser(description="Búsqueda de texto de la clínica")
+    parser.add_argument("--reconstruir", action="store_true", help="regenera los índices FTS5")
+    parser.add_argument("entidad", nargs="?", choices=["clientes", "mascotas", "veterinarios"])
+    parser.add_argument("texto", nargs="?", default="")
+    args = parser.parse_args(argv)
+
+    if args.reconstruir:
+        ok = reconstruir_indices_busqueda()
+        print("✅ Índices reconstruidos" if ok else "⚠ FTS5 no disponible")
+    if args.entidad:
+        buscadores = dict(clientes=buscar_clientes, mascotas=buscar_mascotas, veterinarios=buscar_veterinarios)
+        for entidad in buscadores[args.entidad](args.texto):
+            print(f"{entidad.id}\t{entidad.nombre}")
+    if not args.reconstruir and not args.entidad:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+título: módulo de caché de entidades
+fecha: 16.10.2026
+descripción: caché LRU de lectura para las búsquedas por ID de clientes,
+mascotas y veterinarios, y caché por versión de datos para proyecciones.
+
+CÓMO FUNCIONA:
+===============
+
+1. Cada entidad se guarda como su DTO de src.dto (ClienteDTO, MascotaDTO,
+   VeterinarioDTO), el mismo tipo que devuelven las funciones con dto=True.
+   └─ no son objetos ORM: no dependen de la sesión (nunca dan
+      DetachedInstanceError), no lanzan consultas perezosas y no se pueden
+      modificar, así que se pueden compartir entre sesiones de Streamlit
+   └─ MascotaDTO lleva a su propietario: al modificar un cliente se
+      invalidan también sus mascotas
+
+2. _CacheIdentidad: una caché por entidad, de tamaño acotado (LRU).
+   └─ obtener(id, cargar): si no está, llama a cargar() y guarda su DTO
+   └─ los repositorios invalidan el ID afectado al modificar o eliminar
+   └─ como en la caché de disponibilidad, una versión evita guardar un
+      DTO leído antes de una invalidación
+
+3. _CacheVersionada: guarda resultados calculados (p.ej. las opciones de
+   los selectbox) junto a la version_datos() de las tablas de las que salen.
+   └─ si la versión ha cambiado desde que se guardó, se vuelve a calcular:
+      no hace falta invalidar a mano y detecta cambios de otros procesos
+
+4. Interfaz pública: invalidar_cache_identidad(), obtener_metricas_cache_identidad()
+"""
+
+import threading
+from collections import OrderedDict
+
+from src.database import version_datos, en_transaccion
+from src.dto import a_dto
+
+TAMANO_CACHE_IDENTIDAD = 2_000   # DTOs por entidad
+
+
+class _CacheIdentidad:
+    """Caché LRU en proceso de DTOs por ID"""
+
+    def __init__(self, tamano: int = TAMANO_CACHE_IDENTIDAD):
+        self.tamano = tamano
+        self.aciertos = 0
+        self.fallos = 0
+        self._dtos = OrderedDict()
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, cargar):
+        """Devuelve el DTO de clave; si falta, lo crea con cargar() (objeto ORM o excepción)"""
+        with self._lock:
+            if clave in self._dtos:
+                self._dtos.move_to_end(clave)
+                self.aciertos += 1
+                return self._dtos[clave]
+            self.fallos += 1
+            version = self._version
+
+        dto = a_dto(cargar())
+        with self._lock:
+            # Dentro de transaccion() lo leído puede no llegar a confirmarse
+            if version == self._version and not en_transaccion():
+                self._dtos[clave] = dto
+                if len(self._dtos) > self.tamano:
+                    self._dtos.popitem(last=False)   # la usada hace más tiempo
+        return dto
+
+    def invalidar(self, *claves):
+        """Descarta los DTOs de esas claves (sin argumentos: todos)"""
+        with self._lock:
+            self._version += 1
+            if not claves:
+                self._dtos.clear()
+            for clave in claves:
+                self._dtos.pop(clave, None)
+
+    def metricas(self) -> dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return dict(
+                aciertos=self.aciertos,
+                fallos=self.fallos,
+                entradas=len(self._dtos),
+                tasa_aciertos=self.aciertos / consultas if consultas else 0.0,
+            )
+
+
+class _CacheVersionada:
+    """Resultados por clave, válidos mientras no cambie la versión de sus tablas"""
+
+    def __init__(self, *tablas: str):
+        self.tablas = tablas
+        self._valores = {}   # clave -> (versión, valor)
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, cargar):
+        """Devuelve el valor de clave; lo recalcula con cargar() si sus tablas han cambiado"""
+        version = version_datos(*self.tablas)
+        with self._lock:
+            guardado = self._valores.get(clave)
+        if guardado is not None and guardado[0] == version:
+            return guardado[1]
+        valor = cargar()
+        if not en_transaccion():
+            with self._lock:
+                self._valores[clave] = (version, valor)
+        return valor
+
+
+_cache_clientes = _CacheIdentidad()
+_cache_mascotas = _CacheIdentidad()
+_cache_veterinarios = _CacheIdentidad()
+_CACHES = {"clientes": _cache_clientes, "mascotas": _cache_mascotas, "veterinarios": _cache_veterinarios}
+
+
+# ========================
+# INTERFAZ PÚBLICA
+# ========================
+
+def invalidar_cache_identidad(entidad: str = None) -> None:
+    """Descarta los DTOs de una entidad ("clientes", "mascotas", "veterinarios") o de todas"""
+    for nombre, cache in _CACHES.items():
+        if entidad is None or nombre == entidad:
+            cache.invalidar()
+
+def obtener_metricas_cache_identidad() -> dict:
+    """
+    Devuelve los contadores de cada caché de entidades
+    Return: {entidad: dict con aciertos (int), fallos (int), entradas (int), tasa_aciertos (float)}
+    """
+    return {nombre: cache.metricas() for nombre, cache in _CACHES.items()}
@@ -8,26 +8,64 @@ CÓMO FUNCIONA:
 
 1. _RepositorioCita: Acceso a BD (CRUD)
    └─ crear(), obtener_por_id(), listar_todas(), contar_todas(), etc.
+   └─ los listados aceptan resumen=True: ResumenCita (columnas de la cita y los
+      nombres de mascota y veterinario con JOIN), sin objetos ORM
    └─ NUNCA tiene lógica de negocio
 
 2. _ServicioCita: Lógica de negocio
    └─ crear_cita(): valida + verifica + crea
+   └─ crear_citas_lote(): lo mismo para muchas citas, con un solo commit
+   └─ modificar_ocurrencia(): materializa una ocurrencia de una serie (src.series) y la modifica
    └─ modificar_cita(): valida cambios + actualiza
    └─ Usa Utilidades para validaciones
    └─ Usa _RepositorioCita para BD
 
-3. Interfaz pública: 14 funciones
+3. Interfaz pública: 24 funciones
+   └─ obtener_citas_por_fecha(), obtener_citas_por_rango() y obtener_proximas_citas()
+      incluyen las ocurrencias de las series (Ocurrencia, con id None) de esa ventana
+   └─ contar_citas_por_dia(): recuentos por día y veterinario (GROUP BY, sin objetos)
+   └─ obtener_ocupacion_calendario(): día × veterinario × hueco × estado, para el calendario
+   └─ version_datos_citas(): cambia con cada escritura (clave de st.cache_data)
+   └─ dto=True: devuelven CitaDTO (src.dto, con mascota/propietario/veterinario
+      anidados y cargados en la misma consulta) en vez de objetos ORM
    └─ Lo único que importa Streamlit
    └─ Wrappers simples que deleguen a ServicioCita
    └─ Ejemplo: def crear_cita(...) → return _ServicioCita.crear_cita(...)
 """
 
-from src.database import session, Cita
+from src.database import session, Cita, Mascota, SerieCita, Veterinario, version_datos, confirmar, deshacer, punto_de_guardado
+from sqlalchemy import Integer, func, text, type_coerce
+from sqlalchemy.orm import joinedload
 from src.utils import Utilidades
 from src.exceptions import CitaNoEncontradaException, ValidacionException
 from src.logger import Logger
+from src.paginacion import Paginador, TAMANO_PAGINA_DEFECTO
+from src.analisis import invalidar_cache_estadisticas
+from src.disponibilidad import invalidar_disponibilidad
+from src.series import expandir_series, fechas_serie, obtener_serie_por_id
+from src.dto import a_dto
+import json
+from collections import Counter, namedtuple
 from datetime import date, time
 
+DURACION_CITA = 30  # minutos que ocupa cada cita
+
+# Resultado de cada elemento de crear_citas_lote: cita creada o mensaje de error
+ResultadoLote = namedtuple("ResultadoLote", ["indice", "cita", "error"])
+
+# Una celda del mapa de calor de contar_citas_por_dia: citas de un veterinario en un día
+RecuentoDia = namedtuple("RecuentoDia", ["fecha", "veterinario_id", "total"])
+
+# Un hueco ocupado del calendario: cuántas citas de ese estado tiene el veterinario a esa hora
+OcupacionHueco = namedtuple("OcupacionHueco", ["fecha", "veterinario_id", "hora", "estado", "total"])
+
+
+# Fila de los listados en modo resumen (una query de columnas, sin objetos ORM)
+ResumenCita = namedtuple("ResumenCita", ["id", "fecha", "hora", "estado", "motivo", "mascota", "veterinario"])
+_COLUMNAS_RESUMEN = [Cita.id, Cita.fecha, Cita.hora, Cita.estado, Cita.motivo,
+                     Mascota.nombre.label("mascota"), Veterinario.nombre.label("veterinario")]
+
+
 # ========================
 # REPOSITORIO (PRIVADO)
 # ========================
@@ -44,17 +82,14 @@ class _RepositorioCita:
     def crear(mascota_id: int, vet_id: int, fecha: date, hora: time, motivo: str = None, estado: str = "Pendiente"):
         """
         CRUD: CREATE
-        Guarda una cita en la BD
+        Guarda una cita en la BD (hora es un objeto time)
         """
-        # Convertir hora (objeto time) a string "HH:MM"
-        hora_str = Utilidades.convertir_hora_a_string(hora)
-        
         # Crear objeto Cita
         cita = Cita(
             mascota_id=mascota_id,
             veterinario_id=vet_id,
             fecha=fecha,
-            hora=hora_str,
+            hora=hora,
             motivo=motivo,
             estado=estado,
             diagnostico=None
@@ -62,10 +97,45 @@ class _RepositorioCita:
         
         # Guardar en BD
         session.add(cita)
-        session.commit()
+        confirmar()
+        invalidar_cache_estadisticas()
+        invalidar_disponibilidad(vet_id, fecha)
         Logger.info(f"Cita creada con ID: {cita.id}")
         return cita
     
+    @staticmethod
+    def crear_varias(datos: list) -> list:
+        """
+        CRUD: CREATE en bloque
+        Inserta todas las citas (lista de dicts con los campos de Cita) con un único commit
+        """
+        citas = [Cita(diagnostico=None, **d) for d in datos]
+        session.add_all(citas)
+        confirmar()
+        invalidar_cache_estadisticas()
+        for hueco in {(c.veterinario_id, c.fecha) for c in citas}:
+            invalidar_disponibilidad(*hueco)
+        Logger.info(f"{len(citas)} citas creadas en lote")
+        return citas
+    
+    @staticmethod
+    def materializar(serie: SerieCita, fecha_serie: date) -> Cita:
+        """
+        CRUD: CREATE (sin commit) de la cita de una ocurrencia de una serie
+        Si la ocurrencia ya tenía su cita, devuelve esa
+        """
+        cita = session.query(Cita).filter_by(serie_id=serie.id, fecha_serie=fecha_serie).first()
+        if cita:
+            return cita
+        cita = Cita(
+            fecha=fecha_serie, hora=serie.hora, motivo=serie.motivo, estado="Pendiente",
+            mascota_id=serie.mascota_id, veterinario_id=serie.veterinario_id,
+            serie_id=serie.id, fecha_serie=fecha_serie,
+        )
+        session.add(cita)
+        session.flush()  # el commit lo hace la modificación que viene después
+        return cita
+    
     @staticmethod
     def obtener_por_id(cita_id: int):
         """
@@ -79,29 +149,133 @@ class _RepositorioCita:
         return cita
     
     @staticmethod
-    def listar_todas():
+    def _consulta_resumen():
+        """Query de las columnas de ResumenCita (las citas sin veterinario también salen)"""
+        return session.query(*_COLUMNAS_RESUMEN).join(Mascota, Cita.mascota_id == Mascota.id).outerjoin(
+            Veterinario, Cita.veterinario_id == Veterinario.id
+        )
+    
+    @staticmethod
+    def listar_todas(resumen: bool = False):
         """CRUD: READ todos - devuelve lista ordenada por fecha descendente"""
+        if resumen:
+            filas = _RepositorioCita._consulta_resumen().order_by(Cita.fecha.desc(), Cita.hora.desc()).all()
+            return [ResumenCita._make(f) for f in filas]
         return session.query(Cita).order_by(Cita.fecha.desc(), Cita.hora.desc()).all()
     
     @staticmethod
-    def obtener_por_mascota(mascota_id: int):
+    def _consulta(detalle: bool = False):
+        """
+        Query de citas; detalle=True carga mascota, cliente y veterinario en el mismo
+        SELECT con JOINs (joinedload), en vez de una consulta por relación y fila
+        """
+        q = session.query(Cita)
+        if detalle:
+            q = q.options(joinedload(Cita.mascota).joinedload(Mascota.cliente), joinedload(Cita.veterinario))
+        return q
+    
+    @staticmethod
+    def listar_con_detalle(estado: str = None):
+        """CRUD: READ todos con mascota, cliente y veterinario ya cargados"""
+        q = _RepositorioCita._consulta(detalle=True)
+        if estado:
+            q = q.filter(Cita.estado == estado)
+        return q.order_by(Cita.fecha.desc(), Cita.hora.desc()).all()
+    
+    @staticmethod
+    def listar_pagina(tamano: int, cursor: str = None, hacia_atras: bool = False, estado: str = None, resumen: bool = False):
+        """
+        CRUD: READ una página de citas con detalle, de la más reciente a la más antigua
+        Paginación keyset por (fecha, hora, id) descendente
+        """
+        if resumen:
+            q = _RepositorioCita._consulta_resumen()
+        else:
+            q = _RepositorioCita._consulta(detalle=True)
+        if estado:
+            q = q.filter(Cita.estado == estado)
+        return Paginador.paginar(
+            q, [Cita.fecha, Cita.hora, Cita.id],
+            tamano, cursor, hacia_atras, descendente=True, tipo=ResumenCita if resumen else None
+        )
+    
+    @staticmethod
+    def obtener_por_mascota(mascota_id: int, detalle: bool = False):
         """CRUD: READ filtrado por mascota"""
-        return session.query(Cita).filter_by(mascota_id=mascota_id).order_by(Cita.fecha.desc()).all()
+        return _RepositorioCita._consulta(detalle).filter(Cita.mascota_id == mascota_id).order_by(Cita.fecha.desc()).all()
     
     @staticmethod
-    def obtener_por_veterinario(vet_id: int):
+    def obtener_por_veterinario(vet_id: int, detalle: bool = False):
         """CRUD: READ filtrado por veterinario"""
-        return session.query(Cita).filter_by(veterinario_id=vet_id).order_by(Cita.fecha.desc()).all()
+        return _RepositorioCita._consulta(detalle).filter(Cita.veterinario_id == vet_id).order_by(Cita.fecha.desc()).all()
     
     @staticmethod
-    def obtener_por_fecha(fecha: date):
+    def obtener_por_fecha(fecha: date, detalle: bool = False):
         """CRUD: READ filtrado por fecha"""
-        return session.query(Cita).filter_by(fecha=fecha).order_by(Cita.hora).all()
+        return _RepositorioCita._consulta(detalle).filter(Cita.fecha == fecha).order_by(Cita.hora).all()
     
     @staticmethod
-    def obtener_por_estado(estado: str):
+    def obtener_por_estado(estado: str, detalle: bool = False):
         """CRUD: READ filtrado por estado (Pendiente, Confirmada, Realizada, Cancelada)"""
-        return session.query(Cita).filter_by(estado=estado).order_by(Cita.fecha.desc()).all()
+        return _RepositorioCita._consulta(detalle).filter(Cita.estado == estado).order_by(Cita.fecha.desc()).all()
+    
+    @staticmethod
+    def obtener_por_franja(hora_desde: time, hora_hasta: time, fecha_desde: date = None, fecha_hasta: date = None):
+        """
+        CRUD: READ citas que empiezan entre hora_desde y hora_hasta (incluidas),
+        opcionalmente dentro de un rango de fechas. La comparación se hace en SQL
+        """
+        q = session.query(Cita).filter(Cita.hora >= hora_desde, Cita.hora <= hora_hasta)
+        if fecha_desde:
+            q = q.filter(Cita.fecha >= fecha_desde)
+        if fecha_hasta:
+            q = q.filter(Cita.fecha <= fecha_hasta)
+        return q.order_by(Cita.fecha, Cita.hora, Cita.id).all()
+    
+    @staticmethod
+    def obtener_por_rango(fecha_desde: date, fecha_hasta: date, vet_id: int = None, estado: str = None):
+        """
+        CRUD: READ citas entre dos fechas (incluidas) con mascota, cliente y veterinario cargados
+        Una sola SELECT: usa ix_citas_veterinario_fecha_hora, ix_citas_estado_fecha o ix_citas_fecha_hora
+        según los filtros
+        """
+        q = session.query(Cita).options(
+            joinedload(Cita.mascota).joinedload(Mascota.cliente),
+            joinedload(Cita.veterinario),
+        ).filter(Cita.fecha >= fecha_desde, Cita.fecha <= fecha_hasta)
+        if vet_id:
+            q = q.filter(Cita.veterinario_id == vet_id)
+        if estado:
+            q = q.filter(Cita.estado == estado)
+        return q.order_by(Cita.fecha, Cita.hora, Cita.id).all()
+    
+    @staticmethod
+    def contar_por_dia(fecha_desde: date, fecha_hasta: date, vet_id: int = None, estado: str = None) -> list:
+        """
+        CRUD: COUNT agrupado por (fecha, veterinario) entre dos fechas
+        GROUP BY en SQL: devuelve tuplas, sin cargar objetos Cita
+        """
+        q = session.query(Cita.fecha, Cita.veterinario_id, func.count(Cita.id)).filter(
+            Cita.fecha >= fecha_desde, Cita.fecha <= fecha_hasta
+        )
+        if vet_id:
+            q = q.filter(Cita.veterinario_id == vet_id)
+        if estado:
+            q = q.filter(Cita.estado == estado)
+        return q.group_by(Cita.fecha, Cita.veterinario_id).all()
+    
+    @staticmethod
+    def ocupacion(fecha_desde: date, fecha_hasta: date, vet_ids: list = None) -> list:
+        """
+        CRUD: COUNT agrupado por (fecha, veterinario, hora, estado) entre dos fechas
+        Una sola SELECT que devuelve tuplas: es lo único que necesita el calendario
+        """
+        q = session.query(Cita.fecha, Cita.veterinario_id, Cita.hora, Cita.estado, func.count(Cita.id)).filter(
+            Cita.fecha >= fecha_desde, Cita.fecha <= fecha_hasta
+        )
+        if vet_ids:
+            q = q.filter(Cita.veterinario_id.in_(vet_ids))
+        return q.group_by(Cita.fecha, Cita.veterinario_id, Cita.hora, Cita.estado).all()
     
     @staticmethod
     def obtener_futuras():
@@ -116,10 +290,17 @@ class _RepositorioCita:
         Modifica campos específicos de una cita
         campos: diccionario con los campos a actualizar
         """
+        hueco_anterior = (cita.veterinario_id, cita.fecha)
         for campo, valor in campos.items():
             if valor is not None:  # Solo actualizar si el valor no es None
                 setattr(cita, campo, valor)
-        session.commit()
+        confirmar()
+        if campos.get("estado") is not None:
+            invalidar_cache_estadisticas()  # cambia el recuento de pendientes
+        if any(campos.get(c) is not None for c in ("fecha", "hora", "estado")):
+            # Libera el hueco anterior y ocupa el nuevo (o lo libera si se cancela)
+            invalidar_disponibilidad(*hueco_anterior)
+            invalidar_disponibilidad(cita.veterinario_id, cita.fecha)
         session.refresh(cita)  # Recargar objeto para tener datos actualizados
         Logger.info(f"Cita {cita.id} actualizada")
         return cita
@@ -127,8 +308,11 @@ class _RepositorioCita:
     @staticmethod
     def eliminar(cita: Cita) -> bool:
         """CRUD: DELETE - elimina una cita de la BD"""
+        hueco = (cita.veterinario_id, cita.fecha)
         session.delete(cita)
-        session.commit()
+        confirmar()
+        invalidar_cache_estadisticas()
+        invalidar_disponibilidad(*hueco)
         Logger.info(f"Cita {cita.id} eliminada")
         return True
     
@@ -151,16 +335,80 @@ class _RepositorioCita:
             return 0
     
     @staticmethod
-    def verificar_disponibilidad(vet_id: int, fecha: date, hora_str: str, cita_id: int = None) -> bool:
+    def verificar_disponibilidad(vet_id: int, fecha: date, hora: time, cita_id: int = None) -> bool:
         """
         CRUD: READ para verificar si hay conflicto
-        Verifica si el veterinario ya tiene cita a esa hora
+        Verifica si el veterinario ya tiene una cita que se solape con [hora, hora + DURACION_CITA)
         Si cita_id se proporciona, excluye esa cita (útil para ediciones)
+        Las citas canceladas no ocupan el hueco (igual que en src.disponibilidad)
+        Las ocurrencias pendientes de las series (sin fila en citas) sí lo ocupan
         """
-        q = session.query(Cita).filter_by(veterinario_id=vet_id, fecha=fecha, hora=hora_str)
+        # Dos citas de DURACION_CITA minutos se solapan si empiezan a menos de DURACION_CITA
+        # minutos una de otra. La columna es un entero: se compara como tal en SQL
+        minuto = hora.hour * 60 + hora.minute
+        minutos = type_coerce(Cita.hora, Integer)
+        q = session.query(Cita).filter(
+            Cita.veterinario_id == vet_id,
+            Cita.fecha == fecha,
+            minutos > minuto - DURACION_CITA,
+            minutos < minuto + DURACION_CITA,
+            Cita.estado != "Cancelada",
+        )
         if cita_id:
             q = q.filter(Cita.id != cita_id)  # Excluir esta cita de la búsqueda
-        return not q.first()  # True si NO hay conflicto, False si hay
+        if q.first():
+            return False  # Hay conflicto con una cita guardada
+        series = _RepositorioCita.ocurrencias_ocupadas(fecha, fecha, vet_id).get((vet_id, fecha), [])
+        return not any(abs(m - minuto) < DURACION_CITA for m in series)
+    
+    @staticmethod
+    def ocurrencias_ocupadas(fecha_desde: date, fecha_hasta: date, veterinario_id: int = None) -> dict:
+        """
+        CRUD: READ huecos que ocupan las ocurrencias pendientes de las series
+        (las materializadas y las canceladas ya están en citas y no se repiten)
+        Return: {(veterinario_id, fecha): [minuto de inicio, ...]}
+        """
+        ocupadas = {}
+        for o in expandir_series(fecha_desde, fecha_hasta, veterinario_id):
+            ocupadas.setdefault((o.veterinario_id, o.fecha), []).append(o.hora.hour * 60 + o.hora.minute)
+        return ocupadas
+    
+    @staticmethod
+    def buscar_conflictos(huecos: list) -> set:
+        """
+        CRUD: READ para verificar muchos huecos a la vez
+        huecos: lista de (posicion, vet_id, fecha, hora)
+        Return: posiciones que se solapan con alguna cita ya guardada (una sola consulta:
+        los huecos se pasan como tabla y se cruzan con citas por el índice (veterinario, fecha, hora))
+        o con una ocurrencia pendiente de una serie (las series del rango, expandidas una vez)
+        """
+        if not huecos:
+            return set()
+        # Los huecos viajan en un único parámetro JSON que SQLite despliega con json_each
+        pedidos = json.dumps([[p, v, f.isoformat(), h.hour * 60 + h.minute] for p, v, f, h in huecos])
+        sql = text(
+            "WITH pedidos AS ("
+            "  SELECT json_extract(value, '$[0]') AS posicion, json_extract(value, '$[1]') AS veterinario_id,"
+            "         json_extract(value, '$[2]') AS fecha, json_extract(value, '$[3]') AS minuto"
+            "  FROM json_each(:pedidos)) "
+            "SELECT DISTINCT pedidos.posicion FROM pedidos JOIN citas "
+            "ON citas.veterinario_id = pedidos.veterinario_id AND citas.fecha = pedidos.fecha "
+            "AND citas.hora > pedidos.minuto - :duracion AND citas.hora < pedidos.minuto + :duracion "
+            "AND citas.estado != 'Cancelada'"
+        )
+        filas = session.execute(sql, {"pedidos": pedidos, "duracion": DURACION_CITA}).all()
+        conflictos = {p for (p,) in filas}
+
+        vets = {v for _, v, _, _ in huecos}
+        series = _RepositorioCita.ocurrencias_ocupadas(
+            min(f for _, _, f, _ in huecos), max(f for _, _, f, _ in huecos),
+            next(iter(vets)) if len(vets) == 1 else None,
+        )
+        for p, v, f, h in huecos:
+            minuto = h.hour * 60 + h.minute
+            if any(abs(m - minuto) < DURACION_CITA for m in series.get((v, f), [])):
+                conflictos.add(p)
+        return conflictos
 
 
 # ========================
@@ -195,17 +443,172 @@ class _ServicioCita:
         if not es_valido:
             raise ValidacionException("Cita", mensaje)
         
-        # PASO 2: CONVERTIR HORA A STRING
-        hora_str = Utilidades.convertir_hora_a_string(hora)
-        
-        # PASO 3: VERIFICAR DISPONIBILIDAD DEL VETERINARIO
+        # PASO 2: VERIFICAR DISPONIBILIDAD DEL VETERINARIO
         # Si devuelve False = hay conflicto = lanzar excepción
-        if not _RepositorioCita.verificar_disponibilidad(veterinario_id, fecha, hora_str):
+        if not _RepositorioCita.verificar_disponibilidad(veterinario_id, fecha, hora):
             raise ValidacionException("Horario", "el veterinario ya tiene una cita a esa hora")
         
-        # PASO 4: CREAR EN BD (delegado al repositorio)
+        # PASO 3: CREAR EN BD (delegado al repositorio)
         return _RepositorioCita.crear(mascota_id, veterinario_id, fecha, hora, motivo, estado)
     
+    @staticmethod
+    def crear_citas_lote(citas: list, todo_o_nada: bool = False) -> list:
+        """
+        Crea muchas citas con las mismas reglas que crear_cita, pero en bloque
+        
+        FLUJO:
+        1. Validar cada cita con Utilidades.validar_campos_cita
+        2. Comprobar que mascotas y veterinarios existen (una consulta por tabla)
+        3. Detectar solapes dentro del propio lote
+        4. Detectar solapes con la BD (una sola consulta para todo el lote)
+        5. Insertar las válidas en una transacción (ninguna si todo_o_nada y hay errores)
+        
+        citas: lista de dicts con mascota_id, veterinario_id, fecha, hora y opcionalmente motivo, estado
+        Return: lista de ResultadoLote(indice, cita, error), uno por elemento y en el mismo orden
+        """
+        # PASO 1: VALIDAR CAMPOS
+        errores = {}
+        validas = []
+        for i, datos in enumerate(citas):
+            try:
+                es_valido, mensaje = Utilidades.validar_campos_cita(
+                    datos.get("mascota_id"), datos.get("veterinario_id"), datos.get("fecha"), datos.get("hora"))
+            except (TypeError, AttributeError):
+                es_valido, mensaje = False, "Fecha u hora con formato incorrecto (use date y time)"
+            if es_valido:
+                validas.append(i)
+            else:
+                errores[i] = mensaje
+        
+        # PASO 2: ENTIDADES EXISTENTES
+        mascotas = {m for (m,) in session.query(Mascota.id).filter(Mascota.id.in_({citas[i]["mascota_id"] for i in validas}))}
+        vets = {v for (v,) in session.query(Veterinario.id).filter(Veterinario.id.in_({citas[i]["veterinario_id"] for i in validas}))}
+        for i in validas:
+            if citas[i]["mascota_id"] not in mascotas:
+                errores[i] = f"La mascota {citas[i]['mascota_id']} no existe"
+            elif citas[i]["veterinario_id"] not in vets:
+                errores[i] = f"El veterinario {citas[i]['veterinario_id']} no existe"
+        validas = [i for i in validas if i not in errores]
+        
+        # PASO 3: SOLAPES DENTRO DEL LOTE (gana la que aparece antes)
+        aceptadas = {}
+        for i in validas:
+            d = citas[i]
+            minuto = d["hora"].hour * 60 + d["hora"].minute
+            clave = (d["veterinario_id"], d["fecha"])
+            choque = next((j for j, m in aceptadas.get(clave, []) if abs(m - minuto) < DURACION_CITA), None)
+            if choque is not None:
+                errores[i] = f"Se solapa con el elemento {choque} del lote"
+            else:
+                aceptadas.setdefault(clave, []).append((i, minuto))
+        validas = [i for i in validas if i not in errores]
+        
+        # PASO 4: SOLAPES CON LA BD
+        ocupadas = _RepositorioCita.buscar_conflictos(
+            [(i, citas[i]["veterinario_id"], citas[i]["fecha"], citas[i]["hora"]) for i in validas])
+        for i in ocupadas:
+            errores[i] = "El veterinario ya tiene una cita a esa hora"
+        validas = [i for i in validas if i not in errores]
+        
+        # PASO 5: INSERTAR
+        creadas = {}
+        if validas and not (todo_o_nada and errores):
+            campos = ("mascota_id", "veterinario_id", "fecha", "hora", "motivo", "estado")
+            datos = [{c: citas[i].get(c) for c in campos} for i in validas]
+            for d in datos:
+                d["estado"] = d["estado"] or "Pendiente"
+            try:
+                with punto_de_guardado():
+                    creadas = dict(zip(validas, _RepositorioCita.crear_varias(datos)))
+            except Exception as e:
+                deshacer()
+                Logger.log_excepcion(e, "crear_citas_lote")
+                raise
+        elif validas:
+            for i in validas:
+                errores[i] = "No se ha creado: hay errores en otras citas del lote"
+        
+        return [ResultadoLote(i, creadas.get(i), errores.get(i)) for i in range(len(citas))]
+    
+    @staticmethod
+    def _validar_rango(fecha_desde: date, fecha_hasta: date) -> None:
+        if fecha_hasta < fecha_desde:
+            raise ValidacionException("fecha_hasta", "no puede ser anterior a fecha_desde", str(fecha_hasta))
+    
+    @staticmethod
+    def _ocurrencias_rango(fecha_desde: date, fecha_hasta: date, veterinario_id: int = None, estado: str = None) -> list:
+        """Ocurrencias de series del rango; todas son Pendiente, así que otro estado no trae ninguna"""
+        if estado not in (None, "Pendiente"):
+            return []
+        return expandir_series(fecha_desde, fecha_hasta, veterinario_id)
+    
+    @staticmethod
+    def obtener_citas_por_rango(fecha_desde: date, fecha_hasta: date, veterinario_id: int = None, estado: str = None, incluir_series: bool = True):
+        """Citas del rango (una consulta) más, si se piden, las ocurrencias de las series"""
+        _ServicioCita._validar_rango(fecha_desde, fecha_hasta)
+        citas = _RepositorioCita.obtener_por_rango(fecha_desde, fecha_hasta, veterinario_id, estado)
+        if not incluir_series:
+            return citas
+        ocurrencias = _ServicioCita._ocurrencias_rango(fecha_desde, fecha_hasta, veterinario_id, estado)
+        return sorted(citas + ocurrencias, key=lambda c: (c.fecha, c.hora))
+    
+    @staticmethod
+    def contar_citas_por_dia(fecha_desde: date, fecha_hasta: date, veterinario_id: int = None, estado: str = None, incluir_series: bool = True):
+        """Recuentos del GROUP BY más las ocurrencias de las series, ordenados por fecha y veterinario"""
+        _ServicioCita._validar_rango(fecha_desde, fecha_hasta)
+        totales = Counter({
+            (fecha, vet): total
+            for fecha, vet, total in _RepositorioCita.contar_por_dia(fecha_desde, fecha_hasta, veterinario_id, estado)
+        })
+        if incluir_series:
+            ocurrencias = _ServicioCita._ocurrencias_rango(fecha_desde, fecha_hasta, veterinario_id, estado)
+            totales.update((o.fecha, o.veterinario_id) for o in ocurrencias)
+        claves = sorted(totales, key=lambda c: (c[0], c[1] or 0))
+        return [RecuentoDia(fecha, vet, totales[(fecha, vet)]) for fecha, vet in claves]
+    
+    @staticmethod
+    def obtener_ocupacion_calendario(fecha_desde: date, fecha_hasta: date, veterinario_ids: list = None) -> list:
+        """Agregado del calendario: GROUP BY de citas + ocurrencias de las series (Pendiente)"""
+        _ServicioCita._validar_rango(fecha_desde, fecha_hasta)
+        totales = Counter({
+            (fecha, vet, hora, estado): total
+            for fecha, vet, hora, estado, total in _RepositorioCita.ocupacion(fecha_desde, fecha_hasta, veterinario_ids)
+        })
+        totales.update(
+            (o.fecha, o.veterinario_id, o.hora, o.estado) for o in expandir_series(fecha_desde, fecha_hasta)
+            if not veterinario_ids or o.veterinario_id in veterinario_ids
+        )
+        claves = sorted(totales, key=lambda c: (c[0], c[1] or 0, c[2], c[3]))
+        return [OcupacionHueco(*clave, totales[clave]) for clave in claves]
+    
+    @staticmethod
+    def modificar_ocurrencia(serie_id: int, fecha_serie: date, fecha: date = None, hora: time = None, motivo: str = None, estado: str = None, diagnostico: str = None):
+        """
+        Modifica una ocurrencia de una serie
+        
+        FLUJO:
+        1. Comprobar que fecha_serie es una fecha de la serie
+        2. Materializar la ocurrencia (crear su Cita, sin commit)
+        3. Modificarla con modificar_cita (mismas validaciones); si falla, la cita no se crea
+        """
+        serie = obtener_serie_por_id(serie_id)
+        if fecha_serie not in fechas_serie(serie, fecha_serie, fecha_serie):
+            raise ValidacionException("fecha_serie", f"no es una fecha de la serie {serie_id}", str(fecha_serie))
+        
+        try:
+            # Dentro de transaccion(): SAVEPOINT, para que la cita materializada no se quede si falla
+            with punto_de_guardado():
+                cita = _RepositorioCita.materializar(serie, fecha_serie)
+                cita = _ServicioCita.modificar_cita(cita.id, fecha, hora, motivo, estado, diagnostico)
+        except Exception:
+            deshacer()
+            raise
+        # Hay una cita más en la tabla y su hueco pasa a estar ocupado
+        invalidar_cache_estadisticas()
+        invalidar_disponibilidad(cita.veterinario_id, fecha_serie)
+        invalidar_disponibilidad(cita.veterinario_id, cita.fecha)
+        return cita
+    
     @staticmethod
     def modificar_cita(cita_id: int, fecha: date = None, hora: time = None, motivo: str = None, estado: str = None, diagnostico: str = None):
         """
@@ -231,22 +634,19 @@ class _ServicioCita:
             if not es_valido:
                 raise ValidacionException("Cita", mensaje)
             
-            # Convertir hora a string
-            hora_str = Utilidades.convertir_hora_a_string(hora)
-            
             # Verificar disponibilidad (excluyendo ESTA cita, por eso pasamos cita_id)
-            if not _RepositorioCita.verificar_disponibilidad(cita.veterinario_id, fecha_val, hora_str, cita_id):
+            if not _RepositorioCita.verificar_disponibilidad(cita.veterinario_id, fecha_val, hora, cita_id):
                 raise ValidacionException("Horario", "el veterinario ya tiene una cita a esa hora")
             
             # Actualizar con los nuevos valores
-            return _RepositorioCita.actualizar(cita, fecha=fecha_val, hora=hora_str, motivo=motivo, estado=estado, diagnostico=diagnostico)
+            return _RepositorioCita.actualizar(cita, fecha=fecha_val, hora=hora, motivo=motivo, estado=estado, diagnostico=diagnostico)
         else:
             # Si NO se cambia hora, solo actualizar otros campos (sin validaciones extra)
             return _RepositorioCita.actualizar(cita, fecha=fecha, motivo=motivo, estado=estado, diagnostico=diagnostico)
 
 
 # ========================
-# INTERFAZ PÚBLICA (14 funciones)
+# INTERFAZ PÚBLICA (24 funciones)
 # ========================
 # Lo ÚNICO que Streamlit importa y usa
 # Cada función es un wrapper simple que delega a ServicioCita o RepositorioCita
@@ -255,35 +655,102 @@ def crear_cita(mascota_id: int, veterinario_id: int, fecha: date, hora: time, mo
     """Crea una nueva cita"""
     return _ServicioCita.crear_cita(mascota_id, veterinario_id, fecha, hora, motivo, estado)
 
-def listar_citas():
-    """Devuelve todas las citas"""
-    return _RepositorioCita.listar_todas()
+def crear_citas_lote(citas: list, todo_o_nada: bool = False) -> list:
+    """
+    Crea varias citas con una sola comprobación de disponibilidad y un solo commit
+    Return: lista de ResultadoLote(indice, cita, error) (error None = creada)
+    """
+    return _ServicioCita.crear_citas_lote(citas, todo_o_nada)
+
+def listar_citas(resumen: bool = False):
+    """Devuelve todas las citas (resumen=True: ResumenCita en vez de objetos ORM)"""
+    return _RepositorioCita.listar_todas(resumen)
+
+def listar_citas_con_detalle(estado: str = None):
+    """Devuelve las citas (opcionalmente de un estado) con mascota, cliente y veterinario precargados"""
+    return _RepositorioCita.listar_con_detalle(estado)
+
+def listar_citas_paginado(tamano_pagina: int = TAMANO_PAGINA_DEFECTO, cursor: str = None, hacia_atras: bool = False, estado: str = None, resumen: bool = False):
+    """Devuelve una Pagina de citas con detalle (más recientes primero), opcionalmente de un estado"""
+    return _RepositorioCita.listar_pagina(tamano_pagina, cursor, hacia_atras, estado, resumen)
+
+def obtener_cita_por_id(cita_id: int, dto: bool = False):
+    """Obtiene una cita por ID (dto=True: CitaDTO)"""
+    cita = _RepositorioCita.obtener_por_id(cita_id)
+    return a_dto(cita) if dto else cita
+
+def obtener_citas_por_mascota(mascota_id: int, dto: bool = False):
+    """Devuelve todas las citas de una mascota (dto=True: CitaDTO)"""
+    citas = _RepositorioCita.obtener_por_mascota(mascota_id, detalle=dto)
+    return a_dto(citas) if dto else citas
+
+def obtener_citas_por_veterinario(veterinario_id: int, dto: bool = False):
+    """Devuelve todas las citas de un veterinario (dto=True: CitaDTO)"""
+    citas = _RepositorioCita.obtener_por_veterinario(veterinario_id, detalle=dto)
+    return a_dto(citas) if dto else citas
 
-def obtener_cita_por_id(cita_id: int):
-    """Obtiene una cita por ID"""
-    return _RepositorioCita.obtener_por_id(cita_id)
+def obtener_citas_por_fecha(fecha: date, incluir_series: bool = True, dto: bool = False):
+    """Devuelve todas las citas de una fecha, con las ocurrencias de las series de ese día"""
+    citas = _RepositorioCita.obtener_por_fecha(fecha, detalle=dto)
+    if incluir_series:
+        citas = sorted(citas + expandir_series(fecha, fecha), key=lambda c: c.hora)
+    return a_dto(citas) if dto else citas
 
-def obtener_citas_por_mascota(mascota_id: int):
-    """Devuelve todas las citas de una mascota"""
-    return _RepositorioCita.obtener_por_mascota(mascota_id)
+def obtener_citas_por_rango(fecha_desde: date, fecha_hasta: date, veterinario_id: int = None, estado: str = None, incluir_series: bool = True):
+    """
+    Devuelve las citas entre dos fechas (incluidas), por fecha y hora, para vistas de semana o mes
+    Args: veterinario_id (int), estado (str): filtros opcionales
+          incluir_series (bool): añadir las ocurrencias de las series del rango
+    """
+    return _ServicioCita.obtener_citas_por_rango(fecha_desde, fecha_hasta, veterinario_id, estado, incluir_series)
 
-def obtener_citas_por_veterinario(veterinario_id: int):
-    """Devuelve todas las citas de un veterinario"""
-    return _RepositorioCita.obtener_por_veterinario(veterinario_id)
+def contar_citas_por_dia(fecha_desde: date, fecha_hasta: date, veterinario_id: int = None, estado: str = None, incluir_series: bool = True):
+    """
+    Recuento de citas por día y veterinario entre dos fechas (para mapas de calor)
+    Return: lista de RecuentoDia(fecha, veterinario_id, total); los días sin citas no aparecen
+    """
+    return _ServicioCita.contar_citas_por_dia(fecha_desde, fecha_hasta, veterinario_id, estado, incluir_series)
 
-def obtener_citas_por_fecha(fecha: date):
-    """Devuelve todas las citas de una fecha"""
-    return _RepositorioCita.obtener_por_fecha(fecha)
+def obtener_ocupacion_calendario(fecha_desde: date, fecha_hasta: date, veterinario_ids: list = None):
+    """
+    Ocupación de los huecos de una ventana (semana o mes) para pintar el calendario
+    Devuelve tuplas pequeñas (sin objetos Cita) que se pueden cachear con st.cache_data
+    Return: lista de OcupacionHueco(fecha, veterinario_id, hora, estado, total)
+    """
+    return _ServicioCita.obtener_ocupacion_calendario(fecha_desde, fecha_hasta, veterinario_ids)
 
-def obtener_citas_por_estado(estado: str):
-    """Devuelve todas las citas de un estado"""
-    return _RepositorioCita.obtener_por_estado(estado)
+def version_datos_citas() -> int:
+    """Número que cambia cada vez que se escriben citas o series; sirve de clave de caché"""
+    return version_datos("citas", "series_citas")
 
-def modificar_cita(cita_id: int, fecha: date = None, hora: time = None, motivo: str = None, estado: str = None, diagnostico: str = None):
-    """Modifica una cita existente"""
-    return _ServicioCita.modificar_cita(cita_id, fecha, hora, motivo, estado, diagnostico)
+def obtener_citas_por_franja(hora_desde: time, hora_hasta: time, fecha_desde: date = None, fecha_hasta: date = None):
+    """Devuelve las citas que empiezan entre dos horas (p.ej. de 10:00 a 12:00 esta semana)"""
+    return _RepositorioCita.obtener_por_franja(hora_desde, hora_hasta, fecha_desde, fecha_hasta)
 
-def cancelar_cita(cita_id: int):
+def obtener_citas_por_estado(estado: str, dto: bool = False):
+    """Devuelve todas las citas de un estado (dto=True: CitaDTO)"""
+    citas = _RepositorioCita.obtener_por_estado(estado, detalle=dto)
+    return a_dto(citas) if dto else citas
+
+def modificar_cita(cita_id: int, fecha: date = None, hora: time = None, motivo: str = None, estado: str = None, diagnostico: str = None, dto: bool = False):
+    """Modifica una cita existente (dto=True: devuelve CitaDTO)"""
+    cita = _ServicioCita.modificar_cita(cita_id, fecha, hora, motivo, estado, diagnostico)
+    return a_dto(cita) if dto else cita
+
+def modificar_ocurrencia(serie_id: int, fecha_serie: date, fecha: date = None, hora: time = None, motivo: str = None, estado: str = None, diagnostico: str = None, dto: bool = False):
+    """Modifica una ocurrencia de una serie (la convierte en una cita normal de la serie)"""
+    cita = _ServicioCita.modificar_ocurrencia(serie_id, fecha_serie, fecha, hora, motivo, estado, diagnostico)
+    return a_dto(cita) if dto else cita
+
+def cancelar_ocurrencia(serie_id: int, fecha_serie: date, dto: bool = False):
+    """Cancela una sola ocurrencia de una serie (la serie sigue)"""
+    return modificar_ocurrencia(serie_id, fecha_serie, estado="Cancelada", dto=dto)
+
+def marcar_ocurrencia_realizada(serie_id: int, fecha_serie: date):
+    """Atajo para marcar Realizada una ocurrencia de una serie"""
+    return modificar_ocurrencia(serie_id, fecha_serie, estado="Realizada")
+
+def cancelar_cita(cita_id: int, dto: bool = False):
     """Cancela una cita (cambia estado a Cancelada)"""
     # 1. Recuperamos la cita para verificar su estado actual
     cita = _RepositorioCita.obtener_por_id(cita_id)
@@ -294,7 +761,7 @@ def cancelar_cita(cita_id: int):
         raise ValidacionException("Estado", "No se puede cancelar una cita que ya ha sido realizada")
         
     # 3. Si no está realizada, procedemos a cambiar el estado a Cancelada
-    return modificar_cita(cita_id, estado="Cancelada")
+    return modificar_cita(cita_id, estado="Cancelada", dto=dto)
 
 def eliminar_cita(cita_id: int):
     """Elimina una cita completamente"""
@@ -321,6 +788,12 @@ def cita_existe(cita_id: int) -> bool:
     except CitaNoEncontradaException:
         return False
 
-def obtener_proximas_citas():
-    """Devuelve las citas de hoy en adelante"""
-    return _RepositorioCita.obtener_futuras()
\ No newline at end of file
+def obtener_proximas_citas(incluir_series: bool = True):
+    """
+    Devuelve las citas de hoy en adelante
+    Las ocurrencias de las series se expanden solo HORIZONTE_SERIES_DIAS días (src.series)
+    """
+    citas = _RepositorioCita.obtener_futuras()
+    if not incluir_series:
+        return citas
+    return sorted(citas + expandir_series(date.today()), key=lambda c: (c.fecha, c.hora))
\ No newline at end of file
@@ -8,6 +8,8 @@ CÓMO FUNCIONA:
 
 1. _RepositorioCliente: Acceso a BD (CRUD)
    └─ crear(), obtener_por_id(), listar_todos(), etc.
+   └─ los listados aceptan resumen=True: solo las columnas de ResumenCliente,
+      sin objetos ORM (más rápido y ligero para listas largas)
    └─ NUNCA tiene lógica de negocio
 
 2. _ServicioCliente: Lógica de negocio
@@ -16,14 +18,26 @@ CÓMO FUNCIONA:
    └─ Usa _RepositorioCliente para BD
 
 3. Interfaz pública: 8 funciones
+   └─ dto=True: devuelven ClienteDTO (src.dto) en vez de objetos ORM
    └─ Lo único que importa Streamlit
    └─ Wrappers simples que deleguen a ServicioCliente o RepositorioCliente
 """
 
-from src.database import session, Cliente
+from src.database import session, Cliente, Mascota, confirmar, deshacer
 from src.exceptions import ClienteNoEncontradoException, DNIDuplicadoException, ValidacionException
 from src.logger import Logger
+from src.paginacion import Paginador, TAMANO_PAGINA_DEFECTO
+from src.busqueda import _BuscadorTexto
+from src.analisis import invalidar_cache_estadisticas
+from src.disponibilidad import invalidar_disponibilidad
+from src.cache import _cache_clientes, _cache_mascotas
+from src.dto import a_dto
 from sqlalchemy.exc import IntegrityError
+from collections import namedtuple
+
+# Fila de los listados en modo resumen (una query de columnas, sin objetos ORM)
+ResumenCliente = namedtuple("ResumenCliente", ["id", "nombre", "dni", "telefono"])
+_COLUMNAS_RESUMEN = [getattr(Cliente, campo) for campo in ResumenCliente._fields]
 
 # ========================
 # REPOSITORIO (PRIVADO)
@@ -44,7 +58,8 @@ class _RepositorioCliente:
             email=email
         )
         session.add(cliente)
-        session.commit()
+        confirmar()
+        invalidar_cache_estadisticas()
         Logger.info(f"Cliente creado con ID: {cliente.id}")
         return cliente
     
@@ -57,9 +72,28 @@ class _RepositorioCliente:
         return cliente
     
     @staticmethod
-    def listar_todos():
+    def obtener_dto(cliente_id: int):
+        """CRUD: READ por ID desde la caché de entidades (ClienteDTO)"""
+        return _cache_clientes.obtener(cliente_id, lambda: _RepositorioCliente.obtener_por_id(cliente_id))
+    
+    @staticmethod
+    def _consulta(resumen: bool = False):
+        """Query de entidades Cliente, o solo de las columnas de ResumenCliente"""
+        return session.query(*_COLUMNAS_RESUMEN) if resumen else session.query(Cliente)
+    
+    @staticmethod
+    def listar_todos(resumen: bool = False):
         """CRUD: READ todos"""
-        return session.query(Cliente).order_by(Cliente.nombre).all()
+        filas = _RepositorioCliente._consulta(resumen).order_by(Cliente.nombre).all()
+        return [ResumenCliente._make(f) for f in filas] if resumen else filas
+    
+    @staticmethod
+    def listar_pagina(tamano: int, cursor: str = None, hacia_atras: bool = False, resumen: bool = False):
+        """CRUD: READ una página ordenada por (nombre, id) - paginación keyset"""
+        return Paginador.paginar(
+            _RepositorioCliente._consulta(resumen), [Cliente.nombre, Cliente.id],
+            tamano, cursor, hacia_atras, tipo=ResumenCliente if resumen else None
+        )
     
     @staticmethod
     def obtener_por_dni(dni: str):
@@ -68,10 +102,8 @@ class _RepositorioCliente:
     
     @staticmethod
     def obtener_por_nombre(nombre: str):
-        """CRUD: READ búsqueda parcial por nombre"""
-        return session.query(Cliente).filter(
-            Cliente.nombre.like(f"%{nombre}%")
-        ).order_by(Cliente.nombre).all()
+        """CRUD: READ búsqueda por nombre (índice FTS5: prefijos, sin acentos, por relevancia)"""
+        return _BuscadorTexto.buscar(Cliente, nombre, ("nombre",), limite=None)
     
     @staticmethod
     def actualizar(cliente: Cliente, **campos) -> Cliente:
@@ -79,17 +111,28 @@ class _RepositorioCliente:
         for campo, valor in campos.items():
             if valor is not None:
                 setattr(cliente, campo, valor)
-        session.commit()
+        confirmar()
         session.refresh(cliente)
+        _cache_clientes.invalidar(cliente.id)
+        # Su MascotaDTO lleva el nombre y DNI del propietario
+        mascota_ids = [m_id for (m_id,) in session.query(Mascota.id).filter_by(cliente_id=cliente.id)]
+        if mascota_ids:
+            _cache_mascotas.invalidar(*mascota_ids)
         Logger.info(f"Cliente {cliente.id} actualizado")
         return cliente
     
     @staticmethod
     def eliminar(cliente: Cliente) -> bool:
         """CRUD: DELETE"""
-        nombre = cliente.nombre
+        nombre, cliente_id = cliente.nombre, cliente.id
+        mascota_ids = [m.id for m in cliente.mascotas]
         session.delete(cliente)
-        session.commit()
+        confirmar()
+        _cache_clientes.invalidar(cliente_id)
+        if mascota_ids:  # se borran en cascada
+            _cache_mascotas.invalidar(*mascota_ids)
+        invalidar_cache_estadisticas()
+        invalidar_disponibilidad()  # sus mascotas y citas se borran en cascada
         Logger.info(f"Cliente {nombre} eliminado")
         return True
     
@@ -149,14 +192,14 @@ class _ServicioCliente:
             return _RepositorioCliente.crear(nombre, dni, telefono, email)
         
         except (DNIDuplicadoException, ValidacionException):
-            session.rollback()
+            deshacer()
             raise
         except IntegrityError:
-            session.rollback()
+            deshacer()
             Logger.error("Error de integridad, probablemente DNI duplicado")
             raise
         except Exception as e:
-            session.rollback()
+            deshacer()
             Logger.log_excepcion(e, "crear_cliente")
             raise
     
@@ -182,10 +225,10 @@ class _ServicioCliente:
             )
         
         except (ClienteNoEncontradoException, ValidacionException):
-            session.rollback()
+            deshacer()
             raise
         except Exception as e:
-            session.rollback()
+            deshacer()
             Logger.log_excepcion(e, "modificar_cliente")
             raise
 
@@ -200,25 +243,31 @@ def crear_cliente(nombre: str, dni: str, telefono: str = None, email: str = None
     """Crea un nuevo cliente"""
     return _ServicioCliente.crear_cliente(nombre, dni, telefono, email)
 
-def listar_clientes():
-    """Devuelve todos los clientes"""
-    return _RepositorioCliente.listar_todos()
+def listar_clientes(resumen: bool = False):
+    """Devuelve todos los clientes (resumen=True: ResumenCliente en vez de objetos ORM)"""
+    return _RepositorioCliente.listar_todos(resumen)
+
+def listar_clientes_paginado(tamano_pagina: int = TAMANO_PAGINA_DEFECTO, cursor: str = None, hacia_atras: bool = False, resumen: bool = False):
+    """Devuelve una Pagina de clientes (por nombre); cursor = cursor_siguiente/cursor_anterior de la página previa"""
+    return _RepositorioCliente.listar_pagina(tamano_pagina, cursor, hacia_atras, resumen)
 
-def obtener_cliente_por_id(cliente_id: int):
-    """Obtiene un cliente por ID"""
-    return _RepositorioCliente.obtener_por_id(cliente_id)
+def obtener_cliente_por_id(cliente_id: int, dto: bool = False):
+    """Obtiene un cliente por ID (dto=True: ClienteDTO de la caché de entidades)"""
+    return _RepositorioCliente.obtener_dto(cliente_id) if dto else _RepositorioCliente.obtener_por_id(cliente_id)
 
-def buscar_cliente_por_dni(dni: str):
-    """Busca un cliente por DNI"""
-    return _RepositorioCliente.obtener_por_dni(dni)
+def buscar_cliente_por_dni(dni: str, dto: bool = False):
+    """Busca un cliente por DNI (dto=True: ClienteDTO)"""
+    cliente = _RepositorioCliente.obtener_por_dni(dni)
+    return a_dto(cliente) if dto else cliente
 
 def buscar_cliente_por_nombre(nombre: str):
-    """Busca clientes por nombre (búsqueda parcial)"""
+    """Busca clientes por nombre (por prefijo de palabra, sin distinguir acentos)"""
     return _RepositorioCliente.obtener_por_nombre(nombre)
 
-def modificar_cliente(cliente_id: int, nombre: str = None, telefono: str = None, email: str = None):
-    """Modifica un cliente existente"""
-    return _ServicioCliente.modificar_cliente(cliente_id, nombre, telefono, email)
+def modificar_cliente(cliente_id: int, nombre: str = None, telefono: str = None, email: str = None, dto: bool = False):
+    """Modifica un cliente existente (dto=True: devuelve ClienteDTO)"""
+    cliente = _ServicioCliente.modificar_cliente(cliente_id, nombre, telefono, email)
+    return a_dto(cliente) if dto else cliente
 
 def eliminar_cliente(cliente_id: int):
     """Elimina un cliente"""
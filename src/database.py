@@ -3,37 +3,180 @@ título: capa de base de datos
 fecha: 03.12.2025
 descripcion: clase DatabaseConnector que gestiona la conexión a SQLite.
 
-Gestiona engine, sesiones, creación de tablas y relaciones.
-Define también los 4 modelos: Cliente, Mascota, Veterinario, Cita.
+Gestiona engine (con pool de conexiones y perfiles de PRAGMA), sesiones (una por hilo con
+scoped_session), creación de tablas y relaciones.
+Define también los 5 modelos: Cliente, Mascota, Veterinario, SerieCita, Cita,
+y la tabla versiones_datos (un número de versión por tabla que sube con cada escritura).
+
+Importar el módulo no abre la BD: el engine, las tablas y la sesión se crean
+al primer uso. La URL se toma de configurar_base_datos() o de la variable de
+entorno CLINICA_DB_URL (por defecto, clinica.db en la raíz del proyecto).
 """
 
+import os
+import threading
+from datetime import datetime, time as dt_time
+
 from sqlalchemy import (
     create_engine,
+    update,
     Column,
     Integer,
     String,
     Float,
     Date,
     ForeignKey,
+    Index,
+    TypeDecorator,
     event,
+    inspect,
+    text,
 )
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import StaticPool
 
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import Session as OrmSession, sessionmaker, scoped_session, relationship
+from sqlalchemy.util import ThreadLocalRegistry
+from contextlib import contextmanager
 
 # ==========================================
 # 1. MOTOR DE BASE DE DATOS (ENGINE)
 # ==========================================
 
-# echo=False para que no saque SQL por consola
-engine = create_engine("sqlite:///clinica.db", echo=False)
+# Pool de conexiones: cada hilo (cada ejecución de Streamlit) toma la suya,
+# así varias sesiones del navegador pueden leer a la vez
+CONFIG_POOL = dict(
+    pool_size=10,        # conexiones que se mantienen abiertas
+    max_overflow=20,     # conexiones extra en picos
+    pool_timeout=30,     # segundos esperando una conexión libre
+    pool_recycle=1800,   # renovar conexiones cada 30 min
+    pool_pre_ping=True,  # descartar conexiones rotas antes de usarlas
+)
+
+
+# Perfiles de PRAGMA de SQLite que se aplican a cada conexión nueva
+PERFILES_SQLITE = {
+    # Comportamiento original: diario rollback y fsync completo en cada commit
+    "compatible": {
+        "foreign_keys": "ON",
+    },
+    # Lectores y escritor en paralelo (WAL) y commits sin fsync completo
+    "concurrente": {
+        "foreign_keys": "ON",
+        "journal_mode": "WAL",       # los lectores no esperan al que escribe
+        "synchronous": "NORMAL",     # seguro con WAL, mucho menos fsync
+        "busy_timeout": 5000,        # ms esperando un bloqueo antes de fallar
+        "cache_size": -20000,        # negativo = KiB (~20 MB por conexión)
+        "temp_store": "MEMORY",      # tablas temporales y ordenaciones en RAM
+        "mmap_size": 268435456,      # 256 MB de lectura por mmap
+    },
+}
+
+# Se puede elegir con la variable de entorno CLINICA_PERFIL_SQLITE
+PERFIL_SQLITE = os.environ.get("CLINICA_PERFIL_SQLITE", "concurrente")
+
+
+def _aplicador_pragmas(pragmas: dict):
+    """Devuelve el listener 'connect' que ejecuta los PRAGMA indicados"""
+
+    # 🔐 foreign_keys=ON es IMPORTANTE para CASCADE
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nombre, valor in pragmas.items():
+            cursor.execute(f"PRAGMA {nombre}={valor};")
+        cursor.close()
+
+    return set_sqlite_pragma
+
+
+def crear_engine(url: str = None, perfil: str = None, **opciones_pool):
+    """
+    Fábrica de engines: aplica CONFIG_POOL (sobrescribible por parámetro)
+    y los PRAGMA del perfil de PERFILES_SQLITE en cada conexión nueva.
+    Ejemplo: crear_engine("sqlite:///otra.db", perfil="compatible", pool_size=5)
+    """
+    url = url or url_base_datos()
+    perfil = perfil or PERFIL_SQLITE
+    if perfil not in PERFILES_SQLITE:
+        raise ValueError(f"Perfil SQLite desconocido: {perfil} (opciones: {', '.join(PERFILES_SQLITE)})")
+
+    if _es_memoria(url):
+        # Una BD en memoria solo existe dentro de su conexión: todos los hilos comparten una
+        opciones = dict(poolclass=StaticPool, connect_args={"check_same_thread": False})
+    else:
+        opciones = {**CONFIG_POOL, **opciones_pool}
+    # echo=False para que no saque SQL por consola
+    nuevo_engine = create_engine(url, echo=False, **opciones)
+    event.listen(nuevo_engine, "connect", _aplicador_pragmas(PERFILES_SQLITE[perfil]))
+    return nuevo_engine
+
+
+def _es_memoria(url: str) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+# La BD por defecto es clinica.db en la raíz del proyecto, se arranque desde donde se arranque
+RUTA_BD_DEFECTO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "clinica.db")
+
+
+def url_base_datos() -> str:
+    """URL configurada: CLINICA_DB_URL (p.ej. "sqlite://" para memoria) o clinica.db"""
+    return _configuracion["url"] or os.environ.get("CLINICA_DB_URL") or f"sqlite:///{RUTA_BD_DEFECTO}"
+
 
-# 🔐 Activar claves foráneas en SQLite (IMPORTANTE para CASCADE)
-@event.listens_for(engine, "connect")
-def set_sqlite_pragma(dbapi_connection, connection_record):
-    cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA foreign_keys=ON;")
-    cursor.close()
+# Ajustes de configurar_base_datos(); None = usar variable de entorno / valor por defecto
+_configuracion = {"url": None, "perfil": None, "opciones_pool": {}}
+_candado_engine = threading.Lock()
+_engine = None
+
+
+def configurar_base_datos(url: str = None, perfil: str = None, **opciones_pool) -> None:
+    """
+    Fija la URL, el perfil de PRAGMA y el pool antes de usar la BD.
+    Si el engine ya estaba creado, se descarta y se creará de nuevo con los ajustes nuevos.
+    Pensado para el arranque y los tests: una petición que esté a medias en otro
+    hilo termina con la sesión (y el engine) que ya tenía.
+    """
+    global _engine
+    with _candado_engine:
+        _configuracion.update(url=url, perfil=perfil, opciones_pool=opciones_pool)
+        if _engine is not None:
+            session.remove()
+            # Registro nuevo: las sesiones de los demás hilos quedan huérfanas y
+            # su próximo session() crea una conectada al engine nuevo
+            session.registry = ThreadLocalRegistry(Session)
+            _engine.dispose()
+            _engine = None
+            globals().pop("engine", None)
+            globals().pop("FTS_DISPONIBLE", None)
+
+
+def obtener_engine():
+    """
+    Devuelve el engine de la aplicación, creándolo la primera vez que se necesita
+    (junto con las tablas, índices y búsqueda). Importar el módulo no abre la BD.
+    """
+    global _engine
+    if _engine is None:
+        with _candado_engine:
+            if _engine is None:
+                nuevo = crear_engine(_configuracion["url"], _configuracion["perfil"],
+                                     **_configuracion["opciones_pool"])
+                globals()["FTS_DISPONIBLE"] = preparar_esquema(nuevo)
+                globals()["engine"] = nuevo
+                _engine = nuevo
+    return _engine
+
+
+def __getattr__(nombre):
+    """`database.engine` y `database.FTS_DISPONIBLE` se crean al primer acceso"""
+    if nombre in ("engine", "FTS_DISPONIBLE"):
+        obtener_engine()
+        return globals()[nombre]
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
 
 # ==========================================
 # 2. BASE DECLARATIVA
@@ -41,6 +184,33 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
 
 Base = declarative_base()
 
+
+class HoraMinutos(TypeDecorator):
+    """
+    Hora del día guardada como entero: minutos desde medianoche (10:30 -> 630).
+    En Python se lee y escribe como datetime.time; también acepta "HH:MM".
+    Al ser un entero, ordenar, filtrar por franjas y comprobar solapes se hace en SQL.
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        if isinstance(value, str):
+            value = datetime.strptime(value.strip(), "%H:%M").time()
+        return value.hour * 60 + value.minute
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return dt_time(value // 60, value % 60)
+
+    @property
+    def python_type(self):
+        return dt_time
+
 # ==========================================
 # 3. MODELOS (TABLAS)
 # ==========================================
@@ -105,6 +275,13 @@ class Mascota(Base):
         cascade="all, delete-orphan",
     )
     
+    # ... y sus series de citas periódicas
+    series = relationship(
+        "SerieCita",
+        back_populates="mascota",
+        cascade="all, delete-orphan",
+    )
+    
     def __repr__(self):
         return f"<Mascota id={self.id} nombre={self.nombre}>"
 
@@ -128,11 +305,58 @@ class Veterinario(Base):
     # NO ponemos cascade aquí porque queremos que las citas sigan existiendo
     # y solo se quede veterinario_id = NULL (SET NULL en la FK de Cita)
     citas = relationship("Cita", back_populates="veterinario")
+    series = relationship("SerieCita", back_populates="veterinario")
     
     def __repr__(self):
         return f"<Veterinario id={self.id} nombre={self.nombre}>"
 
 
+class SerieCita(Base):
+    """
+    TABLA: series_citas
+    ===================
+    Citas periódicas de una mascota con un veterinario (regla al estilo RRULE).
+    Las ocurrencias no se guardan: se calculan al consultar (src.series) y solo
+    pasan a ser filas de citas cuando se modifican o se marcan Realizada.
+    """
+    __tablename__ = "series_citas"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    fecha_inicio = Column(Date, nullable=False)   # primera ocurrencia (DTSTART)
+    hora = Column(HoraMinutos, nullable=False)
+    frecuencia = Column(String(10), nullable=False)  # 'DIARIA' / 'SEMANAL' / 'MENSUAL' (FREQ)
+    intervalo = Column(Integer, nullable=False, default=1)  # cada cuántos días/semanas/meses (INTERVAL)
+    repeticiones = Column(Integer)   # número total de ocurrencias (COUNT); NULL = sin límite
+    fecha_fin = Column(Date)         # última fecha posible (UNTIL); NULL = sin límite
+    motivo = Column(String(200))
+    
+    # Mismo comportamiento que Cita: CASCADE con la mascota, SET NULL con el veterinario
+    mascota_id = Column(
+        Integer,
+        ForeignKey("mascotas.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    veterinario_id = Column(
+        Integer,
+        ForeignKey("veterinarios.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    
+    mascota = relationship("Mascota", back_populates="series")
+    veterinario = relationship("Veterinario", back_populates="series")
+    
+    __table_args__ = (
+        # expandir_series(): series de un rango de fechas
+        Index("ix_series_citas_inicio_fin", "fecha_inicio", "fecha_fin"),
+    )
+    
+    def __repr__(self):
+        return (
+            f"<SerieCita id={self.id} {self.frecuencia} desde={self.fecha_inicio} "
+            f"mascota_id={self.mascota_id} veterinario_id={self.veterinario_id}>"
+        )
+
+
 class Cita(Base):
     """
     TABLA: citas
@@ -143,7 +367,7 @@ class Cita(Base):
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     fecha = Column(Date, nullable=False)
-    hora = Column(String(5), nullable=False)  # 'HH:MM'
+    hora = Column(HoraMinutos, nullable=False)  # time; en la BD, minutos desde medianoche
     motivo = Column(String(200))
     diagnostico = Column(String(500))
     estado = Column(String(20), default="Pendiente")
@@ -162,9 +386,32 @@ class Cita(Base):
         nullable=True,
     )
     
+    # Cita materializada de una serie: serie y fecha de la ocurrencia que sustituye
+    # (se conserva aunque la cita se mueva a otro día). Si se borra la serie, la cita queda suelta
+    serie_id = Column(
+        Integer,
+        ForeignKey("series_citas.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    fecha_serie = Column(Date)
+    
     mascota = relationship("Mascota", back_populates="citas")
     veterinario = relationship("Veterinario", back_populates="citas")
     
+    # Índices para los filtros más usados de _RepositorioCita y analisis
+    __table_args__ = (
+        # verificar_disponibilidad() y obtener_por_veterinario()
+        Index("ix_citas_veterinario_fecha_hora", "veterinario_id", "fecha", "hora"),
+        # obtener_por_mascota() (ordenado por fecha)
+        Index("ix_citas_mascota_fecha", "mascota_id", "fecha"),
+        # obtener_por_estado() y contar_por_estado()
+        Index("ix_citas_estado_fecha", "estado", "fecha"),
+        # obtener_por_fecha(), obtener_futuras() y rangos semana/mes de analisis
+        Index("ix_citas_fecha_hora", "fecha", "hora"),
+        # ocurrencias ya materializadas de una serie (como mucho una cita por ocurrencia)
+        Index("ix_citas_serie_fecha", "serie_id", "fecha_serie", unique=True),
+    )
+    
     def __repr__(self):
         return (
             f"<Cita id={self.id} fecha={self.fecha} "
@@ -172,13 +419,394 @@ class Cita(Base):
         )
 
 
+class VersionDatos(Base):
+    """
+    TABLA: versiones_datos
+    ======================
+    Una fila por tabla de TABLAS_VERSIONADAS con un número que solo sube:
+    cambia en la misma transacción que cualquier escritura en esa tabla (sección 6).
+    """
+    __tablename__ = "versiones_datos"
+    
+    tabla = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
 # ==========================================
-# 4. CREAR TABLAS Y SESIÓN
+# 4. MIGRACIONES
 # ==========================================
 
-Base.metadata.create_all(engine)
+def migrar_hora_minutos(engine_destino=None) -> bool:
+    """
+    Convierte citas.hora de texto 'HH:MM' (esquema antiguo) a minutos desde medianoche.
+    SQLite no permite cambiar el tipo de una columna: se renombra la tabla, se crea
+    la nueva (con sus índices), se copian las filas convirtiendo la hora y se borra la vieja.
+    Return: True si se ha migrado, False si ya estaba al día
+    """
+    engine_destino = engine_destino or obtener_engine()
+    inspector = inspect(engine_destino)
+    if not inspector.has_table("citas"):
+        return False
+    columna = next(c for c in inspector.get_columns("citas") if c["name"] == "hora")
+    if isinstance(columna["type"], Integer):
+        return False
+
+    tabla = Cita.__table__
+    # Solo se copian las columnas que ya tenía la tabla vieja (las nuevas quedan a NULL)
+    existentes = {c["name"] for c in inspector.get_columns("citas")}
+    copiadas = [c.name for c in tabla.columns if c.name in existentes]
+    columnas = ", ".join(copiadas)
+    origen = ", ".join(
+        "CAST(substr(hora, 1, 2) AS INTEGER) * 60 + CAST(substr(hora, 4, 2) AS INTEGER)" if c == "hora" else c
+        for c in copiadas
+    )
+    with engine_destino.begin() as conn:
+        # BEGIN explícito: el driver sqlite3 no abre transacción antes de DDL,
+        # y así la migración entera es todo o nada
+        conn.exec_driver_sql("BEGIN")
+        # Los índices viejos se van con la tabla vieja; sus nombres se reutilizan
+        for indice in inspector.get_indexes("citas"):
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {indice['name']}")
+        conn.exec_driver_sql("DROP TABLE IF EXISTS citas_hora_texto")
+        conn.exec_driver_sql("ALTER TABLE citas RENAME TO citas_hora_texto")
+        tabla.create(conn)
+        conn.exec_driver_sql(f"INSERT INTO citas ({columnas}) SELECT {origen} FROM citas_hora_texto")
+        conn.exec_driver_sql("DROP TABLE citas_hora_texto")
+    return True
+
+
+def migrar_columnas(engine_destino=None) -> list:
+    """
+    Añade a las tablas ya existentes las columnas nuevas (opcionales) de los modelos,
+    p.ej. citas.serie_id y citas.fecha_serie. create_all() no las añade. Es idempotente.
+    Return: lista con los nombres "tabla.columna" añadidos
+    """
+    engine_destino = engine_destino or obtener_engine()
+    inspector = inspect(engine_destino)
+    nuevas = []
+    with engine_destino.begin() as conn:
+        for tabla in Base.metadata.sorted_tables:
+            if not inspector.has_table(tabla.name):
+                continue
+            existentes = {c["name"] for c in inspector.get_columns(tabla.name)}
+            for columna in tabla.columns:
+                if columna.name in existentes or not columna.nullable:
+                    continue
+                ddl = f"ALTER TABLE {tabla.name} ADD COLUMN {columna.name} {columna.type.compile(engine_destino.dialect)}"
+                for fk in columna.foreign_keys:
+                    ddl += f" REFERENCES {fk.column.table.name}({fk.column.name})"
+                    if fk.ondelete:
+                        ddl += f" ON DELETE {fk.ondelete}"
+                conn.exec_driver_sql(ddl)
+                nuevas.append(f"{tabla.name}.{columna.name}")
+    return nuevas
+
+
+def migrar_indices(engine_destino=None) -> list:
+    """
+    Crea en una BD ya existente los índices declarados en los modelos que falten.
+    create_all() no los añade si la tabla ya existía. Es idempotente.
+    Return: lista con los nombres de los índices creados
+    """
+    engine_destino = engine_destino or obtener_engine()
+    inspector = inspect(engine_destino)
+    creados = []
+    for tabla in Base.metadata.sorted_tables:
+        if not inspector.has_table(tabla.name):
+            continue
+        existentes = {i["name"] for i in inspector.get_indexes(tabla.name)}
+        for indice in tabla.indexes:
+            if indice.name not in existentes:
+                indice.create(bind=engine_destino, checkfirst=True)
+                creados.append(indice.name)
+    return creados
+
+
+# Búsqueda de texto: tablas FTS5 "sombra" (external content) de clientes, mascotas y
+# veterinarios, sincronizadas con triggers. unicode61 + remove_diacritics pliega
+# acentos ("Ramón" == "Ramon").
+TABLAS_BUSQUEDA = {
+    "clientes": ("nombre", "dni", "email", "telefono"),
+    "mascotas": ("nombre", "especie", "raza"),
+    "veterinarios": ("nombre", "dni", "especialidad", "cargo", "email", "telefono"),
+}
+
+
+def _ddl_busqueda(tabla: str, columnas: tuple) -> list:
+    """Sentencias CREATE (idempotentes) de la tabla FTS5 y sus 3 triggers"""
+    fts = f"{tabla}_fts"
+    cols = ", ".join(columnas)
+    nuevos = ", ".join(f"new.{c}" for c in columnas)
+    viejos = ", ".join(f"old.{c}" for c in columnas)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{tabla}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabla} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {nuevos}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabla} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {viejos}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {tabla} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {viejos}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {nuevos}); END",
+    ]
+
+
+def reconstruir_busqueda(engine_destino=None) -> None:
+    """Regenera los índices FTS5 a partir de las tablas (BD antiguas o índices dañados)"""
+    engine_destino = engine_destino or obtener_engine()
+    with engine_destino.begin() as conn:
+        for tabla in TABLAS_BUSQUEDA:
+            conn.execute(text(f"INSERT INTO {tabla}_fts({tabla}_fts) VALUES ('rebuild')"))
+
+
+def preparar_busqueda(engine_destino=None) -> bool:
+    """
+    Crea las tablas FTS5 y sus triggers si faltan. Es idempotente.
+    Si alguna tabla FTS se crea ahora sobre una BD con datos, se reconstruye su índice.
+    Return: True si FTS5 está disponible, False si el SQLite no lo soporta
+    """
+    engine_destino = engine_destino or obtener_engine()
+    try:
+        with engine_destino.begin() as conn:
+            existentes = set(conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'table'")
+            ).scalars())
+            for tabla, columnas in TABLAS_BUSQUEDA.items():
+                for sentencia in _ddl_busqueda(tabla, columnas):
+                    conn.execute(text(sentencia))
+                if f"{tabla}_fts" not in existentes:
+                    conn.execute(text(f"INSERT INTO {tabla}_fts({tabla}_fts) VALUES ('rebuild')"))
+        return True
+    except OperationalError:
+        # SQLite compilado sin FTS5: las búsquedas usan LIKE
+        return False
+
+
+def preparar_versiones(engine_destino=None) -> None:
+    """Crea la fila (a 0) de cada tabla versionada que falte. Es idempotente"""
+    engine_destino = engine_destino or obtener_engine()
+    with engine_destino.begin() as conn:
+        for tabla in TABLAS_VERSIONADAS:
+            conn.execute(text("INSERT OR IGNORE INTO versiones_datos (tabla, version) VALUES (:tabla, 0)"),
+                         {"tabla": tabla})
+
+
+def preparar_esquema(engine_destino) -> bool:
+    """
+    Deja una BD (nueva o de una versión anterior) con el esquema actual: tablas,
+    migraciones, índices, versiones de datos y búsqueda. Es idempotente.
+    Return: True si la búsqueda FTS5 está disponible
+    """
+    Base.metadata.create_all(engine_destino)
+    migrar_hora_minutos(engine_destino)
+    migrar_columnas(engine_destino)
+    migrar_indices(engine_destino)
+    preparar_versiones(engine_destino)
+    return preparar_busqueda(engine_destino)
+
+
+# ==========================================
+# 5. SESIÓN (las tablas se crean en obtener_engine)
+# ==========================================
+
+# Una sesión por hilo: cada usuario de Streamlit ejecuta su script en su propio
+# hilo, así no comparten identity map ni se bloquean entre ellos.
+# expire_on_commit=False: los objetos guardados en st.session_state siguen
+# siendo legibles cuando el hilo que los cargó ya terminó.
+class _SesionClinica(OrmSession):
+    """Sesión que se conecta al engine configurado la primera vez que se crea"""
+
+    def __init__(self, bind=None, **kwargs):
+        super().__init__(bind=bind or obtener_engine(), **kwargs)
+
+
+Session = sessionmaker(class_=_SesionClinica, expire_on_commit=False)
+
+# Proxy thread-local: `session.query(...)`, `session.commit()`... usan
+# automáticamente la sesión del hilo actual
+session = scoped_session(Session)
+
+
+@contextmanager
+def sesion_de_trabajo():
+    """
+    Unidad de trabajo: entrega la sesión del hilo, hace commit al salir
+    y rollback si ocurre una excepción.
+
+        with sesion_de_trabajo() as s:
+            s.add(Cliente(...))
+    """
+    actual = session()
+    try:
+        yield actual
+        actual.commit()
+    except Exception:
+        actual.rollback()
+        raise
+
+
+# Dentro de src.transacciones.transaccion() los repositorios no confirman cada
+# operación: confirmar() solo hace flush y el commit (o rollback) llega al final
+def en_transaccion() -> bool:
+    """True si la sesión del hilo está dentro de una transaccion()"""
+    return session().info.get("transaccion", 0) > 0
+
+
+def confirmar() -> None:
+    """Commit de una escritura de un repositorio (dentro de transaccion(): solo flush)"""
+    if en_transaccion():
+        session.flush()
+    else:
+        session.commit()
+
+
+def deshacer() -> None:
+    """Rollback tras un error en un servicio (dentro de transaccion() lo hace ella al salir)"""
+    if not en_transaccion():
+        session.rollback()
+
+
+def abrir_transaccion() -> None:
+    """
+    Abre ya la transacción de SQLite de la sesión del hilo (la usa transaccion()).
+    pysqlite solo emite BEGIN antes de un INSERT/UPDATE/DELETE: un SAVEPOINT
+    anterior abriría la transacción él mismo y su RELEASE lo confirmaría todo
+    """
+    conexion = session.connection().connection.dbapi_connection
+    if not conexion.in_transaction:
+        conexion.execute("BEGIN")
+
+
+@contextmanager
+def punto_de_guardado():
+    """
+    Para servicios de varios pasos: dentro de transaccion() los ejecuta en un
+    SAVEPOINT y, si fallan, deshace solo lo suyo (aunque ya hubiesen hecho flush)
+    y la transacción sigue. Fuera no hace nada: confirmar()/deshacer() ya bastan
+    """
+    if not en_transaccion():
+        yield
+        return
+    punto = session().begin_nested()
+    try:
+        yield
+    except BaseException:
+        if punto.is_active:
+            punto.rollback()
+        raise
+    if punto.is_active:
+        punto.commit()  # RELEASE SAVEPOINT: lo hecho queda en la transacción exterior
+
+
+def cerrar_sesion() -> None:
+    """Cierra y descarta la sesión del hilo actual (devuelve su conexión al pool)"""
+    session.remove()
+
+
+@contextmanager
+def sesion_de_pagina():
+    """
+    Envuelve el cuerpo de una página de Streamlit y llama a cerrar_sesion() al salir,
+    también cuando la ejecución acaba con st.rerun(), st.stop() o una excepción
+    """
+    try:
+        yield
+    finally:
+        cerrar_sesion()
+
+
+# ==========================================
+# 6. VERSIONES DE DATOS
+# ==========================================
+# Cada escritura en una tabla versionada sube su número en versiones_datos, dentro
+# de la misma transacción: se ve a la vez que los datos, también desde otros
+# procesos. Las cachés (st.cache_data, cachés en memoria) usan version_datos()
+# como parte de su clave. Tras el commit se avisa a los suscriptores del proceso.
+#   - after_flush: altas, cambios y borrados de objetos ORM
+#   - do_orm_execute: INSERT/UPDATE/DELETE masivos (importador, query().delete())
+# Un borrado también cambia las tablas que cuelgan de esa por CASCADE / SET NULL.
+
+TABLAS_VERSIONADAS = ("clientes", "mascotas", "veterinarios", "series_citas", "citas")
+
+_suscriptores = []
+
+
+def _dependientes(tabla: str) -> set:
+    """Tablas que un DELETE en tabla puede cambiar por sus claves ajenas (recursivo)"""
+    resultado = set()
+    for hija in Base.metadata.sorted_tables:
+        if any(fk.column.table.name == tabla and fk.ondelete for fk in hija.foreign_keys) and hija.name not in resultado:
+            resultado |= {hija.name} | _dependientes(hija.name)
+    return resultado
+
+
+def _subir_versiones(sesion, tablas: set) -> None:
+    """Sube (una vez por transacción) la versión de las tablas cambiadas"""
+    pendientes = sesion.info.setdefault("tablas_cambiadas", set())
+    nuevas = (set(tablas) & set(TABLAS_VERSIONADAS)) - pendientes
+    if nuevas:
+        # Core sobre la conexión de la sesión: misma transacción, sin pasar por el ORM
+        sesion.connection().execute(
+            update(VersionDatos).where(VersionDatos.tabla.in_(nuevas)).values(version=VersionDatos.version + 1)
+        )
+        pendientes |= nuevas
+
+
+@event.listens_for(_SesionClinica, "after_flush")
+def _anotar_cambios(sesion, contexto):
+    tablas = {o.__table__.name for o in sesion.new}
+    tablas |= {o.__table__.name for o in sesion.dirty if sesion.is_modified(o, include_collections=False)}
+    for o in sesion.deleted:
+        tablas |= {o.__table__.name} | _dependientes(o.__table__.name)
+    _subir_versiones(sesion, tablas)
+
+
+@event.listens_for(_SesionClinica, "do_orm_execute")
+def _anotar_cambios_masivos(estado):
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        tabla = estado.statement.table.name
+        _subir_versiones(estado.session, {tabla} | (_dependientes(tabla) if estado.is_delete else set()))
+
+
+@event.listens_for(_SesionClinica, "after_commit")
+def _notificar_cambios(sesion):
+    tablas = frozenset(sesion.info.pop("tablas_cambiadas", ()))
+    if tablas:
+        for funcion in list(_suscriptores):
+            funcion(tablas)
+
+
+@event.listens_for(_SesionClinica, "after_rollback")
+def _descartar_cambios(sesion):
+    sesion.info.pop("tablas_cambiadas", None)
+
+
+def obtener_versiones() -> dict:
+    """Versión actual de cada tabla versionada: {tabla: int} (una SELECT de pocas filas)"""
+    filas = session.execute(text("SELECT tabla, version FROM versiones_datos")).all()
+    return {tabla: version for tabla, version in filas}
+
+
+def version_datos(*tablas: str) -> int:
+    """
+    Número que sube cada vez que cambia alguna de las tablas indicadas (todas si no se indica)
+    Pensado como clave de caché: st.cache_data(...)(args, version=version_datos("citas"))
+    """
+    versiones = obtener_versiones()
+    return sum(versiones.get(t, 0) for t in (tablas or TABLAS_VERSIONADAS))
+
+
+def suscribir_cambios(funcion):
+    """
+    Llama a funcion(frozenset de tablas) tras cada commit que cambie tablas versionadas
+    (solo en este proceso; no debe usar la BD). Devuelve funcion: sirve de decorador
+    """
+    _suscriptores.append(funcion)
+    return funcion
 
-Session = sessionmaker(bind=engine)
-session = Session()
 
-print("✅ Base de datos configurada correctamente")
+def cancelar_suscripcion(funcion) -> None:
+    """Deja de avisar a funcion"""
+    if funcion in _suscriptores:
+        _suscriptores.remove(funcion)
@@ -0,0 +1,196 @@
+"""
+título: módulo de disponibilidad
+fecha: 16.10.2026
+descripción: calcula los huecos libres de 30 minutos de los veterinarios
+entre las 09:00 y las 17:00.
+
+CÓMO FUNCIONA:
+===============
+
+1. La jornada se divide en HUECOS de 30 minutos (09:00, 09:30, ..., 16:30).
+   La ocupación de un veterinario en un día es un entero en el que el bit i
+   está a 1 si el hueco i tiene una cita (un "bitmap" de 16 bits).
+   └─ misma regla que src.citas.verificar_disponibilidad: una cita ocupa los
+      huecos que empiezan a menos de 30 minutos de ella. Una cita a las 10:00
+      ocupa solo ese hueco; una a las 10:15, los de 10:00 y 10:30
+
+2. _CacheOcupacion: guarda los bitmaps por (veterinario, fecha).
+   └─ los repositorios de citas invalidan el (veterinario, fecha) afectado
+      al crear, modificar, cancelar o eliminar una cita
+
+3. _MotorDisponibilidad: rellena lo que falte en la caché con UNA consulta
+   para todo el rango de días y todos los veterinarios pedidos.
+   └─ las citas canceladas no ocupan hueco
+   └─ las ocurrencias pendientes de las series (src.series) sí, aunque no
+      tengan fila en citas; crear, finalizar o eliminar una serie invalida
+      los bitmaps de su veterinario
+
+4. Interfaz pública: obtener_huecos_libres(), obtener_huecos_libres_veterinario(),
+   hueco_libre(), invalidar_disponibilidad(), obtener_metricas_cache_disponibilidad()
+"""
+
+import threading
+from datetime import date, datetime, time, timedelta
+
+from src.database import session, Cita, en_transaccion
+
+DURACION_HUECO = 30                     # minutos
+INICIO_JORNADA = 9 * 60                 # 09:00 en minutos desde medianoche
+FIN_JORNADA = 17 * 60                   # 17:00 (el último hueco empieza a las 16:30)
+HUECOS = [time(m // 60, m % 60) for m in range(INICIO_JORNADA, FIN_JORNADA, DURACION_HUECO)]
+
+
+def _minuto(hora) -> int:
+    """Minutos desde medianoche de hora ("HH:MM" o time)"""
+    if isinstance(hora, str):
+        horas, minutos = hora.split(":")
+        return int(horas) * 60 + int(minutos)
+    return hora.hour * 60 + hora.minute
+
+
+def _indices_huecos(hora) -> list:
+    """Posiciones de los huecos que se solapan con una cita que empieza a hora"""
+    minuto = _minuto(hora)
+    return [i for i, inicio in enumerate(range(INICIO_JORNADA, FIN_JORNADA, DURACION_HUECO))
+            if abs(inicio - minuto) < DURACION_HUECO]
+
+
+class _CacheOcupacion:
+    """Caché en proceso de bitmaps de ocupación por (veterinario_id, fecha)"""
+
+    aciertos = 0
+    fallos = 0
+    _bitmaps = {}
+    _version = 0   # cambia en cada invalidación: evita guardar un cálculo ya obsoleto
+    _lock = threading.Lock()
+
+    @classmethod
+    def obtener(cls, claves):
+        """Devuelve (bitmaps encontrados, claves que faltan, versión actual)"""
+        with cls._lock:
+            encontrados = {c: cls._bitmaps[c] for c in claves if c in cls._bitmaps}
+            faltan = [c for c in claves if c not in encontrados]
+            cls.aciertos += len(encontrados)
+            cls.fallos += len(faltan)
+            return encontrados, faltan, cls._version
+
+    @classmethod
+    def guardar(cls, bitmaps: dict, version: int):
+        with cls._lock:
+            if version == cls._version:
+                cls._bitmaps.update(bitmaps)
+
+    @classmethod
+    def invalidar(cls, veterinario_id: int = None, fecha: date = None):
+        with cls._lock:
+            cls._version += 1
+            if veterinario_id is None and fecha is None:
+                cls._bitmaps.clear()
+                return
+            for clave in [c for c in cls._bitmaps
+                          if (veterinario_id is None or c[0] == veterinario_id)
+                          and (fecha is None or c[1] == fecha)]:
+                del cls._bitmaps[clave]
+
+
+class _MotorDisponibilidad:
+    """Calcula bitmaps de ocupación y los traduce a huecos libres"""
+
+    @staticmethod
+    def _dias(fecha_desde: date, fecha_hasta: date) -> list:
+        return [fecha_desde + timedelta(days=i) for i in range((fecha_hasta - fecha_desde).days + 1)]
+
+    @staticmethod
+    def ocupacion(veterinario_ids, fecha_desde: date, fecha_hasta: date) -> dict:
+        """Devuelve {(veterinario_id, fecha): bitmap} para todos los días del rango"""
+        claves = [(v, d) for v in veterinario_ids for d in _MotorDisponibilidad._dias(fecha_desde, fecha_hasta)]
+        bitmaps, faltan, version = _CacheOcupacion.obtener(claves)
+        if not faltan:
+            return bitmaps
+
+        # Una sola consulta para todos los (veterinario, día) que no estaban en caché
+        vets_faltan = sorted({v for v, _ in faltan})
+        dias_faltan = [d for _, d in faltan]
+        filas = session.query(Cita.veterinario_id, Cita.fecha, Cita.hora).filter(
+            Cita.veterinario_id.in_(vets_faltan),
+            Cita.fecha >= min(dias_faltan),
+            Cita.fecha <= max(dias_faltan),
+            Cita.estado != "Cancelada",
+        ).all()
+
+        # Importación diferida: src.series importa este módulo para invalidar la caché
+        from src.series import expandir_series
+        ocurrencias = expandir_series(min(dias_faltan), max(dias_faltan),
+                                      vets_faltan[0] if len(vets_faltan) == 1 else None)
+        filas += [(o.veterinario_id, o.fecha, o.hora) for o in ocurrencias]
+
+        nuevos = {c: 0 for c in faltan}
+        for vet_id, fecha, hora in filas:
+            if (vet_id, fecha) in nuevos:
+                for indice in _indices_huecos(hora):
+                    nuevos[(vet_id, fecha)] |= 1 << indice
+        if not en_transaccion():  # no guardar ocupación aún sin confirmar
+            _CacheOcupacion.guardar(nuevos, version)
+
+        bitmaps.update(nuevos)
+        return bitmaps
+
+    @staticmethod
+    def huecos_libres(bitmap: int, fecha: date, ahora: datetime = None) -> list:
+        """Horas (time) de los huecos con el bit a 0; si ahora se indica, omite los ya pasados"""
+        return [
+            h for i, h in enumerate(HUECOS)
+            if not bitmap >> i & 1 and (ahora is None or datetime.combine(fecha, h) >= ahora)
+        ]
+
+
+# ========================
+# INTERFAZ PÚBLICA
+# ========================
+
+def obtener_huecos_libres(veterinario_ids, fecha_desde: date, fecha_hasta: date = None, incluir_pasados: bool = False) -> dict:
+    """
+    Huecos libres de 30 minutos de uno o varios veterinarios en un rango de días
+    Args: veterinario_ids: ID o lista de IDs
+          fecha_desde / fecha_hasta (date): rango (incluido); sin fecha_hasta = solo un día
+          incluir_pasados (bool): False = no ofrecer huecos anteriores a este momento
+    Return: {veterinario_id: {fecha: [time, ...]}}
+    """
+    if isinstance(veterinario_ids, int):
+        veterinario_ids = [veterinario_ids]
+    fecha_hasta = fecha_hasta or fecha_desde
+    if fecha_hasta < fecha_desde:
+        return {v: {} for v in veterinario_ids}
+
+    bitmaps = _MotorDisponibilidad.ocupacion(veterinario_ids, fecha_desde, fecha_hasta)
+    ahora = None if incluir_pasados else datetime.now()
+    resultado = {v: {} for v in veterinario_ids}
+    for (vet_id, fecha), bitmap in sorted(bitmaps.items()):
+        resultado[vet_id][fecha] = _MotorDisponibilidad.huecos_libres(bitmap, fecha, ahora)
+    return resultado
+
+def obtener_huecos_libres_veterinario(veterinario_id: int, fecha: date, incluir_pasados: bool = False) -> list:
+    """Huecos libres (lista de time) de un veterinario en un día"""
+    return obtener_huecos_libres(veterinario_id, fecha, incluir_pasados=incluir_pasados)[veterinario_id][fecha]
+
+def hueco_libre(veterinario_id: int, fecha: date, hora: time) -> bool:
+    """True si una cita a esa hora no se solapa con ninguna otra (según la caché de ocupación)"""
+    if not INICIO_JORNADA <= _minuto(hora) < FIN_JORNADA:
+        return False
+    bitmap = _MotorDisponibilidad.ocupacion([veterinario_id], fecha, fecha)[(veterinario_id, fecha)]
+    return not any(bitmap >> i & 1 for i in _indices_huecos(hora))
+
+def invalidar_disponibilidad(veterinario_id: int = None, fecha: date = None) -> None:
+    """Descarta la ocupación cacheada de un veterinario/día (sin argumentos: toda)"""
+    _CacheOcupacion.invalidar(veterinario_id, fecha)
+
+def obtener_metricas_cache_disponibilidad():
+    """
+    Devuelve los contadores de la caché de ocupación
+    Return: dict con aciertos (int), fallos (int), entradas (int)
+    """
+    return dict(
+        aciertos=_CacheOcupacion.aciertos,
+        fallos=_CacheOcupacion.fallos,
+        entradas=len(_CacheOcupacion._bitmaps),
+    )
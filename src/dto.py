@@ -0,0 +1,152 @@
+"""
+título: módulo de DTOs
+fecha: 16.10.2026
+descripción: objetos de transferencia inmutables entre los módulos de src y las
+páginas de Streamlit, en vez de objetos ORM vivos.
+
+CÓMO FUNCIONA:
+===============
+
+1. Un DTO es una dataclass frozen con __slots__: solo guarda los valores de
+   las columnas (sin __dict__, sin estado de SQLAlchemy) y no se puede modificar.
+   └─ no dependen de la sesión: guardarlos en st.session_state no retiene el
+      identity map y nunca dan DetachedInstanceError
+   └─ al ser inmutables (y hashables) se pueden compartir entre hilos y cachés
+
+2. Las relaciones que usan las páginas van anidadas como resúmenes:
+   MascotaDTO.cliente (PropietarioDTO), CitaDTO.mascota (MascotaCitaDTO, con su
+   propietario) y CitaDTO.veterinario (VeterinarioCitaDTO).
+
+3. a_dto(): convierte un objeto ORM, una Ocurrencia de una serie o una lista
+   de ellos. Las funciones públicas que lo admiten tienen un argumento dto=True.
+"""
+
+from dataclasses import dataclass
+from datetime import date, time
+
+from src.database import Cliente, Mascota, Veterinario, Cita
+from src.series import Ocurrencia
+
+
+@dataclass(frozen=True, slots=True)
+class PropietarioDTO:
+    id: int
+    nombre: str
+    dni: str
+
+
+@dataclass(frozen=True, slots=True)
+class ClienteDTO:
+    id: int
+    nombre: str
+    dni: str
+    telefono: str = None
+    email: str = None
+
+
+@dataclass(frozen=True, slots=True)
+class MascotaDTO:
+    id: int
+    nombre: str
+    especie: str
+    cliente_id: int
+    raza: str = None
+    edad: int = None
+    peso: float = None
+    sexo: str = None
+    cliente: PropietarioDTO = None
+
+
+@dataclass(frozen=True, slots=True)
+class VeterinarioDTO:
+    id: int
+    nombre: str
+    dni: str
+    cargo: str = None
+    especialidad: str = None
+    telefono: str = None
+    email: str = None
+
+
+@dataclass(frozen=True, slots=True)
+class MascotaCitaDTO:
+    id: int
+    nombre: str
+    especie: str
+    cliente: PropietarioDTO = None
+
+
+@dataclass(frozen=True, slots=True)
+class VeterinarioCitaDTO:
+    id: int
+    nombre: str
+    especialidad: str = None
+
+
+@dataclass(frozen=True, slots=True)
+class CitaDTO:
+    id: int                      # None en una ocurrencia de una serie aún sin materializar
+    fecha: date
+    hora: time
+    estado: str
+    mascota_id: int
+    veterinario_id: int = None
+    motivo: str = None
+    diagnostico: str = None
+    serie_id: int = None
+    fecha_serie: date = None
+    mascota: MascotaCitaDTO = None
+    veterinario: VeterinarioCitaDTO = None
+
+
+def _propietario(cliente):
+    return PropietarioDTO(cliente.id, cliente.nombre, cliente.dni) if cliente is not None else None
+
+
+def _cliente(cliente: Cliente) -> ClienteDTO:
+    return ClienteDTO(cliente.id, cliente.nombre, cliente.dni, cliente.telefono, cliente.email)
+
+
+def _mascota(mascota: Mascota) -> MascotaDTO:
+    return MascotaDTO(
+        mascota.id, mascota.nombre, mascota.especie, mascota.cliente_id,
+        mascota.raza, mascota.edad, mascota.peso, mascota.sexo, _propietario(mascota.cliente),
+    )
+
+
+def _veterinario(veterinario: Veterinario) -> VeterinarioDTO:
+    return VeterinarioDTO(
+        veterinario.id, veterinario.nombre, veterinario.dni, veterinario.cargo,
+        veterinario.especialidad, veterinario.telefono, veterinario.email,
+    )
+
+
+def _cita(cita) -> CitaDTO:
+    """Cita u Ocurrencia (mismos campos; la ocurrencia tiene id None)"""
+    mascota, vet = cita.mascota, cita.veterinario
+    return CitaDTO(
+        cita.id, cita.fecha, cita.hora, cita.estado, cita.mascota_id, cita.veterinario_id,
+        cita.motivo, cita.diagnostico, cita.serie_id, cita.fecha_serie,
+        MascotaCitaDTO(mascota.id, mascota.nombre, mascota.especie, _propietario(mascota.cliente)) if mascota else None,
+        VeterinarioCitaDTO(vet.id, vet.nombre, vet.especialidad) if vet else None,
+    )
+
+
+_CONVERSORES = {Cliente: _cliente, Mascota: _mascota, Veterinario: _veterinario, Cita: _cita, Ocurrencia: _cita}
+
+
+# ========================
+# INTERFAZ PÚBLICA
+# ========================
+
+def a_dto(resultado):
+    """
+    Convierte el resultado de una función de src en DTOs
+    Args: resultado: objeto ORM (Cliente, Mascota, Veterinario, Cita), Ocurrencia, lista de ellos o None
+    Return: el DTO equivalente (lista para una lista; None para None)
+    """
+    if resultado is None:
+        return None
+    if isinstance(resultado, (list, tuple)) and not isinstance(resultado, Ocurrencia):
+        return [a_dto(r) for r in resultado]
+    return _CONVERSORES[type(resultado)](resultado)
@@ -47,6 +47,11 @@ class CitaNoEncontradaException(ClinicaException):
         super().__init__(f"Cita con ID {cita_id} no encontrada")
 
 
+class SerieNoEncontradaException(ClinicaException):
+    def __init__(self, serie_id: int):
+        super().__init__(f"Serie de citas con ID {serie_id} no encontrada")
+
+
 # =====================================
 # EXCEPCIONES: VALIDACIÓN Y DUPLICADOS
 # =====================================
@@ -84,6 +89,13 @@ class DatabaseOperationException(ClinicaException):
         super().__init__(f"Error en operación '{operacion}': {motivo}")
 
 
+class ImportacionInterrumpidaException(DatabaseOperationException):
+    def __init__(self, entidad: str, confirmadas: int, motivo: str):
+        self.entidad = entidad
+        self.confirmadas = confirmadas  # filas ya guardadas en commits anteriores al error
+        super().__init__(f"importar {entidad}", f"{motivo} ({confirmadas} filas ya confirmadas)")
+
+
 # =====================================
 # EXCEPCIONES: LÓGICA DE NEGOCIO
 # =====================================
@@ -0,0 +1,249 @@
+"""
+título: módulo de exportación
+fecha: 16.10.2026
+descripción: exporta el historial de citas (con mascota, cliente y veterinario)
+a CSV, JSONL o Parquet sin cargarlo entero en memoria.
+
+CÓMO FUNCIONA:
+===============
+
+1. _ConsultaExportacion: una sola SELECT con JOIN de citas, mascotas, clientes
+   y veterinarios, filtrada por fechas, estado y veterinario.
+   └─ se lee con yield_per: la BD entrega las filas por lotes y nunca hay más
+      de un lote en memoria
+
+2. Escritores (_EscritorCSV, _EscritorJSONL, _EscritorParquet): escriben cada
+   lote en cuanto llega. Parquet necesita pyarrow (opcional).
+
+3. Interfaz pública: exportar_citas(), iterar_citas_exportacion(), formatos_disponibles()
+
+USO DESDE CONSOLA:
+    python -m src.exportacion citas.csv
+    python -m src.exportacion citas.parquet --desde 2025-01-01 --hasta 2025-12-31 --estado Realizada --veterinario 3
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+from datetime import date, time
+
+from sqlalchemy import select
+
+from src.database import session, Cita, Mascota, Cliente, Veterinario
+from src.exceptions import ValidacionException
+from src.logger import Logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet es opcional
+    pa = pq = None
+
+TAMANO_LOTE = 1_000
+
+# Columnas exportadas: (nombre en el fichero, columna de la BD)
+COLUMNAS_EXPORTACION = [
+    ("cita_id", Cita.id),
+    ("fecha", Cita.fecha),
+    ("hora", Cita.hora),
+    ("estado", Cita.estado),
+    ("motivo", Cita.motivo),
+    ("diagnostico", Cita.diagnostico),
+    ("mascota_id", Mascota.id),
+    ("mascota", Mascota.nombre),
+    ("especie", Mascota.especie),
+    ("raza", Mascota.raza),
+    ("cliente_id", Cliente.id),
+    ("cliente", Cliente.nombre),
+    ("cliente_dni", Cliente.dni),
+    ("cliente_telefono", Cliente.telefono),
+    ("veterinario_id", Veterinario.id),
+    ("veterinario", Veterinario.nombre),
+    ("especialidad", Veterinario.especialidad),
+]
+NOMBRES_COLUMNAS = [nombre for nombre, _ in COLUMNAS_EXPORTACION]
+
+
+class _ConsultaExportacion:
+    """Construye y recorre por lotes la consulta de exportación"""
+
+    @staticmethod
+    def construir(fecha_desde: date = None, fecha_hasta: date = None, estado: str = None, veterinario_id: int = None):
+        stmt = (
+            select(*[columna.label(nombre) for nombre, columna in COLUMNAS_EXPORTACION])
+            .select_from(Cita)
+            .join(Mascota, Cita.mascota_id == Mascota.id)
+            .join(Cliente, Mascota.cliente_id == Cliente.id)
+            # Las citas de un veterinario borrado se conservan (veterinario_id NULL)
+            .outerjoin(Veterinario, Cita.veterinario_id == Veterinario.id)
+        )
+        if fecha_desde:
+            stmt = stmt.where(Cita.fecha >= fecha_desde)
+        if fecha_hasta:
+            stmt = stmt.where(Cita.fecha <= fecha_hasta)
+        if estado:
+            stmt = stmt.where(Cita.estado == estado)
+        if veterinario_id:
+            stmt = stmt.where(Cita.veterinario_id == veterinario_id)
+        return stmt.order_by(Cita.fecha, Cita.hora, Cita.id)
+
+    @staticmethod
+    def lotes(tamano_lote: int = TAMANO_LOTE, **filtros):
+        """Generador de listas de filas (tuplas en el orden de COLUMNAS_EXPORTACION)"""
+        stmt = _ConsultaExportacion.construir(**filtros)
+        resultado = session.execute(stmt.execution_options(yield_per=tamano_lote))
+        try:
+            for lote in resultado.partitions():
+                yield lote
+        finally:
+            resultado.close()
+
+
+def _serializable(valor):
+    if isinstance(valor, time):
+        return valor.strftime("%H:%M")
+    return valor.isoformat() if isinstance(valor, date) else valor
+
+
+class _EscritorCSV:
+    binario = False
+
+    def __init__(self, fichero):
+        self._csv = csv.writer(fichero)
+        self._csv.writerow(NOMBRES_COLUMNAS)
+
+    def escribir(self, lote):
+        self._csv.writerows([[_serializable(v) for v in fila] for fila in lote])
+
+    def cerrar(self):
+        pass
+
+
+class _EscritorJSONL:
+    binario = False
+
+    def __init__(self, fichero):
+        self._fichero = fichero
+
+    def escribir(self, lote):
+        self._fichero.writelines(
+            json.dumps(dict(zip(NOMBRES_COLUMNAS, map(_serializable, fila))), ensure_ascii=False) + "\n"
+            for fila in lote
+        )
+
+    def cerrar(self):
+        pass
+
+
+class _EscritorParquet:
+    binario = True
+
+    def __init__(self, fichero):
+        if pa is None:
+            raise ValidacionException("formato", "Parquet necesita el paquete pyarrow (pip install pyarrow)")
+        tipos = {date: pa.date32(), time: pa.time32("s"), int: pa.int64(), float: pa.float64()}
+        self._esquema = pa.schema([
+            (nombre, tipos.get(columna.type.python_type, pa.string())) for nombre, columna in COLUMNAS_EXPORTACION
+        ])
+        self._parquet = pq.ParquetWriter(fichero, self._esquema)
+
+    def escribir(self, lote):
+        # Cada lote es un row group del fichero
+        columnas = list(zip(*lote))
+        self._parquet.write_table(pa.table(
+            [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, self._esquema)],
+            schema=self._esquema,
+        ))
+
+    def cerrar(self):
+        self._parquet.close()
+
+
+ESCRITORES = {"csv": _EscritorCSV, "jsonl": _EscritorJSONL, "parquet": _EscritorParquet}
+
+
+def _detectar_formato(destino, formato: str = None) -> str:
+    if formato is None and isinstance(destino, (str, os.PathLike)):
+        formato = os.path.splitext(str(destino))[1].lstrip(".").lower()
+    if formato not in ESCRITORES:
+        raise ValidacionException("formato", f"debe ser {', '.join(ESCRITORES)}", str(formato))
+    return formato
+
+
+# ========================
+# INTERFAZ PÚBLICA
+# ========================
+
+def formatos_disponibles() -> list:
+    """Formatos que se pueden exportar en esta instalación (Parquet solo con pyarrow)"""
+    return [f for f in ESCRITORES if f != "parquet" or pa is not None]
+
+def iterar_citas_exportacion(fecha_desde: date = None, fecha_hasta: date = None, estado: str = None,
+                             veterinario_id: int = None, tamano_lote: int = TAMANO_LOTE):
+    """Generador de dicts (una cita por dict, con mascota, cliente y veterinario)"""
+    for lote in _ConsultaExportacion.lotes(tamano_lote, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+                                           estado=estado, veterinario_id=veterinario_id):
+        for fila in lote:
+            yield dict(zip(NOMBRES_COLUMNAS, fila))
+
+def exportar_citas(destino, formato: str = None, fecha_desde: date = None, fecha_hasta: date = None,
+                   estado: str = None, veterinario_id: int = None, tamano_lote: int = TAMANO_LOTE) -> int:
+    """
+    Escribe el historial de citas en destino, lote a lote
+    Args: destino: ruta del fichero, o fichero binario abierto (p.ej. io.BytesIO)
+          formato (str): "csv", "jsonl" o "parquet" (por defecto, la extensión de destino)
+          fecha_desde / fecha_hasta (date): rango de fechas (incluidas)
+          estado (str), veterinario_id (int): filtros opcionales
+    Return: número de citas exportadas
+    """
+    formato = _detectar_formato(destino, formato)
+    clase = ESCRITORES[formato]
+    es_ruta = isinstance(destino, (str, os.PathLike))
+    fichero = open(destino, "wb") if es_ruta else destino
+    # CSV y JSONL escriben texto sobre el fichero binario
+    salida = fichero if clase.binario else io.TextIOWrapper(fichero, encoding="utf-8", newline="")
+
+    total = 0
+    try:
+        escritor = clase(salida)
+        for lote in _ConsultaExportacion.lotes(tamano_lote, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+                                               estado=estado, veterinario_id=veterinario_id):
+            escritor.escribir(lote)
+            total += len(lote)
+        escritor.cerrar()
+    except Exception as e:
+        Logger.log_excepcion(e, "exportar_citas")
+        raise
+    finally:
+        if not clase.binario:
+            salida.flush()
+            # Soltar el envoltorio de texto sin cerrar un fichero que no es nuestro
+            salida.detach()
+        if es_ruta:
+            fichero.close()
+
+    Logger.info(f"Exportadas {total} citas a {formato}")
+    return total
+
+
+def main(argv=None):
+    """Punto de entrada de consola"""
+    parser = argparse.ArgumentParser(description="Exporta el historial de citas")
+    parser.add_argument("destino", help="fichero .csv, .jsonl o .parquet")
+    parser.add_argument("--formato", choices=list(ESCRITORES), help="si la extensión no lo indica")
+    parser.add_argument("--desde", type=date.fromisoformat, help="fecha inicial YYYY-MM-DD")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="fecha final YYYY-MM-DD")
+    parser.add_argument("--estado", choices=["Pendiente", "Confirmada", "Realizada", "Cancelada"])
+    parser.add_argument("--veterinario", type=int, help="ID del veterinario")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="filas leídas por lote")
+    args = parser.parse_args(argv)
+
+    total = exportar_citas(args.destino, args.formato, args.desde, args.hasta,
+                           args.estado, args.veterinario, args.lote)
+    print(f"✅ {total} citas exportadas a {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
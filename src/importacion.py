@@ -0,0 +1,341 @@
+"""
+título: módulo de importación masiva
+fecha: 16.10.2026
+descripción: carga clientes, mascotas y veterinarios desde ficheros CSV o JSONL.
+
+CÓMO FUNCIONA:
+===============
+
+1. _LectorFilas: lee el fichero fila a fila (sin cargarlo entero en memoria)
+   └─ CSV con cabecera (nombre,dni,telefono,...) o JSONL (un objeto por línea)
+
+2. _ValidadorFilas: valida y normaliza cada fila con Utilidades
+   └─ DNIs repetidos (en la BD o en el propio fichero) se rechazan
+   └─ las mascotas indican su dueño con la columna cliente_dni, que se traduce
+      a cliente_id con un diccionario DNI -> id cargado una sola vez
+
+3. _ImportadorMasivo: inserta las filas válidas en lotes (un INSERT executemany
+   por lote) y hace commit cada TAMANO_TRANSACCION filas, no por fila.
+   └─ las filas rechazadas se escriben en un fichero aparte con su motivo
+   └─ si algo falla a mitad, se deshace la transacción en curso y se lanza
+      ImportacionInterrumpidaException con las filas que ya estaban confirmadas
+   └─ dentro de transaccion() los commits son solo flush: todo va en el commit
+      del bloque (o nada)
+
+4. Interfaz pública: importar(), importar_clientes(), importar_mascotas(),
+   importar_veterinarios(). Devuelven un ResultadoImportacion con las estadísticas.
+
+USO DESDE CONSOLA:
+    python -m src.importacion clientes clientes.csv
+    python -m src.importacion mascotas mascotas.jsonl --rechazos errores.csv --lote 2000
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from collections import namedtuple
+
+from sqlalchemy import insert
+
+from src.database import session, Cliente, Mascota, Veterinario, confirmar, deshacer, en_transaccion
+from src.analisis import invalidar_cache_estadisticas
+from src.exceptions import ValidacionException, ImportacionInterrumpidaException
+from src.logger import Logger
+from src.utils import Utilidades
+
+TAMANO_LOTE = 5_000           # filas por INSERT executemany
+TAMANO_TRANSACCION = 50_000   # filas por commit
+
+# leidas / insertadas / rechazadas: número de filas
+# segundos, filas_por_segundo: rendimiento de la importación
+# ruta_rechazos: fichero con las filas rechazadas (None si no hubo)
+ResultadoImportacion = namedtuple(
+    "ResultadoImportacion",
+    ["entidad", "leidas", "insertadas", "rechazadas", "segundos", "filas_por_segundo", "ruta_rechazos"],
+)
+
+
+class _LectorFilas:
+    """Lee ficheros CSV o JSONL como un flujo de (número de línea, dict)"""
+
+    FORMATOS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+    @staticmethod
+    def detectar_formato(ruta: str, formato: str = None) -> str:
+        formato = formato or _LectorFilas.FORMATOS.get(os.path.splitext(ruta)[1].lower())
+        if formato not in ("csv", "jsonl"):
+            raise ValidacionException("formato", "use un fichero .csv o .jsonl", ruta)
+        return formato
+
+    @staticmethod
+    def leer(ruta: str, formato: str = None):
+        """Generador de (linea, fila) donde fila es un dict (o None si la línea no se pudo leer)"""
+        formato = _LectorFilas.detectar_formato(ruta, formato)
+        # utf-8-sig: acepta ficheros exportados desde Excel (con BOM)
+        with open(ruta, newline="", encoding="utf-8-sig") as fichero:
+            if formato == "csv":
+                lector = csv.DictReader(fichero)
+                for fila in lector:
+                    # line_num = última línea leída del fichero (la cabecera es la 1)
+                    yield lector.line_num, fila
+            else:
+                for linea, texto in enumerate(fichero, start=1):
+                    if not texto.strip():
+                        continue
+                    try:
+                        fila = json.loads(texto)
+                    except json.JSONDecodeError:
+                        fila = None
+                    yield linea, fila if isinstance(fila, dict) else None
+
+
+class _ValidadorFilas:
+    """Valida y normaliza filas con Utilidades. Lanza ValidacionException con el motivo"""
+
+    @staticmethod
+    def _texto(fila: dict, campo: str, obligatorio: bool = False):
+        """Devuelve el campo como texto sin espacios, None si viene vacío"""
+        valor = fila.get(campo)
+        valor = None if valor is None else str(valor).strip()
+        if not valor:
+            if obligatorio:
+                raise ValidacionException(campo, "es obligatorio")
+            return None
+        return valor
+
+    @staticmethod
+    def _persona(fila: dict, dnis_existentes: set) -> dict:
+        """Campos comunes de clientes y veterinarios: nombre, dni, telefono, email"""
+        nombre = _ValidadorFilas._texto(fila, "nombre", obligatorio=True)
+        if not Utilidades.validar_nombre(nombre):
+            raise ValidacionException("nombre", "solo puede contener letras", nombre)
+
+        dni = _ValidadorFilas._texto(fila, "dni", obligatorio=True)
+        if not Utilidades.validar_dni(dni):
+            raise ValidacionException("dni", "formato 12345678A", dni)
+        dni = Utilidades.formatear_dni(dni)
+        if dni in dnis_existentes:
+            raise ValidacionException("dni", "ya existe", dni)
+
+        telefono = _ValidadorFilas._texto(fila, "telefono")
+        if telefono is not None:
+            if not Utilidades.validar_telefono(telefono):
+                raise ValidacionException("telefono", "debe tener 9 dígitos", telefono)
+            telefono = Utilidades.formatear_telefono(telefono)
+
+        email = _ValidadorFilas._texto(fila, "email")
+        if email is not None:
+            if not Utilidades.validar_email(email):
+                raise ValidacionException("email", "formato inválido", email)
+            email = Utilidades.formatear_email(email)
+
+        return dict(nombre=nombre, dni=dni, telefono=telefono, email=email)
+
+    @staticmethod
+    def cliente(fila: dict, contexto: dict) -> dict:
+        valores = _ValidadorFilas._persona(fila, contexto["dnis"])
+        contexto["dnis"].add(valores["dni"])
+        return valores
+
+    @staticmethod
+    def veterinario(fila: dict, contexto: dict) -> dict:
+        valores = _ValidadorFilas._persona(fila, contexto["dnis"])
+        valores.update(
+            cargo=_ValidadorFilas._texto(fila, "cargo"),
+            especialidad=_ValidadorFilas._texto(fila, "especialidad"),
+        )
+        contexto["dnis"].add(valores["dni"])
+        return valores
+
+    @staticmethod
+    def mascota(fila: dict, contexto: dict) -> dict:
+        nombre = _ValidadorFilas._texto(fila, "nombre", obligatorio=True)
+        especie = _ValidadorFilas._texto(fila, "especie", obligatorio=True)
+
+        dni_cliente = _ValidadorFilas._texto(fila, "cliente_dni", obligatorio=True)
+        cliente_id = contexto["clientes"].get(Utilidades.formatear_dni(dni_cliente))
+        if cliente_id is None:
+            raise ValidacionException("cliente_dni", "no hay ningún cliente con ese DNI", dni_cliente)
+
+        edad = _ValidadorFilas._texto(fila, "edad")
+        if edad is not None:
+            try:
+                edad = int(edad)
+            except ValueError:
+                raise ValidacionException("edad", "debe ser un número entero", edad)
+            if not Utilidades.validar_edad(edad):
+                raise ValidacionException("edad", "debe estar entre 0 y 50", str(edad))
+
+        peso = _ValidadorFilas._texto(fila, "peso")
+        if peso is not None:
+            try:
+                peso = float(peso.replace(",", "."))
+            except ValueError:
+                raise ValidacionException("peso", "debe ser un número", peso)
+            if not Utilidades.validar_peso(peso):
+                raise ValidacionException("peso", "debe ser mayor que 0", str(peso))
+
+        return dict(
+            nombre=nombre,
+            especie=especie,
+            raza=_ValidadorFilas._texto(fila, "raza"),
+            edad=edad,
+            peso=peso,
+            sexo=_ValidadorFilas._texto(fila, "sexo"),
+            cliente_id=cliente_id,
+        )
+
+
+class _ImportadorMasivo:
+    """Inserta en lotes las filas válidas y registra las rechazadas"""
+
+    ENTIDADES = {
+        "clientes": (Cliente, _ValidadorFilas.cliente),
+        "mascotas": (Mascota, _ValidadorFilas.mascota),
+        "veterinarios": (Veterinario, _ValidadorFilas.veterinario),
+    }
+
+    @staticmethod
+    def _contexto(entidad: str) -> dict:
+        """Datos de la BD que necesita la validación, cargados en una sola consulta"""
+        if entidad == "clientes":
+            return {"dnis": {dni for (dni,) in session.query(Cliente.dni)}}
+        if entidad == "veterinarios":
+            return {"dnis": {dni for (dni,) in session.query(Veterinario.dni)}}
+        # mascotas: DNI del dueño -> cliente_id
+        return {"clientes": dict(session.query(Cliente.dni, Cliente.id))}
+
+    @staticmethod
+    def importar(entidad: str, ruta: str, ruta_rechazos: str = None, formato: str = None,
+                 tamano_lote: int = TAMANO_LOTE, tamano_transaccion: int = TAMANO_TRANSACCION,
+                 progreso=None) -> ResultadoImportacion:
+        """
+        Importa el fichero ruta en la tabla de entidad
+        Args: entidad (str): "clientes", "mascotas" o "veterinarios"
+              ruta_rechazos (str): CSV de filas rechazadas (por defecto <ruta>.rechazos.csv)
+              tamano_transaccion (int): filas por commit
+              progreso: función opcional llamada con el número de filas insertadas tras cada commit
+        Return: ResultadoImportacion
+        Lanza ImportacionInterrumpidaException si falla a mitad (con las filas ya confirmadas)
+        """
+        if entidad not in _ImportadorMasivo.ENTIDADES:
+            raise ValidacionException("entidad", f"debe ser una de {', '.join(_ImportadorMasivo.ENTIDADES)}", entidad)
+        modelo, validar = _ImportadorMasivo.ENTIDADES[entidad]
+        ruta_rechazos = ruta_rechazos or f"{ruta}.rechazos.csv"
+        _LectorFilas.detectar_formato(ruta, formato)
+
+        inicio = time.perf_counter()
+        leidas = insertadas = rechazadas = pendientes_commit = confirmadas = 0
+        lote = []
+        fichero_rechazos = escritor_rechazos = None
+        try:
+            contexto = _ImportadorMasivo._contexto(entidad)
+            for linea, fila in _LectorFilas.leer(ruta, formato):
+                leidas += 1
+                try:
+                    if fila is None:
+                        raise ValidacionException("linea", "no es un objeto JSON válido")
+                    lote.append(validar(fila, contexto))
+                except ValidacionException as e:
+                    rechazadas += 1
+                    if escritor_rechazos is None:
+                        fichero_rechazos = open(ruta_rechazos, "w", newline="", encoding="utf-8")
+                        escritor_rechazos = csv.writer(fichero_rechazos)
+                        escritor_rechazos.writerow(["linea", "motivo", "fila"])
+                    escritor_rechazos.writerow([linea, e.mensaje, json.dumps(fila, ensure_ascii=False)])
+                    continue
+
+                if len(lote) >= tamano_lote:
+                    # Un único INSERT ... VALUES ejecutado con todas las filas del lote
+                    session.execute(insert(modelo), lote)
+                    insertadas += len(lote)
+                    pendientes_commit += len(lote)
+                    lote = []
+                    if pendientes_commit >= tamano_transaccion:
+                        confirmar()
+                        pendientes_commit = 0
+                        if not en_transaccion():
+                            confirmadas = insertadas
+                        if progreso:
+                            progreso(insertadas)
+
+            if lote:
+                session.execute(insert(modelo), lote)
+                insertadas += len(lote)
+            confirmar()
+        except Exception as e:
+            deshacer()
+            Logger.log_excepcion(e, f"importar {entidad}")
+            if confirmadas:
+                invalidar_cache_estadisticas()
+            raise ImportacionInterrumpidaException(entidad, confirmadas, str(e)) from e
+        finally:
+            if fichero_rechazos is not None:
+                fichero_rechazos.close()
+
+        if insertadas:
+            invalidar_cache_estadisticas()
+
+        segundos = time.perf_counter() - inicio
+        resultado = ResultadoImportacion(
+            entidad, leidas, insertadas, rechazadas, segundos,
+            insertadas / segundos if segundos else 0.0,
+            ruta_rechazos if rechazadas else None,
+        )
+        Logger.info(
+            f"Importación de {entidad} desde {ruta}: {insertadas} insertadas, "
+            f"{rechazadas} rechazadas en {segundos:.1f} s ({resultado.filas_por_segundo:.0f} filas/s)"
+        )
+        return resultado
+
+
+# ========================
+# INTERFAZ PÚBLICA
+# ========================
+
+def importar(entidad: str, ruta: str, ruta_rechazos: str = None, formato: str = None,
+             tamano_lote: int = TAMANO_LOTE, progreso=None,
+             tamano_transaccion: int = TAMANO_TRANSACCION) -> ResultadoImportacion:
+    """Importa clientes, mascotas o veterinarios desde un CSV/JSONL (un commit cada tamano_transaccion filas)"""
+    return _ImportadorMasivo.importar(entidad, ruta, ruta_rechazos, formato, tamano_lote, tamano_transaccion, progreso)
+
+def importar_clientes(ruta: str, ruta_rechazos: str = None, formato: str = None, tamano_lote: int = TAMANO_LOTE):
+    """Columnas: nombre, dni, telefono, email"""
+    return importar("clientes", ruta, ruta_rechazos, formato, tamano_lote)
+
+def importar_mascotas(ruta: str, ruta_rechazos: str = None, formato: str = None, tamano_lote: int = TAMANO_LOTE):
+    """Columnas: nombre, especie, raza, edad, peso, sexo, cliente_dni (DNI del dueño, ya existente)"""
+    return importar("mascotas", ruta, ruta_rechazos, formato, tamano_lote)
+
+def importar_veterinarios(ruta: str, ruta_rechazos: str = None, formato: str = None, tamano_lote: int = TAMANO_LOTE):
+    """Columnas: nombre, dni, cargo, especialidad, telefono, email"""
+    return importar("veterinarios", ruta, ruta_rechazos, formato, tamano_lote)
+
+
+def main(argv=None):
+    """Punto de entrada de consola"""
+    parser = argparse.ArgumentParser(description="Importación masiva de la clínica desde CSV/JSONL")
+    parser.add_argument("entidad", choices=list(_ImportadorMasivo.ENTIDADES))
+    parser.add_argument("ruta", help="fichero .csv o .jsonl")
+    parser.add_argument("--rechazos", help="CSV donde guardar las filas rechazadas")
+    parser.add_argument("--formato", choices=["csv", "jsonl"], help="si la extensión no lo indica")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="filas por INSERT")
+    parser.add_argument("--transaccion", type=int, default=TAMANO_TRANSACCION, help="filas por commit")
+    args = parser.parse_args(argv)
+
+    try:
+        r = importar(args.entidad, args.ruta, args.rechazos, args.formato, args.lote,
+                     progreso=lambda n: print(f"  ... {n} filas insertadas"), tamano_transaccion=args.transaccion)
+    except ImportacionInterrumpidaException as e:
+        print(f"❌ {e.mensaje}")
+        raise SystemExit(1)
+    print(f"✅ {r.insertadas} {r.entidad} importados de {r.leidas} filas leídas "
+          f"en {r.segundos:.1f} s ({r.filas_por_segundo:.0f} filas/s)")
+    if r.rechazadas:
+        print(f"⚠ {r.rechazadas} filas rechazadas: ver {r.ruta_rechazos}")
+
+
+if __name__ == "__main__":
+    main()
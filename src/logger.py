@@ -2,13 +2,50 @@
 título: módulo de logger (registro de eventos)
 fecha: 11.11.2025
 descripción: clase estática para logging centralizado de la aplicación.
-Registra eventos en consola y en archivo logs/clinica.log.
+Registra eventos en consola y en archivo logs/app.log.
 Todos los métodos son estáticos.
+
+MODO ASÍNCRONO (16.10.2026):
+- Por defecto Logger.info(...) solo mete el registro en una cola en memoria
+  (QueueHandler); un hilo en segundo plano (QueueListener) lo escribe en el
+  archivo y en la consola. La petición no espera al disco ni compite por el
+  lock del handler de archivo.
+- El archivo rota por tamaño (RotatingFileHandler) o por tiempo
+  (TimedRotatingFileHandler) y guarda COPIAS_LOG archivos antiguos.
+- Los mensajes DEBUG se pueden muestrear: con muestreo_debug=10 se guarda
+  uno de cada 10 (el resto se descarta antes de entrar en la cola).
+- Al salir del proceso (atexit) se vacía la cola: no se pierden mensajes.
+- Variables de entorno: CLINICA_LOG_ASINCRONO (1/0), CLINICA_LOG_ROTACION
+  (tamano/tiempo), CLINICA_LOG_MAX_BYTES, CLINICA_LOG_COPIAS,
+  CLINICA_LOG_MUESTREO_DEBUG.
 """
 
+import atexit
+import itertools
 import logging
 import os
+import queue
+import threading
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+MAX_BYTES_LOG = 5 * 2 ** 20   # rotación por tamaño: 5 MB por archivo
+COPIAS_LOG = 5                # archivos rotados que se conservan
+ROTACION_TIEMPO = "midnight"  # rotación por tiempo: un archivo por día
+
+
+class _MuestreoDebug(logging.Filter):
+    """Deja pasar todos los mensajes salvo DEBUG, de los que deja uno de cada n"""
+
+    def __init__(self, n: int):
+        super().__init__()
+        self.n = max(1, int(n))
+        self._contador = itertools.count()   # next() es atómico en CPython
+
+    def filter(self, record) -> bool:
+        if record.levelno != logging.DEBUG or self.n == 1:
+            return True
+        return next(self._contador) % self.n == 0
 
 
 class Logger:
@@ -18,42 +55,59 @@ class Logger:
 
     Arquitectura:
     - Singleton pattern: un logger global para toda la app
-    - DEBUG en archivo (máxima información)
+    - DEBUG en archivo (máxima información), rotado por tamaño o por tiempo
     - WARNING en consola (solo problemas)
     - Archivo: logs/app.log
+    - Modo asíncrono: cola + hilo escritor (ver docstring del módulo)
     """
 
     _logger = None
     _logfile = "logs/app.log"
+    _listener = None
+    _lock = threading.RLock()   # creación del logger y arranque/parada del hilo escritor
+    _opciones = dict(
+        asincrono=os.environ.get("CLINICA_LOG_ASINCRONO", "1") != "0",
+        rotacion=os.environ.get("CLINICA_LOG_ROTACION", "tamano"),
+        max_bytes=int(os.environ.get("CLINICA_LOG_MAX_BYTES", MAX_BYTES_LOG)),
+        copias=int(os.environ.get("CLINICA_LOG_COPIAS", COPIAS_LOG)),
+        muestreo_debug=int(os.environ.get("CLINICA_LOG_MUESTREO_DEBUG", 1)),
+    )
 
     @classmethod
     def _get_logger(cls):
         """Obtiene o crea la instancia global del logger."""
-        if cls._logger is None:
+        if cls._logger is not None:
+            return cls._logger
+
+        with cls._lock:
+            if cls._logger is not None:
+                return cls._logger
 
             # Crear carpeta logs si no existe
-            os.makedirs('logs', exist_ok=True)
+            os.makedirs(os.path.dirname(cls._logfile) or ".", exist_ok=True)
 
             # Crear logger global
-            cls._logger = logging.getLogger("clinica_veterinaria")
-            cls._logger.setLevel(logging.DEBUG)
+            logger = logging.getLogger("clinica_veterinaria")
+            logger.setLevel(logging.DEBUG)
 
-            # Evitar añadir handlers duplicados
-            if cls._logger.hasHandlers():
-                cls._logger.handlers.clear()
+            # Evitar añadir handlers (y filtros) duplicados
+            if logger.hasHandlers():
+                logger.handlers.clear()
+            logger.filters.clear()
 
             # Formato de salida
             formatter = logging.Formatter(
                 "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
                 datefmt="%Y-%m-%d %H:%M:%S",
             )
+            handlers = []
 
             # Handler archivo (DEBUG – máximo detalle)
             try:
-                file_handler = logging.FileHandler(cls._logfile, encoding="utf-8")
+                file_handler = cls._crear_file_handler()
                 file_handler.setLevel(logging.DEBUG)
                 file_handler.setFormatter(formatter)
-                cls._logger.addHandler(file_handler)
+                handlers.append(file_handler)
             except Exception as e:
                 print(f"[Logger] Error configurando file handler: {e}")
 
@@ -61,22 +115,93 @@ class Logger:
             console_handler = logging.StreamHandler()
             console_handler.setLevel(logging.WARNING)
             console_handler.setFormatter(formatter)
-            cls._logger.addHandler(console_handler)
+            handlers.append(console_handler)
+
+            # Muestreo de DEBUG antes de formatear y encolar: lo descartado no cuesta nada más
+            if cls._opciones["muestreo_debug"] > 1:
+                logger.addFilter(_MuestreoDebug(cls._opciones["muestreo_debug"]))
+
+            if cls._opciones["asincrono"]:
+                cola = queue.SimpleQueue()
+                logger.addHandler(QueueHandler(cola))
+                cls._listener = QueueListener(cola, *handlers, respect_handler_level=True)
+                cls._listener.start()
+            else:
+                for handler in handlers:
+                    logger.addHandler(handler)
+
+            cls._logger = logger
 
         return cls._logger
 
+    @classmethod
+    def _crear_file_handler(cls):
+        """Handler de archivo con rotación por tamaño o por tiempo según las opciones"""
+        if cls._opciones["rotacion"] == "tiempo":
+            return TimedRotatingFileHandler(
+                cls._logfile, when=ROTACION_TIEMPO, backupCount=cls._opciones["copias"], encoding="utf-8"
+            )
+        return RotatingFileHandler(
+            cls._logfile, maxBytes=cls._opciones["max_bytes"], backupCount=cls._opciones["copias"], encoding="utf-8"
+        )
+
     # ================================
     # CONFIGURACIÓN
     # ================================
 
     @staticmethod
-    def configurar_logger() -> None:
+    def configurar_logger(archivo: str = None, asincrono: bool = None, rotacion: str = None,
+                          max_bytes: int = None, copias: int = None, muestreo_debug: int = None) -> None:
         """
         Configura el logger explícitamente.
         (Recomendación: llamar desde main.py)
+
+        Sin argumentos solo se asegura de que el logger existe (app.py lo llama
+        en cada ejecución de Streamlit). Con argumentos, vacía la cola actual y
+        vuelve a crear los handlers con esas opciones:
+            archivo: ruta del log
+            asincrono: True = cola + hilo escritor; False = escritura directa
+            rotacion: "tamano" (max_bytes por archivo) o "tiempo" (un archivo al día)
+            copias: archivos rotados que se conservan
+            muestreo_debug: guardar 1 de cada n mensajes DEBUG (1 = todos)
         """
-        logger = Logger._get_logger()
-        logger.info("Logger configurado correctamente")
+        opciones = dict(asincrono=asincrono, rotacion=rotacion, max_bytes=max_bytes,
+                        copias=copias, muestreo_debug=muestreo_debug)
+        opciones = {k: v for k, v in opciones.items() if v is not None}
+        if Logger._logger is not None and (opciones or archivo):
+            Logger.detener()
+        if archivo:
+            Logger._logfile = archivo
+        Logger._opciones = {**Logger._opciones, **opciones}
+
+        if Logger._logger is None:
+            Logger._get_logger().info("Logger configurado correctamente")
+
+    @staticmethod
+    def vaciar() -> None:
+        """Espera a que el hilo escritor guarde todo lo encolado hasta ahora"""
+        with Logger._lock:
+            listener = Logger._listener
+            if listener is not None:
+                listener.stop()     # procesa la cola hasta el final
+                listener.start()
+            for handler in (listener.handlers if listener else Logger._get_logger().handlers):
+                handler.flush()
+
+    @staticmethod
+    def detener() -> None:
+        """Vacía la cola, para el hilo escritor y cierra los archivos (se llama al salir)"""
+        with Logger._lock:
+            if Logger._logger is None:
+                return
+            listener, Logger._listener = Logger._listener, None
+            if listener is not None:
+                listener.stop()
+            for handler in (listener.handlers if listener else ()) + tuple(Logger._logger.handlers):
+                handler.close()
+            Logger._logger.handlers.clear()
+            Logger._logger.filters.clear()
+            Logger._logger = None
 
     # ================================
     # MÉTODOS DE LOGGING
@@ -129,6 +254,7 @@ class Logger:
     def limpiar_logs() -> None:
         """Borra el contenido del archivo de logs."""
         try:
+            Logger.vaciar()
             if os.path.exists(Logger._logfile):
                 with open(Logger._logfile, "w"):
                     pass
@@ -140,6 +266,7 @@ class Logger:
     def obtener_tamaño_logs() -> int:
         """Devuelve el tamaño de logs en bytes."""
         try:
+            Logger.vaciar()
             if os.path.exists(Logger._logfile):
                 return os.path.getsize(Logger._logfile)
             return 0
@@ -152,4 +279,8 @@ class Logger:
 # Se debe llamar desde main.py:
 #
 #   from src.logger import Logger
-#   Logger.configurar_logger()
\ No newline at end of file
+#   Logger.configurar_logger()
+
+
+# Al terminar el proceso: escribir lo que quede en la cola antes de salir
+atexit.register(Logger.detener)
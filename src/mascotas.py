@@ -8,6 +8,8 @@ CÓMO FUNCIONA:
 
 1. _RepositorioMascota: Acceso a BD (CRUD)
    └─ crear(), obtener_por_id(), listar_todos(), etc.
+   └─ los listados aceptan resumen=True: solo las columnas de ResumenMascota,
+      sin objetos ORM (más rápido y ligero para listas largas)
    └─ NUNCA tiene lógica de negocio
 
 2. _ServicioMascota: Lógica de negocio
@@ -15,15 +17,29 @@ CÓMO FUNCIONA:
    └─ Usa Utilidades para validaciones
    └─ Usa _RepositorioMascota para BD
 
-3. Interfaz pública: 9 funciones
+3. Interfaz pública: 11 funciones
+   └─ dto=True: devuelven MascotaDTO (src.dto, con su propietario) en vez de objetos ORM
    └─ Lo único que importa Streamlit
    └─ Wrappers simples que deleguen a ServicioMascota o RepositorioMascota
 """
 
-from src.database import session, Mascota
+from src.database import session, Mascota, Cliente, confirmar, deshacer
 from src.exceptions import MascotaNoEncontradaException, ClienteNoEncontradoException, ValidacionException
 from src.logger import Logger
+from src.paginacion import Paginador, TAMANO_PAGINA_DEFECTO
+from src.analisis import invalidar_cache_estadisticas
+from src.disponibilidad import invalidar_disponibilidad
+from src.cache import _cache_mascotas, _CacheVersionada
+from src.dto import a_dto
 from sqlalchemy.exc import IntegrityError
+from collections import namedtuple
+
+# Fila de los listados en modo resumen (una query de columnas, sin objetos ORM)
+ResumenMascota = namedtuple("ResumenMascota", ["id", "nombre", "especie", "raza", "cliente_id"])
+_COLUMNAS_RESUMEN = [getattr(Mascota, campo) for campo in ResumenMascota._fields]
+
+# Opciones de los selectbox: se recalculan cuando cambian mascotas o clientes
+_cache_opciones = _CacheVersionada("mascotas", "clientes")
 
 # ========================
 # REPOSITORIO (PRIVADO)
@@ -47,7 +63,8 @@ class _RepositorioMascota:
             sexo=sexo
         )
         session.add(mascota)
-        session.commit()
+        confirmar()
+        invalidar_cache_estadisticas()
         Logger.info(f"Mascota creada con ID: {mascota.id}")
         return mascota
     
@@ -60,14 +77,48 @@ class _RepositorioMascota:
         return mascota
     
     @staticmethod
-    def listar_todos():
+    def obtener_dto(mascota_id: int):
+        """CRUD: READ por ID desde la caché de entidades (MascotaDTO)"""
+        return _cache_mascotas.obtener(mascota_id, lambda: _RepositorioMascota.obtener_por_id(mascota_id))
+    
+    @staticmethod
+    def _consulta(resumen: bool = False):
+        """Query de entidades Mascota, o solo de las columnas de ResumenMascota"""
+        return session.query(*_COLUMNAS_RESUMEN) if resumen else session.query(Mascota)
+    
+    @staticmethod
+    def listar_todos(resumen: bool = False):
         """CRUD: READ todos"""
-        return session.query(Mascota).order_by(Mascota.nombre).all()
+        filas = _RepositorioMascota._consulta(resumen).order_by(Mascota.nombre).all()
+        return [ResumenMascota._make(f) for f in filas] if resumen else filas
     
     @staticmethod
-    def obtener_por_cliente(cliente_id: int):
+    def listar_pagina(tamano: int, cursor: str = None, hacia_atras: bool = False, especie: str = None, resumen: bool = False):
+        """CRUD: READ una página ordenada por (nombre, id) - paginación keyset"""
+        q = _RepositorioMascota._consulta(resumen)
+        if especie:
+            q = q.filter(Mascota.especie == especie)
+        return Paginador.paginar(q, [Mascota.nombre, Mascota.id], tamano, cursor, hacia_atras,
+                                 tipo=ResumenMascota if resumen else None)
+    
+    @staticmethod
+    def listar_opciones():
+        """CRUD: READ (id, etiqueta) de todas las mascotas, con su propietario en la misma consulta"""
+        filas = session.query(Mascota.id, Mascota.nombre, Cliente.nombre, Cliente.dni).join(
+            Cliente, Mascota.cliente_id == Cliente.id
+        ).order_by(Mascota.nombre, Mascota.id).all()
+        return tuple(
+            (mascota_id, f"{nombre} (Propietario: {propietario} ({dni}))")
+            for mascota_id, nombre, propietario, dni in filas
+        )
+    
+    @staticmethod
+    def obtener_por_cliente(cliente_id: int, resumen: bool = False):
         """CRUD: READ por cliente_id"""
-        return session.query(Mascota).filter_by(cliente_id=cliente_id).order_by(Mascota.nombre).all()
+        filas = _RepositorioMascota._consulta(resumen).filter(
+            Mascota.cliente_id == cliente_id
+        ).order_by(Mascota.nombre).all()
+        return [ResumenMascota._make(f) for f in filas] if resumen else filas
     
     @staticmethod
     def obtener_por_especie(especie: str):
@@ -80,17 +131,21 @@ class _RepositorioMascota:
         for campo, valor in campos.items():
             if valor is not None:
                 setattr(mascota, campo, valor)
-        session.commit()
+        confirmar()
         session.refresh(mascota)
+        _cache_mascotas.invalidar(mascota.id)
         Logger.info(f"Mascota {mascota.id} actualizada")
         return mascota
     
     @staticmethod
     def eliminar(mascota: Mascota) -> bool:
         """CRUD: DELETE"""
-        nombre = mascota.nombre
+        nombre, mascota_id = mascota.nombre, mascota.id
         session.delete(mascota)
-        session.commit()
+        confirmar()
+        _cache_mascotas.invalidar(mascota_id)
+        invalidar_cache_estadisticas()
+        invalidar_disponibilidad()  # sus citas se borran en cascada
         Logger.info(f"Mascota {nombre} eliminada")
         return True
     
@@ -149,7 +204,7 @@ class _ServicioMascota:
             # PASO 2: VERIFICAR QUE CLIENTE EXISTE
             # Importar aquí para evitar circular imports
             from src.clientes import obtener_cliente_por_id
-            cliente = obtener_cliente_por_id(cliente_id)
+            cliente = obtener_cliente_por_id(cliente_id, dto=True)
             if not cliente:
                 raise ClienteNoEncontradoException(cliente_id)
             
@@ -157,14 +212,14 @@ class _ServicioMascota:
             return _RepositorioMascota.crear(nombre, especie, cliente_id, raza, edad, peso, sexo)
         
         except (ValidacionException, ClienteNoEncontradoException):
-            session.rollback()
+            deshacer()
             raise
         except IntegrityError:
-            session.rollback()
+            deshacer()
             Logger.error("Error de integridad al registrar mascota")
             raise
         except Exception as e:
-            session.rollback()
+            deshacer()
             Logger.log_excepcion(e, "registrar_mascota")
             raise
     
@@ -192,16 +247,16 @@ class _ServicioMascota:
             )
         
         except (MascotaNoEncontradaException, ValidacionException):
-            session.rollback()
+            deshacer()
             raise
         except Exception as e:
-            session.rollback()
+            deshacer()
             Logger.log_excepcion(e, "modificar_mascota")
             raise
 
 
 # ========================
-# INTERFAZ PÚBLICA (9 funciones)
+# INTERFAZ PÚBLICA (11 funciones)
 # ========================
 # Lo ÚNICO que usa Streamlit
 # Todo está aquí, NADA en las clases privadas
@@ -210,25 +265,39 @@ def registrar_mascota(nombre: str, especie: str, cliente_id: int, raza: str = No
     """Registra una nueva mascota"""
     return _ServicioMascota.registrar_mascota(nombre, especie, cliente_id, raza, edad, peso, sexo)
 
-def listar_mascotas():
-    """Devuelve todas las mascotas"""
-    return _RepositorioMascota.listar_todos()
+def listar_mascotas(resumen: bool = False):
+    """Devuelve todas las mascotas (resumen=True: ResumenMascota en vez de objetos ORM)"""
+    return _RepositorioMascota.listar_todos(resumen)
+
+def listar_mascotas_paginado(tamano_pagina: int = TAMANO_PAGINA_DEFECTO, cursor: str = None, hacia_atras: bool = False, especie: str = None, resumen: bool = False):
+    """Devuelve una Pagina de mascotas (por nombre), opcionalmente de una especie"""
+    return _RepositorioMascota.listar_pagina(tamano_pagina, cursor, hacia_atras, especie, resumen)
+
+def listar_opciones_mascotas():
+    """
+    Opciones para un selectbox de mascotas, sin cargar objetos ORM
+    Return: tupla de (id, "Nombre (Propietario: cliente (DNI))") ordenada por nombre;
+            cacheada hasta que cambien mascotas o clientes
+    """
+    return _cache_opciones.obtener("todas", _RepositorioMascota.listar_opciones)
 
-def obtener_mascota_por_id(mascota_id: int):
-    """Obtiene una mascota por ID"""
-    return _RepositorioMascota.obtener_por_id(mascota_id)
+def obtener_mascota_por_id(mascota_id: int, dto: bool = False):
+    """Obtiene una mascota por ID (dto=True: MascotaDTO de la caché de entidades)"""
+    return _RepositorioMascota.obtener_dto(mascota_id) if dto else _RepositorioMascota.obtener_por_id(mascota_id)
 
-def obtener_mascotas_por_cliente(cliente_id: int):
-    """Devuelve todas las mascotas de un cliente"""
-    return _RepositorioMascota.obtener_por_cliente(cliente_id)
+def obtener_mascotas_por_cliente(cliente_id: int, resumen: bool = False, dto: bool = False):
+    """Devuelve todas las mascotas de un cliente (resumen=True: ResumenMascota; dto=True: MascotaDTO)"""
+    mascotas = _RepositorioMascota.obtener_por_cliente(cliente_id, resumen and not dto)
+    return a_dto(mascotas) if dto else mascotas
 
 def obtener_mascotas_por_especie(especie: str):
     """Devuelve todas las mascotas de una especie"""
     return _RepositorioMascota.obtener_por_especie(especie)
 
-def modificar_mascota(mascota_id: int, nombre: str = None, raza: str = None, edad: int = None, peso: float = None, sexo: str = None):
-    """Modifica una mascota existente"""
-    return _ServicioMascota.modificar_mascota(mascota_id, nombre, raza, edad, peso, sexo)
+def modificar_mascota(mascota_id: int, nombre: str = None, raza: str = None, edad: int = None, peso: float = None, sexo: str = None, dto: bool = False):
+    """Modifica una mascota existente (dto=True: devuelve MascotaDTO)"""
+    mascota = _ServicioMascota.modificar_mascota(mascota_id, nombre, raza, edad, peso, sexo)
+    return a_dto(mascota) if dto else mascota
 
 def eliminar_mascota(mascota_id: int):
     """Elimina una mascota"""
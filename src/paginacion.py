@@ -0,0 +1,114 @@
+"""
+título: módulo de paginación
+fecha: 16.10.2026
+descripción: paginación por clave (keyset) para los listados de los repositorios.
+
+CÓMO FUNCIONA:
+===============
+
+En vez de OFFSET (que obliga a la BD a recorrer todas las filas anteriores),
+cada página se pide a partir de la clave de ordenación de la última fila vista:
+
+    WHERE (nombre, id) > ('Pérez', 42) ORDER BY nombre, id LIMIT 26
+
+- La clave siempre termina en el ID para que sea única.
+- El cursor es un token opaco (base64 de la clave) que Streamlit guarda en session_state.
+- Se pide una fila de más para saber si hay página siguiente (o anterior).
+- Con una query de columnas (modo resumen de los repositorios), tipo convierte
+  cada fila en su namedtuple.
+"""
+
+import base64
+import json
+from collections import namedtuple
+from datetime import date, datetime, time
+
+from sqlalchemy import tuple_
+
+from src.exceptions import ValidacionException
+
+# elementos: lista de la página
+# cursor_siguiente / cursor_anterior: token para pedir la página vecina (None si no hay)
+Pagina = namedtuple("Pagina", ["elementos", "cursor_siguiente", "cursor_anterior"])
+
+TAMANO_PAGINA_DEFECTO = 25
+TAMANO_PAGINA_MAXIMO = 500
+
+
+class Paginador:
+    """Clase estática que aplica paginación keyset a una query de SQLAlchemy"""
+
+    @staticmethod
+    def codificar_cursor(valores) -> str:
+        """Convierte la clave de una fila en un token opaco"""
+        serializables = [v.isoformat() if isinstance(v, (date, time)) else v for v in valores]
+        crudo = json.dumps(serializables, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(crudo).decode("ascii")
+
+    @staticmethod
+    def decodificar_cursor(cursor: str, columnas) -> list:
+        """Recupera la clave de un token, con los tipos Python de cada columna"""
+        try:
+            valores = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            if not isinstance(valores, list) or len(valores) != len(columnas):
+                raise ValueError("longitud incorrecta")
+            return [Paginador._a_tipo(col, v) for col, v in zip(columnas, valores)]
+        except (ValueError, TypeError) as e:
+            raise ValidacionException("cursor", "token de paginación no válido", str(cursor)) from e
+
+    @staticmethod
+    def _a_tipo(columna, valor):
+        """Reconstruye fechas/horas serializadas como ISO"""
+        if valor is None:
+            return None
+        tipo = columna.type.python_type
+        if tipo in (date, time, datetime):
+            return tipo.fromisoformat(valor)
+        return valor
+
+    @staticmethod
+    def paginar(query, columnas, tamano: int = TAMANO_PAGINA_DEFECTO, cursor: str = None,
+                hacia_atras: bool = False, descendente: bool = False, tipo=None) -> Pagina:
+        """
+        Devuelve una Pagina de la query ordenada por columnas (la última debe ser el ID)
+        Args: query: query ORM sin ORDER BY ni LIMIT
+              columnas: columnas de la clave de ordenación, p.ej. [Cliente.nombre, Cliente.id]
+              tamano (int): filas por página
+              cursor (str): token recibido en una página anterior (None = primera página)
+              hacia_atras (bool): True si cursor es un cursor_anterior
+              descendente (bool): orden descendente de la clave
+              tipo: namedtuple para las filas de una query de columnas (None = filas tal cual)
+        Return: Pagina(elementos, cursor_siguiente, cursor_anterior)
+        """
+        if not 1 <= tamano <= TAMANO_PAGINA_MAXIMO:
+            raise ValidacionException("tamano", f"debe estar entre 1 y {TAMANO_PAGINA_MAXIMO}", str(tamano))
+
+        # Ir hacia atrás = recorrer la clave en sentido contrario y dar la vuelta al resultado
+        invertir = descendente != hacia_atras
+        if cursor:
+            clave = tuple_(*columnas)
+            # Como tupla Python: cada valor se envía con el tipo de su columna
+            valores = tuple(Paginador.decodificar_cursor(cursor, columnas))
+            query = query.filter(clave < valores if invertir else clave > valores)
+
+        orden = [c.desc() if invertir else c.asc() for c in columnas]
+        filas = query.order_by(*orden).limit(tamano + 1).all()
+
+        hay_mas = len(filas) > tamano
+        filas = filas[:tamano]
+        if tipo is not None:
+            filas = [tipo._make(f) for f in filas]
+        if hacia_atras:
+            filas.reverse()
+        if not filas:
+            return Pagina([], None, None)
+
+        primera = Paginador.codificar_cursor(Paginador._clave(filas[0], columnas))
+        ultima = Paginador.codificar_cursor(Paginador._clave(filas[-1], columnas))
+        if hacia_atras:
+            return Pagina(filas, ultima, primera if hay_mas else None)
+        return Pagina(filas, ultima if hay_mas else None, primera if cursor else None)
+
+    @staticmethod
+    def _clave(fila, columnas) -> list:
+        return [getattr(fila, c.key) for c in columnas]
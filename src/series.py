@@ -0,0 +1,358 @@
+"""
+título: módulo de series de citas
+fecha: 16.10.2026
+descripción: citas periódicas (revisiones semanales, mensuales...) de una mascota
+con un veterinario. Cada serie es una regla: sus citas no se guardan una a una.
+
+CÓMO FUNCIONA:
+===============
+
+1. SerieCita (tabla series_citas) guarda la regla al estilo RRULE:
+   fecha_inicio + hora, frecuencia (DIARIA, SEMANAL o MENSUAL), intervalo y,
+   opcionalmente, un final: repeticiones (COUNT) y/o fecha_fin (UNTIL)
+
+2. _ReglaSerie: calcula las fechas de una serie dentro de una ventana
+   └─ salta directamente a la primera ocurrencia de la ventana (no recorre
+      la serie desde su inicio), así una serie sin final cuesta lo mismo
+   └─ MENSUAL el día 29-31: en los meses más cortos cae el último día del mes
+
+3. _ExpansorSeries: devuelve las ocurrencias (namedtuple Ocurrencia) de todas
+   las series en una ventana de fechas, con dos consultas: las series del rango
+   y las ocurrencias que ya tienen su Cita
+   └─ una ocurrencia se "materializa" (pasa a ser una Cita con serie_id y
+      fecha_serie) solo al modificarla o marcarla Realizada; eso lo hace
+      src.citas (modificar_ocurrencia, marcar_ocurrencia_realizada...)
+   └─ las materializadas ya no se devuelven como ocurrencia, aunque la cita
+      se haya movido a otro día
+
+4. Una serie nueva no puede coincidir con citas ni con ocurrencias de otras
+   series de su veterinario: se comprueban sus ocurrencias de los primeros
+   HORIZONTE_VALIDACION_DIAS días (una serie sin final no se puede recorrer entera)
+   └─ crear, finalizar o eliminar una serie invalida la caché de disponibilidad
+
+5. Interfaz pública: crear_serie(), obtener_serie_por_id(), listar_series(),
+   finalizar_serie(), eliminar_serie(), fechas_serie(), expandir_series()
+"""
+
+import calendar
+from collections import namedtuple
+from datetime import date, time, timedelta
+
+from sqlalchemy import Integer, or_, type_coerce
+from sqlalchemy.orm import joinedload
+
+from src.database import session, Cita, Mascota, SerieCita, Veterinario, confirmar
+from src.disponibilidad import invalidar_disponibilidad, DURACION_HUECO
+from src.exceptions import (
+    MascotaNoEncontradaException, SerieNoEncontradaException,
+    ValidacionException, VeterinarioNoEncontradoException,
+)
+from src.logger import Logger
+from src.utils import Utilidades
+
+FRECUENCIAS = ("DIARIA", "SEMANAL", "MENSUAL")
+
+# Días que se expanden cuando la consulta no tiene fecha final (p.ej. próximas citas)
+HORIZONTE_SERIES_DIAS = 90
+
+# Días desde el inicio de una serie nueva en los que se buscan choques con otras citas
+HORIZONTE_VALIDACION_DIAS = 365
+
+# Una cita de una serie que todavía no existe como fila de citas.
+# Tiene los mismos atributos que Cita (id es None) más serie_id y fecha_serie
+Ocurrencia = namedtuple("Ocurrencia", [
+    "id", "serie_id", "fecha_serie", "fecha", "hora", "motivo", "diagnostico", "estado",
+    "mascota_id", "veterinario_id", "mascota", "veterinario",
+])
+
+
+# ========================
+# REGLA DE RECURRENCIA
+# ========================
+
+class _ReglaSerie:
+    """Fechas de una serie (cualquier objeto con los campos de SerieCita)"""
+
+    @staticmethod
+    def _dias_paso(serie) -> int:
+        return serie.intervalo * (7 if serie.frecuencia == "SEMANAL" else 1)
+
+    @staticmethod
+    def ocurrencia(serie, n: int) -> date:
+        """Fecha de la ocurrencia n (la primera es la 0)"""
+        inicio = serie.fecha_inicio
+        if serie.frecuencia == "MENSUAL":
+            meses = inicio.month - 1 + n * serie.intervalo
+            anio, mes = inicio.year + meses // 12, meses % 12 + 1
+            return date(anio, mes, min(inicio.day, calendar.monthrange(anio, mes)[1]))
+        return inicio + timedelta(days=n * _ReglaSerie._dias_paso(serie))
+
+    @staticmethod
+    def primer_indice(serie, desde: date) -> int:
+        """Índice de la primera ocurrencia que puede caer en desde o después"""
+        inicio = serie.fecha_inicio
+        if desde <= inicio:
+            return 0
+        if serie.frecuencia == "MENSUAL":
+            meses = (desde.year - inicio.year) * 12 + desde.month - inicio.month
+            return meses // serie.intervalo
+        return -(-(desde - inicio).days // _ReglaSerie._dias_paso(serie))
+
+    @staticmethod
+    def fechas(serie, desde: date, hasta: date) -> list:
+        """Fechas de la serie entre desde y hasta (incluidas), en orden"""
+        resultado = []
+        n = _ReglaSerie.primer_indice(serie, desde)
+        while serie.repeticiones is None or n < serie.repeticiones:
+            fecha = _ReglaSerie.ocurrencia(serie, n)
+            if fecha > hasta or (serie.fecha_fin and fecha > serie.fecha_fin):
+                break
+            if fecha >= desde:
+                resultado.append(fecha)
+            n += 1
+        return resultado
+
+
+# ========================
+# REPOSITORIO (PRIVADO)
+# ========================
+
+class _RepositorioSerie:
+    """Encapsula acceso a BD - CRUD básico sin lógica"""
+
+    @staticmethod
+    def crear(**campos) -> SerieCita:
+        """CRUD: CREATE"""
+        serie = SerieCita(**campos)
+        session.add(serie)
+        confirmar()
+        invalidar_disponibilidad(serie.veterinario_id)
+        Logger.info(f"Serie de citas creada con ID: {serie.id}")
+        return serie
+
+    @staticmethod
+    def obtener_por_id(serie_id: int) -> SerieCita:
+        """CRUD: READ por ID"""
+        serie = session.query(SerieCita).filter_by(id=serie_id).first()
+        if not serie:
+            raise SerieNoEncontradaException(serie_id)
+        return serie
+
+    @staticmethod
+    def listar(mascota_id: int = None, veterinario_id: int = None) -> list:
+        """CRUD: READ todas (opcionalmente de una mascota o un veterinario)"""
+        q = session.query(SerieCita)
+        if mascota_id:
+            q = q.filter(SerieCita.mascota_id == mascota_id)
+        if veterinario_id:
+            q = q.filter(SerieCita.veterinario_id == veterinario_id)
+        return q.order_by(SerieCita.fecha_inicio, SerieCita.id).all()
+
+    @staticmethod
+    def en_rango(desde: date, hasta: date, veterinario_id: int = None) -> list:
+        """
+        CRUD: READ series que pueden tener ocurrencias entre desde y hasta,
+        con mascota, cliente y veterinario ya cargados
+        """
+        q = session.query(SerieCita).options(
+            joinedload(SerieCita.mascota).joinedload(Mascota.cliente),
+            joinedload(SerieCita.veterinario),
+        ).filter(
+            SerieCita.fecha_inicio <= hasta,
+            or_(SerieCita.fecha_fin.is_(None), SerieCita.fecha_fin >= desde),
+        )
+        if veterinario_id:
+            q = q.filter(SerieCita.veterinario_id == veterinario_id)
+        return q.all()
+
+    @staticmethod
+    def materializadas(serie_ids: list, desde: date, hasta: date) -> set:
+        """CRUD: READ (serie_id, fecha_serie) de las ocurrencias que ya son citas"""
+        if not serie_ids:
+            return set()
+        filas = session.query(Cita.serie_id, Cita.fecha_serie).filter(
+            Cita.serie_id.in_(serie_ids),
+            Cita.fecha_serie >= desde,
+            Cita.fecha_serie <= hasta,
+        ).all()
+        return {(s, f) for s, f in filas}
+
+    @staticmethod
+    def horas_ocupadas(veterinario_id: int, desde: date, hasta: date) -> list:
+        """CRUD: READ (fecha, minuto) de las citas no canceladas del veterinario entre desde y hasta"""
+        minutos = type_coerce(Cita.hora, Integer)
+        return session.query(Cita.fecha, minutos).filter(
+            Cita.veterinario_id == veterinario_id,
+            Cita.fecha >= desde,
+            Cita.fecha <= hasta,
+            Cita.estado != "Cancelada",
+        ).all()
+
+    @staticmethod
+    def actualizar(serie: SerieCita, **campos) -> SerieCita:
+        """CRUD: UPDATE"""
+        for campo, valor in campos.items():
+            setattr(serie, campo, valor)
+        confirmar()
+        invalidar_disponibilidad(serie.veterinario_id)
+        Logger.info(f"Serie de citas {serie.id} actualizada")
+        return serie
+
+    @staticmethod
+    def eliminar(serie: SerieCita) -> bool:
+        """CRUD: DELETE (las citas ya materializadas se conservan, con serie_id NULL)"""
+        serie_id, veterinario_id = serie.id, serie.veterinario_id
+        session.delete(serie)
+        confirmar()
+        invalidar_disponibilidad(veterinario_id)
+        Logger.info(f"Serie de citas {serie_id} eliminada")
+        return True
+
+
+# ========================
+# EXPANSIÓN (PRIVADO)
+# ========================
+
+class _ExpansorSeries:
+    """Convierte las series de una ventana de fechas en ocurrencias"""
+
+    @staticmethod
+    def ocurrencias(desde: date, hasta: date, veterinario_id: int = None) -> list:
+        series = _RepositorioSerie.en_rango(desde, hasta, veterinario_id)
+        hechas = _RepositorioSerie.materializadas([s.id for s in series], desde, hasta)
+        resultado = [
+            Ocurrencia(
+                id=None, serie_id=s.id, fecha_serie=fecha, fecha=fecha, hora=s.hora,
+                motivo=s.motivo, diagnostico=None, estado="Pendiente",
+                mascota_id=s.mascota_id, veterinario_id=s.veterinario_id,
+                mascota=s.mascota, veterinario=s.veterinario,
+            )
+            for s in series
+            for fecha in _ReglaSerie.fechas(s, desde, hasta)
+            if (s.id, fecha) not in hechas
+        ]
+        return sorted(resultado, key=lambda o: (o.fecha, o.hora, o.serie_id))
+
+
+# ========================
+# SERVICIO (PRIVADO)
+# ========================
+
+class _ServicioSerie:
+    """Validaciones de las series antes de guardarlas"""
+
+    @staticmethod
+    def crear_serie(mascota_id: int, veterinario_id: int, fecha_inicio: date, hora: time, frecuencia: str,
+                    intervalo: int = 1, repeticiones: int = None, fecha_fin: date = None, motivo: str = None):
+        """
+        FLUJO:
+        1. Validar la primera ocurrencia como una cita normal (Utilidades.validar_campos_cita)
+        2. Validar la regla (frecuencia, intervalo, final)
+        3. Comprobar que mascota y veterinario existen
+        4. Comprobar que ninguna ocurrencia choca con citas u otras series del veterinario
+        5. Guardar la serie (ninguna cita todavía)
+        """
+        es_valido, mensaje = Utilidades.validar_campos_cita(mascota_id, veterinario_id, fecha_inicio, hora)
+        if not es_valido:
+            raise ValidacionException("Serie", mensaje)
+
+        frecuencia = (frecuencia or "").upper()
+        if frecuencia not in FRECUENCIAS:
+            raise ValidacionException("frecuencia", f"debe ser {', '.join(FRECUENCIAS)}", frecuencia)
+        if not isinstance(intervalo, int) or intervalo < 1:
+            raise ValidacionException("intervalo", "debe ser un entero mayor que 0", str(intervalo))
+        if repeticiones is not None and repeticiones < 1:
+            raise ValidacionException("repeticiones", "debe ser mayor que 0", str(repeticiones))
+        if fecha_fin is not None and fecha_fin < fecha_inicio:
+            raise ValidacionException("fecha_fin", "no puede ser anterior a la fecha de inicio", str(fecha_fin))
+
+        if not session.query(Mascota.id).filter_by(id=mascota_id).first():
+            raise MascotaNoEncontradaException(mascota_id)
+        if not session.query(Veterinario.id).filter_by(id=veterinario_id).first():
+            raise VeterinarioNoEncontradoException(veterinario_id)
+
+        campos = dict(
+            mascota_id=mascota_id, veterinario_id=veterinario_id, fecha_inicio=fecha_inicio, hora=hora,
+            frecuencia=frecuencia, intervalo=intervalo, repeticiones=repeticiones, fecha_fin=fecha_fin,
+            motivo=motivo,
+        )
+        choque = _ServicioSerie._primer_choque(SerieCita(**campos))
+        if choque:
+            raise ValidacionException("Horario", "el veterinario ya tiene una cita a esa hora", Utilidades.formatear_fecha(choque))
+        return _RepositorioSerie.crear(**campos)
+
+    @staticmethod
+    def _primer_choque(regla: SerieCita) -> date:
+        """
+        Primera fecha (de los HORIZONTE_VALIDACION_DIAS primeros días) en la que la
+        regla se solapa con una cita guardada o con la ocurrencia de otra serie
+        del mismo veterinario; None si no hay ninguna
+        """
+        hasta = regla.fecha_inicio + timedelta(days=HORIZONTE_VALIDACION_DIAS)
+        fechas = _ReglaSerie.fechas(regla, regla.fecha_inicio, hasta)
+        if not fechas:
+            return None
+        ocupados = _RepositorioSerie.horas_ocupadas(regla.veterinario_id, fechas[0], fechas[-1])
+        ocupados += [(o.fecha, o.hora.hour * 60 + o.hora.minute)
+                     for o in expandir_series(fechas[0], fechas[-1], regla.veterinario_id)]
+        # Cada cita ocupa un hueco: dos se solapan si empiezan a menos de DURACION_HUECO minutos
+        minuto = regla.hora.hour * 60 + regla.hora.minute
+        en_serie = set(fechas)
+        return min((f for f, m in ocupados if f in en_serie and abs(m - minuto) < DURACION_HUECO), default=None)
+
+    @staticmethod
+    def finalizar_serie(serie_id: int, fecha_fin: date):
+        serie = _RepositorioSerie.obtener_por_id(serie_id)
+        if fecha_fin < serie.fecha_inicio:
+            raise ValidacionException("fecha_fin", "no puede ser anterior a la fecha de inicio", str(fecha_fin))
+        return _RepositorioSerie.actualizar(serie, fecha_fin=fecha_fin)
+
+
+# ========================
+# INTERFAZ PÚBLICA
+# ========================
+
+def crear_serie(mascota_id: int, veterinario_id: int, fecha_inicio: date, hora: time, frecuencia: str,
+                intervalo: int = 1, repeticiones: int = None, fecha_fin: date = None, motivo: str = None):
+    """
+    Crea una serie de citas periódicas
+    Args: frecuencia (str): "DIARIA", "SEMANAL" o "MENSUAL"
+          intervalo (int): cada cuántos días/semanas/meses (2 + SEMANAL = cada dos semanas)
+          repeticiones (int) / fecha_fin (date): final de la serie; sin ninguno no termina
+    Ejemplo: crear_serie(3, 1, date(2026, 11, 2), time(10, 0), "SEMANAL", repeticiones=10, motivo="Fisioterapia")
+    """
+    return _ServicioSerie.crear_serie(mascota_id, veterinario_id, fecha_inicio, hora, frecuencia,
+                                      intervalo, repeticiones, fecha_fin, motivo)
+
+def obtener_serie_por_id(serie_id: int):
+    """Obtiene una serie por ID"""
+    return _RepositorioSerie.obtener_por_id(serie_id)
+
+def listar_series(mascota_id: int = None, veterinario_id: int = None):
+    """Devuelve las series (opcionalmente de una mascota o un veterinario)"""
+    return _RepositorioSerie.listar(mascota_id, veterinario_id)
+
+def finalizar_serie(serie_id: int, fecha_fin: date):
+    """Termina una serie en fecha_fin (las ocurrencias posteriores desaparecen)"""
+    return _ServicioSerie.finalizar_serie(serie_id, fecha_fin)
+
+def eliminar_serie(serie_id: int):
+    """Elimina una serie; las citas que ya se habían materializado se conservan"""
+    return _RepositorioSerie.eliminar(_RepositorioSerie.obtener_por_id(serie_id))
+
+def fechas_serie(serie, desde: date, hasta: date) -> list:
+    """Fechas de las ocurrencias de una serie (objeto o ID) entre desde y hasta"""
+    if isinstance(serie, int):
+        serie = _RepositorioSerie.obtener_por_id(serie)
+    return _ReglaSerie.fechas(serie, desde, hasta)
+
+def expandir_series(fecha_desde: date, fecha_hasta: date = None, veterinario_id: int = None) -> list:
+    """
+    Ocurrencias pendientes de todas las series entre dos fechas (incluidas)
+    Sin fecha_hasta se expanden HORIZONTE_SERIES_DIAS días
+    Return: lista de Ocurrencia ordenada por fecha y hora
+    """
+    fecha_hasta = fecha_hasta or fecha_desde + timedelta(days=HORIZONTE_SERIES_DIAS)
+    if fecha_hasta < fecha_desde:
+        return []
+    return _ExpansorSeries.ocurrencias(fecha_desde, fecha_hasta, veterinario_id)
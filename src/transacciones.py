@@ -0,0 +1,63 @@
+"""
+título: módulo de transacciones
+fecha: 16.10.2026
+descripción: unidad de trabajo para operaciones con varias entidades
+(p.ej. dar de alta un cliente con sus mascotas y sus primeras citas).
+
+CÓMO FUNCIONA:
+===============
+
+    with transaccion():
+        cliente = crear_cliente(...)
+        mascota = registrar_mascota(..., cliente.id, ...)
+        crear_cita(mascota.id, ...)
+
+1. Dentro del bloque, las funciones de src.clientes, src.mascotas,
+   src.veterinarios, src.citas y src.series no hacen commit: sus repositorios
+   llaman a confirmar(), que solo hace flush (los IDs ya están disponibles).
+2. Al salir sin error se hace UN commit; si hay una excepción, un rollback de
+   todo el bloque y la excepción sigue su camino.
+3. Las cachés en proceso (estadísticas, disponibilidad, DTOs de entidades) se vacían al
+   terminar: durante el bloque podían haber visto datos aún sin confirmar.
+4. Un transaccion() dentro de otro se une al exterior.
+5. Los servicios de varios pasos (modificar_ocurrencia, crear_citas_lote) usan
+   un SAVEPOINT (database.punto_de_guardado): si fallan y el llamador captura
+   la excepción, lo que ya habían escrito no llega al commit final.
+"""
+
+from contextlib import contextmanager
+
+from src.database import session, abrir_transaccion
+from src.analisis import invalidar_cache_estadisticas
+from src.disponibilidad import invalidar_disponibilidad
+from src.cache import invalidar_cache_identidad
+from src.logger import Logger
+
+
+@contextmanager
+def transaccion():
+    """Agrupa varias operaciones de src en un solo commit (o un solo rollback)"""
+    actual = session()
+    profundidad = actual.info.get("transaccion", 0)
+    actual.info["transaccion"] = profundidad + 1
+    if profundidad:
+        # Anidada: la exterior confirma o deshace
+        try:
+            yield actual
+        finally:
+            actual.info["transaccion"] = profundidad
+        return
+
+    try:
+        abrir_transaccion()
+        yield actual
+        actual.commit()
+    except BaseException as e:
+        actual.rollback()
+        Logger.warning(f"Transacción deshecha: {e}")
+        raise
+    finally:
+        actual.info["transaccion"] = 0
+        invalidar_cache_estadisticas()
+        invalidar_disponibilidad()
+        invalidar_cache_identidad()
@@ -8,6 +8,8 @@ CÓMO FUNCIONA:
 
 1. _RepositorioVeterinario: Acceso a BD (CRUD)
    └─ crear(), obtener_por_id(), listar_todos(), contar_total(), etc.
+   └─ los listados aceptan resumen=True: solo las columnas de ResumenVeterinario,
+      sin objetos ORM (más rápido y ligero para listas largas)
    └─ NUNCA tiene lógica de negocio
 
 2. _ServicioVeterinario: Lógica de negocio
@@ -15,15 +17,30 @@ CÓMO FUNCIONA:
    └─ Usa Utilidades para validaciones
    └─ Usa _RepositorioVeterinario para BD
 
-3. Interfaz pública: 10 funciones
+3. Interfaz pública: 13 funciones
+   └─ dto=True: devuelven VeterinarioDTO (src.dto) en vez de objetos ORM
    └─ Lo único que importa Streamlit
    └─ Wrappers simples que deleguen a ServicioVeterinario o RepositorioVeterinario
 """
 
-from src.database import session, Veterinario
+from src.database import session, Veterinario, confirmar, deshacer
 from src.exceptions import VeterinarioNoEncontradoException, DNIDuplicadoException, ValidacionException
 from src.logger import Logger
+from src.paginacion import Paginador, TAMANO_PAGINA_DEFECTO
+from src.busqueda import _BuscadorTexto
+from src.analisis import invalidar_cache_estadisticas
+from src.disponibilidad import invalidar_disponibilidad
+from src.cache import _cache_veterinarios, _CacheVersionada
+from src.dto import a_dto
 from sqlalchemy.exc import IntegrityError
+from collections import namedtuple
+
+# Fila de los listados en modo resumen (una query de columnas, sin objetos ORM)
+ResumenVeterinario = namedtuple("ResumenVeterinario", ["id", "nombre", "cargo", "especialidad"])
+_COLUMNAS_RESUMEN = [getattr(Veterinario, campo) for campo in ResumenVeterinario._fields]
+
+# Opciones de los selectbox: se recalculan cuando cambian los veterinarios
+_cache_opciones = _CacheVersionada("veterinarios")
 
 # ========================
 # REPOSITORIO (PRIVADO)
@@ -46,7 +63,8 @@ class _RepositorioVeterinario:
             email=email
         )
         session.add(veterinario)
-        session.commit()
+        confirmar()
+        invalidar_cache_estadisticas()
         Logger.info(f"Veterinario creado con ID: {veterinario.id}")
         return veterinario
     
@@ -59,9 +77,45 @@ class _RepositorioVeterinario:
         return veterinario
     
     @staticmethod
-    def listar_todos():
+    def obtener_dto(veterinario_id: int):
+        """CRUD: READ por ID desde la caché de entidades (VeterinarioDTO)"""
+        return _cache_veterinarios.obtener(veterinario_id, lambda: _RepositorioVeterinario.obtener_por_id(veterinario_id))
+    
+    @staticmethod
+    def _consulta(resumen: bool = False):
+        """Query de entidades Veterinario, o solo de las columnas de ResumenVeterinario"""
+        return session.query(*_COLUMNAS_RESUMEN) if resumen else session.query(Veterinario)
+    
+    @staticmethod
+    def listar_todos(resumen: bool = False):
         """CRUD: READ todos"""
-        return session.query(Veterinario).order_by(Veterinario.nombre).all()
+        filas = _RepositorioVeterinario._consulta(resumen).order_by(Veterinario.nombre).all()
+        return [ResumenVeterinario._make(f) for f in filas] if resumen else filas
+    
+    @staticmethod
+    def listar_pagina(tamano: int, cursor: str = None, hacia_atras: bool = False, especialidad: str = None, resumen: bool = False):
+        """CRUD: READ una página ordenada por (nombre, id) - paginación keyset"""
+        q = _RepositorioVeterinario._consulta(resumen)
+        if especialidad:
+            q = q.filter(Veterinario.especialidad == especialidad)
+        return Paginador.paginar(q, [Veterinario.nombre, Veterinario.id], tamano, cursor, hacia_atras,
+                                 tipo=ResumenVeterinario if resumen else None)
+    
+    @staticmethod
+    def listar_opciones():
+        """CRUD: READ (id, etiqueta) de todos los veterinarios (solo las columnas necesarias)"""
+        filas = session.query(Veterinario.id, Veterinario.nombre, Veterinario.especialidad).order_by(
+            Veterinario.nombre, Veterinario.id
+        ).all()
+        return tuple((vet_id, f"{nombre} ({especialidad or 'General'})") for vet_id, nombre, especialidad in filas)
+    
+    @staticmethod
+    def listar_especialidades():
+        """CRUD: READ especialidades distintas (sin cargar veterinarios)"""
+        filas = session.query(Veterinario.especialidad).filter(
+            Veterinario.especialidad.isnot(None), Veterinario.especialidad != ""
+        ).distinct().order_by(Veterinario.especialidad).all()
+        return [f[0] for f in filas]
     
     @staticmethod
     def obtener_por_dni(dni: str):
@@ -70,10 +124,13 @@ class _RepositorioVeterinario:
     
     @staticmethod
     def obtener_por_nombre(nombre: str):
-        """CRUD: READ búsqueda parcial por nombre"""
-        return session.query(Veterinario).filter(
-            Veterinario.nombre.like(f"%{nombre}%")
-        ).order_by(Veterinario.nombre).all()
+        """CRUD: READ búsqueda por nombre (índice FTS5: prefijos, sin acentos, por relevancia)"""
+        return _BuscadorTexto.buscar(Veterinario, nombre, ("nombre",), limite=None)
+    
+    @staticmethod
+    def obtener_por_especialidad(especialidad: str):
+        """CRUD: READ búsqueda por especialidad (índice FTS5)"""
+        return _BuscadorTexto.buscar(Veterinario, especialidad, ("especialidad",), limite=None)
     
     @staticmethod
     def actualizar(veterinario: Veterinario, **campos) -> Veterinario:
@@ -81,17 +138,21 @@ class _RepositorioVeterinario:
         for campo, valor in campos.items():
             if valor is not None:
                 setattr(veterinario, campo, valor)
-        session.commit()
+        confirmar()
         session.refresh(veterinario)
+        _cache_veterinarios.invalidar(veterinario.id)
         Logger.info(f"Veterinario {veterinario.id} actualizado")
         return veterinario
     
     @staticmethod
     def eliminar(veterinario: Veterinario) -> bool:
         """CRUD: DELETE"""
-        nombre = veterinario.nombre
+        nombre, veterinario_id = veterinario.nombre, veterinario.id
         session.delete(veterinario)
-        session.commit()
+        confirmar()
+        _cache_veterinarios.invalidar(veterinario_id)
+        invalidar_cache_estadisticas()
+        invalidar_disponibilidad(veterinario_id)
         Logger.info(f"Veterinario {nombre} eliminado")
         return True
     
@@ -151,14 +212,14 @@ class _ServicioVeterinario:
             return _RepositorioVeterinario.crear(nombre, dni, cargo, especialidad, telefono, email)
         
         except (DNIDuplicadoException, ValidacionException):
-            session.rollback()
+            deshacer()
             raise
         except IntegrityError:
-            session.rollback()
+            deshacer()
             Logger.error("Error de integridad, probablemente DNI duplicado")
             raise
         except Exception as e:
-            session.rollback()
+            deshacer()
             Logger.log_excepcion(e, "crear_veterinario")
             raise
     
@@ -190,16 +251,16 @@ class _ServicioVeterinario:
             )
         
         except (DNIDuplicadoException, VeterinarioNoEncontradoException):
-            session.rollback()
+            deshacer()
             raise
         except Exception as e:
-            session.rollback()
+            deshacer()
             Logger.log_excepcion(e, "modificar_veterinario")
             raise
 
 
 # ========================
-# INTERFAZ PÚBLICA (10 funciones)
+# INTERFAZ PÚBLICA (13 funciones)
 # ========================
 # Lo ÚNICO que usa Streamlit
 # Todo está aquí, NADA en las clases privadas
@@ -208,25 +269,43 @@ def crear_veterinario(nombre: str, dni: str, cargo: str = None, especialidad: st
     """Crea un nuevo veterinario"""
     return _ServicioVeterinario.crear_veterinario(nombre, dni, cargo, especialidad, telefono, email)
 
-def listar_veterinarios():
-    """Devuelve todos los veterinarios"""
-    return _RepositorioVeterinario.listar_todos()
+def listar_veterinarios(resumen: bool = False):
+    """Devuelve todos los veterinarios (resumen=True: ResumenVeterinario en vez de objetos ORM)"""
+    return _RepositorioVeterinario.listar_todos(resumen)
+
+def listar_veterinarios_paginado(tamano_pagina: int = TAMANO_PAGINA_DEFECTO, cursor: str = None, hacia_atras: bool = False, especialidad: str = None, resumen: bool = False):
+    """Devuelve una Pagina de veterinarios (por nombre), opcionalmente de una especialidad"""
+    return _RepositorioVeterinario.listar_pagina(tamano_pagina, cursor, hacia_atras, especialidad, resumen)
+
+def listar_opciones_veterinarios():
+    """
+    Opciones para un selectbox de veterinarios, sin cargar objetos ORM
+    Return: tupla de (id, "Nombre (Especialidad)") ordenada por nombre;
+            cacheada hasta que cambien los veterinarios
+    """
+    return _cache_opciones.obtener("todos", _RepositorioVeterinario.listar_opciones)
+
+def listar_especialidades():
+    """Devuelve las especialidades registradas, sin repetir"""
+    return _RepositorioVeterinario.listar_especialidades()
 
-def obtener_veterinario_por_id(veterinario_id: int):
-    """Obtiene un veterinario por ID"""
-    return _RepositorioVeterinario.obtener_por_id(veterinario_id)
+def obtener_veterinario_por_id(veterinario_id: int, dto: bool = False):
+    """Obtiene un veterinario por ID (dto=True: VeterinarioDTO de la caché de entidades)"""
+    return _RepositorioVeterinario.obtener_dto(veterinario_id) if dto else _RepositorioVeterinario.obtener_por_id(veterinario_id)
 
-def buscar_veterinario_por_dni(dni: str):
-    """Busca un veterinario por DNI"""
-    return _RepositorioVeterinario.obtener_por_dni(dni)
+def buscar_veterinario_por_dni(dni: str, dto: bool = False):
+    """Busca un veterinario por DNI (dto=True: VeterinarioDTO)"""
+    veterinario = _RepositorioVeterinario.obtener_por_dni(dni)
+    return a_dto(veterinario) if dto else veterinario
 
 def buscar_veterinario_por_nombre(nombre: str):
-    """Busca veterinarios por nombre (búsqueda parcial)"""
+    """Busca veterinarios por nombre (por prefijo de palabra, sin distinguir acentos)"""
     return _RepositorioVeterinario.obtener_por_nombre(nombre)
 
-def modificar_veterinario(veterinario_id: int, nombre: str = None, dni: str = None, cargo: str = None, especialidad: str = None, telefono: str = None, email: str = None):
-    """Modifica un veterinario existente"""
-    return _ServicioVeterinario.modificar_veterinario(veterinario_id, nombre, dni, cargo, especialidad, telefono, email)
+def modificar_veterinario(veterinario_id: int, nombre: str = None, dni: str = None, cargo: str = None, especialidad: str = None, telefono: str = None, email: str = None, dto: bool = False):
+    """Modifica un veterinario existente (dto=True: devuelve VeterinarioDTO)"""
+    veterinario = _ServicioVeterinario.modificar_veterinario(veterinario_id, nombre, dni, cargo, especialidad, telefono, email)
+    return a_dto(veterinario) if dto else veterinario
 
 def eliminar_veterinario(veterinario_id: int):
     """Elimina un veterinario"""
@@ -246,11 +325,9 @@ def veterinario_existe(veterinario_id: int):
     return _RepositorioVeterinario.existe(veterinario_id)
 
 def obtener_veterinarios_por_especialidad(especialidad: str):
-    """Devuelve veterinarios de una especialidad (búsqueda parcial)"""
+    """Devuelve veterinarios de una especialidad (por prefijo de palabra, sin distinguir acentos)"""
     try:
-        return session.query(Veterinario).filter(
-            Veterinario.especialidad.like(f"%{especialidad}%")
-        ).order_by(Veterinario.nombre).all()
+        return _RepositorioVeterinario.obtener_por_especialidad(especialidad)
     except Exception as e:
         Logger.log_excepcion(e, "obtener_veterinarios_por_especialidad")
         return []
@@ -1,7 +1,17 @@
+import os
 import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
+
+# Los tests usan una BD en memoria: hay que fijarlo antes de importar src
+os.environ.setdefault("CLINICA_DB_URL", "sqlite://")
+
 from src.database import session as db_session_obj
 # IMPORTANTE: Añadir Cita aquí
-from src.database import Cliente, Mascota, Veterinario, Cita
+from src.database import Cliente, Mascota, Veterinario, Cita, SerieCita
+from src.analisis import invalidar_cache_estadisticas
+from src.disponibilidad import invalidar_disponibilidad
+from src.cache import invalidar_cache_identidad
 
 # =======================================================
 # 1. GESTIÓN DE LA BASE DE DATOS (SETUP & TEARDOWN)
@@ -28,6 +38,7 @@ def limpiar_base_de_datos():
     try:
         # 1. Borrar Citas PRIMERO (porque dependen de Mascota y Veterinario)
         db_session_obj.query(Cita).delete()
+        db_session_obj.query(SerieCita).delete()
         
         # 2. Borrar Mascotas (dependen de Cliente)
         db_session_obj.query(Mascota).delete()
@@ -37,10 +48,39 @@ def limpiar_base_de_datos():
         db_session_obj.query(Veterinario).delete()
         
         db_session_obj.commit()
+
+        # Los deletes masivos no tocan el identity map: soltar los objetos
+        # viejos para que no choquen con filas nuevas que reutilicen sus IDs
+        db_session_obj.expunge_all()
+
+        # Los deletes masivos tampoco pasan por los repositorios
+        invalidar_cache_estadisticas()
+        invalidar_disponibilidad()
+        invalidar_cache_identidad()
     except Exception as e:
         db_session_obj.rollback()
         print(f"Error limpiando BD de test: {e}")
 
+@pytest.fixture
+def contar_sql(session):
+    """
+    Recoge las sentencias SQL que se lanzan dentro de un bloque:
+
+        with contar_sql() as sentencias:
+            listar_citas()
+        assert len(sentencias) == 1
+    """
+    @contextmanager
+    def contar():
+        sentencias = []
+        escuchar = lambda conn, cursor, sql, *args: sentencias.append(sql)
+        event.listen(session.bind, "before_cursor_execute", escuchar)
+        try:
+            yield sentencias
+        finally:
+            event.remove(session.bind, "before_cursor_execute", escuchar)
+    return contar
+
 # =======================================================
 # 2. FIXTURES DE DATOS (FACTORIES)
 # =======================================================
@@ -75,6 +75,51 @@ def test_estadisticas_vacias(session):
     assert stats["total_clientes"] == 0
     assert stats["total_citas"] == 0
 
+def test_estadisticas_es_instantanea_inmutable(session, datos_analisis):
+    """Test: La instantánea devuelta no se puede modificar."""
+    stats = obtener_estadisticas_generales()
+    with pytest.raises(TypeError):
+        stats["total_clientes"] = 99
+
+def test_estadisticas_error_tambien_inmutable(session, monkeypatch):
+    """Test: Si falla la consulta, los ceros también son de solo lectura."""
+    import src.analisis as analisis
+
+    def fallar():
+        raise RuntimeError("BD no disponible")
+    monkeypatch.setattr(analisis, "_calcular_estadisticas_generales", fallar)
+
+    stats = obtener_estadisticas_generales(usar_cache=False)
+    assert stats["total_citas"] == 0
+    with pytest.raises(TypeError):
+        stats["total_citas"] = 1
+
+def test_estadisticas_cache_aciertos_e_invalidacion(session, datos_analisis):
+    """Test: Segunda llamada sale de caché; crear por el repositorio invalida."""
+    from src.clientes import crear_cliente
+
+    antes = obtener_metricas_cache_estadisticas()
+    obtener_estadisticas_generales()
+    assert obtener_total_clientes() == 1
+    despues = obtener_metricas_cache_estadisticas()
+    assert despues["fallos"] == antes["fallos"] + 1
+    assert despues["aciertos"] == antes["aciertos"] + 1
+
+    crear_cliente("Nuevo Cliente", "99999999Z")
+    assert obtener_total_clientes() == 2
+
+def test_estadisticas_ttl_cero_no_cachea(session, datos_analisis):
+    """Test: Con TTL 0 cada llamada vuelve a consultar la BD."""
+    ttl_original = obtener_metricas_cache_estadisticas()["ttl"]
+    configurar_cache_estadisticas(0)
+    try:
+        obtener_estadisticas_generales()
+        session.add(Cliente(nombre="Directo", dni="C09"))
+        session.commit()
+        assert obtener_total_clientes() == 2
+    finally:
+        configurar_cache_estadisticas(ttl_original)
+
 # ==========================================
 # TESTS DE CARGA DE TRABAJO
 # ==========================================
@@ -92,6 +137,31 @@ def test_obtener_carga_veterinarios(session, datos_analisis):
     vet_a = next(c for c in carga if c["nombre"] == "Vet A")
     assert vet_a["num_citas"] == 2
 
+def test_carga_incluye_veterinarios_sin_citas(session, datos_analisis):
+    """(Edge Case): Un veterinario sin citas aparece con 0 (OUTER JOIN)."""
+    session.add(Veterinario(nombre="Vet C", dni="V03"))
+    session.commit()
+    carga = obtener_carga_veterinarios()
+    vet_c = next(c for c in carga if c["nombre"] == "Vet C")
+    assert vet_c["num_citas"] == 0
+
+def test_carga_no_cuenta_canceladas(session, datos_analisis):
+    """Test: Las citas canceladas no suman carga, pero sí salen en el desglose."""
+    session.add(Cita(fecha=date.today(), hora="16:00", mascota_id=session.query(Mascota).first().id,
+                     veterinario_id=datos_analisis["v1"].id, estado="Cancelada"))
+    session.commit()
+    carga = obtener_carga_veterinarios(desglose_estado=True)
+    vet_a = next(c for c in carga if c["nombre"] == "Vet A")
+    assert vet_a["num_citas"] == 2
+    assert vet_a["por_estado"] == {"Pendiente": 1, "Confirmada": 1, "Cancelada": 1}
+
+def test_carga_por_rango_de_fechas(session, datos_analisis):
+    """Test: El rango de fechas filtra las citas contadas."""
+    hoy = date.today()
+    carga = obtener_carga_veterinarios(fecha_desde=hoy, fecha_hasta=hoy + timedelta(days=7))
+    por_nombre = {c["nombre"]: c["num_citas"] for c in carga}
+    assert por_nombre == {"Vet A": 1, "Vet B": 2}
+
 def test_obtener_veterinario_con_mas_citas(session, datos_analisis):
     """Test: Identificar al 'empleado del mes'."""
     top = obtener_veterinario_con_mas_citas()
@@ -114,6 +184,24 @@ def test_obtener_especie_mas_comun(session, datos_analisis):
     especie = obtener_especie_mas_comun()
     assert especie == "Perro"
 
+def test_mascotas_por_especie_con_filtros(session, datos_analisis):
+    """Test: Los filtros opcionales se aplican en la consulta agrupada."""
+    cliente = session.query(Cliente).first()
+    otro = Cliente(nombre="Cliente 2", dni="C02")
+    session.add(otro)
+    session.flush()
+    session.add(Mascota(nombre="Gato2", especie="Gato", raza="Siamés", sexo="Hembra", cliente_id=otro.id))
+    session.commit()
+
+    assert obtener_mascotas_por_especie(cliente_id=cliente.id) == {"Perro": 2, "Gato": 1}
+    assert obtener_mascotas_por_especie(raza="Siamés") == {"Gato": 1}
+    assert obtener_mascotas_por_especie(sexo="Macho") == {}
+    assert list(iterar_mascotas_por_especie(cliente_id=otro.id)) == [("Gato", 1)]
+
+def test_especie_mas_comun_vacia(session):
+    """(Edge Case): Sin mascotas no hay especie más común."""
+    assert obtener_especie_mas_comun() is None
+
 # ==========================================
 # TESTS DE FECHAS (PRÓXIMAS CITAS)
 # ==========================================
@@ -0,0 +1,72 @@
+import pytest
+from src.busqueda import (
+    buscar_clientes, buscar_mascotas, buscar_veterinarios,
+    reconstruir_indices_busqueda, _BuscadorTexto
+)
+from src.clientes import crear_cliente, modificar_cliente, eliminar_cliente, buscar_cliente_por_nombre
+from src.veterinarios import crear_veterinario, obtener_veterinarios_por_especialidad
+from src.database import Mascota
+
+# ==========================================
+# FIXTURE: DATOS
+# ==========================================
+
+@pytest.fixture
+def clientes_busqueda(session):
+    ramon = crear_cliente("Ramón Pérez", "12345678A", "600111222", "ramon@correo.es")
+    lucia = crear_cliente("Lucía Ramos", "87654321B", "699000111", "lucia@correo.es")
+    crear_cliente("Pedro Sánchez", "11223344C", "611222333", "pedro@otro.com")
+    return {"ramon": ramon.id, "lucia": lucia.id}
+
+# ==========================================
+# TESTS DE BÚSQUEDA
+# ==========================================
+
+def test_busqueda_ignora_acentos(session, clientes_busqueda):
+    """'Ramon' sin tilde encuentra a 'Ramón'."""
+    resultados = buscar_clientes("ramon")
+    assert clientes_busqueda["ramon"] in [c.id for c in resultados]
+
+def test_busqueda_por_prefijo(session, clientes_busqueda):
+    """'ram' encuentra Ramón (nombre) y Ramos (apellido)."""
+    ids = {c.id for c in buscar_clientes("ram")}
+    assert ids == {clientes_busqueda["ramon"], clientes_busqueda["lucia"]}
+
+def test_busqueda_por_dni_email_y_telefono(session, clientes_busqueda):
+    assert [c.id for c in buscar_clientes("87654321B")] == [clientes_busqueda["lucia"]]
+    assert [c.dni for c in buscar_clientes("pedro@otro")] == ["11223344C"]
+    assert [c.id for c in buscar_clientes("600111")] == [clientes_busqueda["ramon"]]
+
+def test_busqueda_sigue_cambios(session, clientes_busqueda):
+    """Los triggers mantienen el índice al modificar y eliminar."""
+    modificar_cliente(clientes_busqueda["lucia"], nombre="Lucía Gómez")
+    assert buscar_clientes("gomez")[0].id == clientes_busqueda["lucia"]
+    assert clientes_busqueda["lucia"] not in [c.id for c in buscar_clientes("ramos")]
+
+    eliminar_cliente(clientes_busqueda["ramon"])
+    assert buscar_clientes("ramon") == []
+
+def test_buscar_por_nombre_no_mira_otros_campos(session, clientes_busqueda):
+    """buscar_cliente_por_nombre solo busca en la columna nombre."""
+    assert buscar_cliente_por_nombre("correo") == []
+    assert len(buscar_cliente_por_nombre("perez")) == 1
+
+def test_buscar_mascotas_y_veterinarios(session, clientes_busqueda):
+    session.add(Mascota(nombre="Nube", especie="Gato", raza="Siamés", cliente_id=clientes_busqueda["ramon"]))
+    session.commit()
+    crear_veterinario("Dra. Núñez", "99999999Z", especialidad="Cirugía felina")
+
+    assert [m.nombre for m in buscar_mascotas("siames")] == ["Nube"]
+    assert [v.dni for v in buscar_veterinarios("nunez")] == ["99999999Z"]
+    assert [v.dni for v in obtener_veterinarios_por_especialidad("cirugia")] == ["99999999Z"]
+
+def test_texto_con_operadores_no_rompe(session, clientes_busqueda):
+    """Comillas u operadores FTS en la entrada se tratan como texto."""
+    # Todas las palabras (también "OR" y "NEAR") deben aparecer: no hay resultados, pero tampoco error
+    assert buscar_clientes('"ramon" OR NEAR(') == []
+    assert buscar_clientes("   ") == []
+    assert _BuscadorTexto.construir_match("ramón ga", ("nombre",)) == '{nombre} : ("ramón"* "ga"*)'
+
+def test_reconstruir_indices(session, clientes_busqueda):
+    assert reconstruir_indices_busqueda() is True
+    assert buscar_clientes("lucia")[0].id == clientes_busqueda["lucia"]
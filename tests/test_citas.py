@@ -1,5 +1,6 @@
 import pytest
 from datetime import date, timedelta, time
+from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 from src.citas import *
 from src.database import Cita, Veterinario, Mascota, Cliente
@@ -168,4 +169,205 @@ def test_obtener_proximas_citas(session, datos_base):
     proximas = obtener_proximas_citas()
     # Deben venir ordenadas por fecha
     assert proximas[0].motivo == "Cercana"
-    assert proximas[1].motivo == "Lejana"
\ No newline at end of file
+    assert proximas[1].motivo == "Lejana"
+
+def test_listar_citas_con_detalle_una_consulta(session, datos_base, contar_sql):
+    """Mascota, cliente y veterinario llegan precargados: 1 SELECT para todo el listado."""
+    manana = date.today() + timedelta(days=1)
+    crear_cita(datos_base["mascota_id"], datos_base["vet_id"], manana, time(10, 0), "Cita 1")
+    crear_cita(datos_base["mascota_id"], datos_base["vet_id"], manana, time(11, 0), "Cita 2")
+    session.expunge_all()
+
+    with contar_sql() as sentencias:
+        citas = listar_citas_con_detalle()
+        etiquetas = [(c.mascota.nombre, c.mascota.cliente.nombre, c.veterinario.nombre) for c in citas]
+
+    assert etiquetas == [("Firulais", "Juan Dueño", "Dr. Test")] * 2
+    assert len(sentencias) == 1
+
+def test_listar_citas_con_detalle_filtra_estado(session, datos_base):
+    manana = date.today() + timedelta(days=1)
+    cita = crear_cita(datos_base["mascota_id"], datos_base["vet_id"], manana, time(10, 0), "Cancelable")
+    crear_cita(datos_base["mascota_id"], datos_base["vet_id"], manana, time(11, 0), "Pendiente")
+    cancelar_cita(cita.id)
+
+    canceladas = listar_citas_con_detalle("Cancelada")
+    assert [c.motivo for c in canceladas] == ["Cancelable"]
+
+# ==========================================
+# 5. TESTS DE HORA (MINUTOS DESDE MEDIANOCHE)
+# ==========================================
+
+def test_hora_se_guarda_en_minutos_y_vuelve_como_time(session, datos_base):
+    manana = date.today() + timedelta(days=1)
+    cita = crear_cita(datos_base["mascota_id"], datos_base["vet_id"], manana, time(10, 30))
+    session.expunge_all()
+
+    assert obtener_cita_por_id(cita.id).hora == time(10, 30)
+    crudo = session.execute(text("SELECT hora, typeof(hora) FROM citas WHERE id = :id"), {"id": cita.id}).one()
+    assert tuple(crudo) == (630, "integer")
+
+def test_solape_con_otra_cita_del_veterinario(session, datos_base):
+    """Cada cita dura DURACION_CITA minutos: 10:15 choca con una cita a las 10:00."""
+    manana = date.today() + timedelta(days=1)
+    crear_cita(datos_base["mascota_id"], datos_base["vet_id"], manana, time(10, 0))
+
+    with pytest.raises(ValidacionException):
+        crear_cita(datos_base["mascota_id"], datos_base["vet_id"], manana, time(10, 15))
+    with pytest.raises(ValidacionException):
+        crear_cita(datos_base["mascota_id"], datos_base["vet_id"], manana, time(9, 45))
+    assert crear_cita(datos_base["mascota_id"], datos_base["vet_id"], manana, time(10, 30)).id
+
+def test_obtener_citas_por_franja(session, datos_base):
+    hoy = date.today()
+    for dias, hora in [(1, time(9, 30)), (1, time(10, 0)), (2, time(11, 30)), (2, time(12, 0)), (9, time(11, 0))]:
+        session.add(Cita(fecha=hoy + timedelta(days=dias), hora=hora, mascota_id=datos_base["mascota_id"]))
+    session.commit()
+
+    citas = obtener_citas_por_franja(time(10, 0), time(12, 0), hoy, hoy + timedelta(days=6))
+
+    assert [c.hora for c in citas] == [time(10, 0), time(11, 30), time(12, 0)]
+
+# ==========================================
+# 6. TESTS DE CREACIÓN EN LOTE
+# ==========================================
+
+def test_crear_citas_lote_semanal(session, datos_base):
+    """10 sesiones semanales: una sola transacción, todas creadas."""
+    inicio = date.today() + timedelta(days=1)
+    lote = [dict(mascota_id=datos_base["mascota_id"], veterinario_id=datos_base["vet_id"],
+                 fecha=inicio + timedelta(weeks=i), hora=time(11, 0), motivo="Fisioterapia") for i in range(10)]
+
+    resultados = crear_citas_lote(lote)
+
+    assert all(r.error is None for r in resultados)
+    assert [r.indice for r in resultados] == list(range(10))
+    assert contar_citas() == 10
+    assert resultados[3].cita.fecha == inicio + timedelta(weeks=3)
+    assert resultados[0].cita.estado == "Pendiente"
+
+def test_crear_citas_lote_resultado_por_elemento(session, datos_base):
+    manana = date.today() + timedelta(days=1)
+    crear_cita(datos_base["mascota_id"], datos_base["vet_id"], manana, time(9, 0))
+    base = dict(mascota_id=datos_base["mascota_id"], veterinario_id=datos_base["vet_id"], fecha=manana)
+
+    resultados = crear_citas_lote([
+        dict(base, hora=time(10, 0)),                       # 0: ok
+        dict(base, hora=time(9, 15)),                       # 1: choca con la cita de la BD
+        dict(base, hora=time(10, 15)),                      # 2: choca con el elemento 0
+        dict(base, hora=time(18, 0)),                       # 3: fuera de horario
+        dict(base, hora=time(12, 0), mascota_id=99999),     # 4: mascota inexistente
+        dict(base, hora=time(12, 0)),                       # 5: ok
+    ])
+
+    assert [r.error is None for r in resultados] == [True, False, False, False, False, True]
+    assert "ya tiene una cita" in resultados[1].error
+    assert "elemento 0" in resultados[2].error
+    assert "99999" in resultados[4].error
+    assert contar_citas() == 3
+
+def test_crear_citas_lote_todo_o_nada(session, datos_base):
+    manana = date.today() + timedelta(days=1)
+    base = dict(mascota_id=datos_base["mascota_id"], veterinario_id=datos_base["vet_id"], fecha=manana)
+
+    resultados = crear_citas_lote([dict(base, hora=time(10, 0)), dict(base, hora=time(7, 0))], todo_o_nada=True)
+
+    assert resultados[0].cita is None and resultados[0].error
+    assert contar_citas() == 0
+
+def test_crear_citas_lote_una_consulta_de_conflictos(session, datos_base, contar_sql):
+    """La disponibilidad de todo el lote se comprueba con una sola SELECT sobre citas."""
+    inicio = date.today() + timedelta(days=1)
+    lote = [dict(mascota_id=datos_base["mascota_id"], veterinario_id=datos_base["vet_id"],
+                 fecha=inicio + timedelta(days=i), hora=time(10, 0)) for i in range(50)]
+    with contar_sql() as sentencias:
+        crear_citas_lote(lote)
+
+    selects_citas = [s for s in sentencias if "JOIN citas" in s]
+    assert len(selects_citas) == 1
+    assert contar_citas() == 50
+
+# ==========================================
+# 7. TESTS DE RANGOS DE FECHAS
+# ==========================================
+
+@pytest.fixture
+def semana(session, datos_base):
+    """Dos veterinarios y cinco citas repartidas en los próximos días."""
+    otro = Veterinario(nombre="Dra. Otra", dni="333V")
+    session.add(otro)
+    session.commit()
+    inicio = date.today() + timedelta(days=1)
+    m, v = datos_base["mascota_id"], datos_base["vet_id"]
+    crear_cita(m, v, inicio, time(9, 0))
+    crear_cita(m, v, inicio, time(10, 0))
+    crear_cita(m, otro.id, inicio, time(9, 0))
+    crear_cita(m, v, inicio + timedelta(days=2), time(11, 0), estado="Confirmada")
+    crear_cita(m, v, inicio + timedelta(days=10), time(9, 0))  # fuera de la semana
+    return dict(datos_base, otro_id=otro.id, inicio=inicio, fin=inicio + timedelta(days=6))
+
+def test_obtener_citas_por_rango(session, semana):
+    citas = obtener_citas_por_rango(semana["inicio"], semana["fin"])
+    assert len(citas) == 4
+    assert [(c.fecha, c.hora) for c in citas] == sorted((c.fecha, c.hora) for c in citas)
+    assert len(obtener_citas_por_rango(semana["inicio"], semana["fin"], veterinario_id=semana["otro_id"])) == 1
+    assert [c.hora for c in obtener_citas_por_rango(semana["inicio"], semana["fin"], estado="Confirmada")] == [time(11, 0)]
+
+def test_obtener_citas_por_rango_una_consulta(session, semana, contar_sql):
+    """Mascota, cliente y veterinario llegan en la misma SELECT."""
+    session.expunge_all()
+    with contar_sql() as sentencias:
+        citas = obtener_citas_por_rango(semana["inicio"], semana["fin"], incluir_series=False)
+        nombres = {(c.mascota.cliente.nombre, c.veterinario.nombre) for c in citas}
+    assert len(sentencias) == 1
+    assert ("Juan Dueño", "Dra. Otra") in nombres
+
+def test_contar_citas_por_dia(session, semana):
+    recuentos = contar_citas_por_dia(semana["inicio"], semana["fin"])
+    assert recuentos == [
+        RecuentoDia(semana["inicio"], semana["vet_id"], 2),
+        RecuentoDia(semana["inicio"], semana["otro_id"], 1),
+        RecuentoDia(semana["inicio"] + timedelta(days=2), semana["vet_id"], 1),
+    ]
+    assert sum(r.total for r in contar_citas_por_dia(semana["inicio"], semana["fin"], estado="Pendiente")) == 3
+
+def test_rango_invertido(session, semana):
+    with pytest.raises(ValidacionException):
+        obtener_citas_por_rango(semana["fin"], semana["inicio"])
+
+# ==========================================
+# 8. TESTS DEL CALENDARIO
+# ==========================================
+
+def test_obtener_ocupacion_calendario(session, semana):
+    cita = obtener_citas_por_rango(semana["inicio"], semana["inicio"], veterinario_id=semana["vet_id"])[0]
+    cancelar_cita(cita.id)
+    crear_cita(semana["mascota_id"], semana["vet_id"], semana["inicio"], time(9, 0))  # reocupa el hueco cancelado
+
+    ocupacion = obtener_ocupacion_calendario(semana["inicio"], semana["fin"], [semana["vet_id"]])
+
+    assert OcupacionHueco(semana["inicio"], semana["vet_id"], time(9, 0), "Cancelada", 1) in ocupacion
+    assert OcupacionHueco(semana["inicio"], semana["vet_id"], time(9, 0), "Pendiente", 1) in ocupacion
+    assert {o.veterinario_id for o in ocupacion} == {semana["vet_id"]}
+    assert sum(o.total for o in ocupacion) == 4
+
+def test_ocupacion_calendario_una_consulta(session, semana, contar_sql):
+    with contar_sql() as sentencias:
+        obtener_ocupacion_calendario(semana["inicio"], semana["inicio"] + timedelta(days=30))
+    # Una SELECT de citas agrupadas (+ la de series del rango, que aquí no hay)
+    assert sum("GROUP BY" in s for s in sentencias) == 1 and len(sentencias) == 2
+
+def test_version_datos_citas_cambia_al_escribir(session, datos_base):
+    version = version_datos_citas()
+    cita = crear_cita(datos_base["mascota_id"], datos_base["vet_id"], date.today() + timedelta(days=1), time(9, 0))
+    assert version_datos_citas() > version
+
+    version = version_datos_citas()
+    obtener_citas_por_rango(date.today(), date.today() + timedelta(days=7))
+    assert version_datos_citas() == version  # leer no cambia la versión
+
+    modificar_cita(cita.id, motivo="Revisión")
+    assert version_datos_citas() > version
+    version = version_datos_citas()
+    eliminar_cita(cita.id)
+    assert version_datos_citas() > version
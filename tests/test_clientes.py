@@ -4,8 +4,10 @@ from src.clientes import (
     buscar_cliente_por_dni, buscar_cliente_por_nombre,
     modificar_cliente, eliminar_cliente, contar_clientes
 )
-from src.exceptions import ClienteNoEncontradoException, DNIDuplicadoException, ValidacionException
-from src.database import Cliente
+from src.exceptions import ClienteNoEncontradoException, DNIDuplicadoException, ValidacionException, MascotaNoEncontradaException
+from src.database import Cliente, Mascota
+from src.mascotas import obtener_mascota_por_id
+from src.cache import _cache_clientes, obtener_metricas_cache_identidad
 
 # Nota: pytest inyecta automáticamente 'session' y 'cliente_default' desde conftest.py
 
@@ -62,7 +64,7 @@ def test_listar_clientes(session, cliente_default):
 
 def test_obtener_cliente_por_id(session, cliente_default):
     encontrado = obtener_cliente_por_id(cliente_default.id)
-    assert encontrado.id == cliente_default.id
+    assert encontrado is cliente_default  # por defecto, la entidad ORM de la sesión
     assert encontrado.nombre == cliente_default.nombre
 
 def test_obtener_cliente_inexistente(session):
@@ -136,4 +138,50 @@ def test_eliminar_cliente_inexistente(session):
         eliminar_cliente(999)
 
 def test_contar_clientes(session, cliente_default):
-    assert contar_clientes() == 1
\ No newline at end of file
+    assert contar_clientes() == 1
+# ==========================================
+# TESTS DE LA CACHÉ DE ENTIDADES
+# ==========================================
+
+def test_obtener_por_id_usa_la_cache(session, cliente_default, contar_sql):
+    antes = obtener_metricas_cache_identidad()["clientes"]
+    primera = obtener_cliente_por_id(cliente_default.id, dto=True)
+
+    with contar_sql() as sentencias:
+        obtener_cliente_por_id(cliente_default.id, dto=True)
+    assert sentencias == []
+    despues = obtener_metricas_cache_identidad()["clientes"]
+    assert (despues["fallos"], despues["aciertos"]) == (antes["fallos"] + 1, antes["aciertos"] + 1)
+    assert 0 < despues["tasa_aciertos"] <= 1
+    # DTO inmutable, no un objeto ORM de la sesión
+    assert primera == obtener_cliente_por_id(cliente_default.id, dto=True)
+    with pytest.raises(AttributeError):
+        primera.nombre = "Otro"
+
+def test_cache_se_invalida_al_modificar_y_eliminar(session, cliente_default):
+    obtener_cliente_por_id(cliente_default.id, dto=True)
+    modificar_cliente(cliente_default.id, telefono="699999999")
+    assert obtener_cliente_por_id(cliente_default.id, dto=True).telefono == "699999999"
+
+    mascota = Mascota(nombre="Toby", especie="Perro", cliente_id=cliente_default.id)
+    session.add(mascota)
+    session.commit()
+    obtener_mascota_por_id(mascota.id, dto=True)
+
+    eliminar_cliente(cliente_default.id)
+    with pytest.raises(ClienteNoEncontradoException):
+        obtener_cliente_por_id(cliente_default.id, dto=True)
+    # Sus mascotas se borran en cascada: tampoco quedan en caché
+    with pytest.raises(MascotaNoEncontradaException):
+        obtener_mascota_por_id(mascota.id, dto=True)
+
+def test_cache_acotada(session, monkeypatch, contar_sql):
+    monkeypatch.setattr(_cache_clientes, "tamano", 2)
+    ids = [crear_cliente(f"Cliente {i}", f"{i}0000000X").id for i in range(3)]
+    for cliente_id in ids:
+        obtener_cliente_por_id(cliente_id, dto=True)
+    assert obtener_metricas_cache_identidad()["clientes"]["entradas"] == 2
+    # El primero fue el menos usado: vuelve a la BD
+    with contar_sql() as sentencias:
+        obtener_cliente_por_id(ids[0], dto=True)
+    assert len(sentencias) == 1
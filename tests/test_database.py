@@ -1,8 +1,14 @@
+import os
+import subprocess
+import sys
 import pytest
+import threading
 from sqlalchemy import inspect
 from sqlalchemy.exc import IntegrityError
 from datetime import date
-from src.database import Cliente, Mascota, Veterinario, Cita
+from src.database import Base, Cliente, Mascota, Veterinario, Cita, migrar_indices, migrar_hora_minutos, migrar_columnas
+from src.database import sesion_de_trabajo, sesion_de_pagina, cerrar_sesion, crear_engine, obtener_engine, url_base_datos
+from src.database import obtener_versiones, version_datos, suscribir_cambios, cancelar_suscripcion
 
 # ==========================================
 # 1. TESTS DE ESTRUCTURA (MODELOS Y COLUMNAS)
@@ -44,6 +50,77 @@ class TestColumnas:
     def test_cita_tiene_columnas_requeridas(self):
         self._check_columns(Cita, ["id", "fecha", "hora", "motivo", "diagnostico", "estado", "mascota_id", "veterinario_id"])
 
+class TestIndices:
+    """Verifica los índices de la tabla citas y su migración"""
+
+    INDICES_CITAS = {
+        "ix_citas_veterinario_fecha_hora",
+        "ix_citas_mascota_fecha",
+        "ix_citas_estado_fecha",
+        "ix_citas_fecha_hora",
+    }
+
+    def test_indices_citas_existen(self, session):
+        inspector = inspect(session.bind)
+        nombres = {i["name"] for i in inspector.get_indexes("citas")}
+        assert self.INDICES_CITAS <= nombres
+
+    def test_migrar_indices_idempotente(self, session):
+        """Si falta un índice la migración lo crea; una segunda pasada no hace nada."""
+        indice = next(i for i in Cita.__table__.indexes if i.name == "ix_citas_estado_fecha")
+        indice.drop(bind=session.bind)
+
+        assert migrar_indices(session.bind) == ["ix_citas_estado_fecha"]
+        assert migrar_indices(session.bind) == []
+
+    def test_migrar_hora_texto_a_minutos(self, tmp_path):
+        """Una BD con el esquema antiguo (hora 'HH:MM') pasa a minutos sin perder citas ni índices."""
+        motor = crear_engine(f"sqlite:///{tmp_path / 'antigua.db'}")
+        with motor.begin() as conn:
+            # create_all() ya ha creado el resto de tablas cuando se migra
+            for tabla in ("clientes", "mascotas", "veterinarios", "series_citas"):
+                Base.metadata.tables[tabla].create(conn)
+            conn.exec_driver_sql(
+                "CREATE TABLE citas (id INTEGER PRIMARY KEY, fecha DATE NOT NULL, hora VARCHAR(5) NOT NULL, "
+                "motivo VARCHAR(200), diagnostico VARCHAR(500), estado VARCHAR(20), "
+                "mascota_id INTEGER NOT NULL REFERENCES mascotas(id), veterinario_id INTEGER REFERENCES veterinarios(id))"
+            )
+            conn.exec_driver_sql("CREATE INDEX ix_citas_fecha_hora ON citas (fecha, hora)")
+            conn.exec_driver_sql("INSERT INTO clientes (id, nombre, dni) VALUES (1, 'C', '1C')")
+            conn.exec_driver_sql("INSERT INTO mascotas (id, nombre, especie, cliente_id) VALUES (1, 'M', 'Gato', 1)")
+            conn.exec_driver_sql("INSERT INTO citas (fecha, hora, estado, mascota_id) VALUES "
+                                 "('2025-05-01', '09:30', 'Pendiente', 1), ('2025-05-01', '16:00', 'Realizada', 1)")
+
+        assert migrar_hora_minutos(motor) is True
+        assert migrar_hora_minutos(motor) is False
+
+        with motor.connect() as conn:
+            assert conn.exec_driver_sql("SELECT hora, estado FROM citas ORDER BY id").fetchall() == [
+                (570, "Pendiente"), (960, "Realizada")
+            ]
+        nombres = {i["name"] for i in inspect(motor).get_indexes("citas")}
+        assert self.INDICES_CITAS <= nombres
+        assert not inspect(motor).has_table("citas_hora_texto")
+        motor.dispose()
+
+    def test_migrar_columnas_nuevas(self, tmp_path):
+        """Una tabla citas sin las columnas de series las recibe (a NULL) sin perder filas."""
+        motor = crear_engine(f"sqlite:///{tmp_path / 'sin_series.db'}")
+        with motor.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TABLE citas (id INTEGER PRIMARY KEY, fecha DATE NOT NULL, hora INTEGER NOT NULL, "
+                "motivo VARCHAR(200), diagnostico VARCHAR(500), estado VARCHAR(20), "
+                "mascota_id INTEGER NOT NULL, veterinario_id INTEGER)"
+            )
+            conn.exec_driver_sql("INSERT INTO citas (fecha, hora, mascota_id) VALUES ('2025-05-01', 570, 1)")
+
+        assert migrar_columnas(motor) == ["citas.serie_id", "citas.fecha_serie"]
+        assert migrar_columnas(motor) == []
+
+        with motor.connect() as conn:
+            assert conn.exec_driver_sql("SELECT hora, serie_id, fecha_serie FROM citas").fetchall() == [(570, None, None)]
+        motor.dispose()
+
 # ==========================================
 # 2. TESTS DE RELACIONES Y CASCADES (CRÍTICO)
 # ==========================================
@@ -207,4 +284,215 @@ class TestRestricciones:
         with pytest.raises(IntegrityError):
             session.commit()
             
-        session.rollback()
\ No newline at end of file
+        session.rollback()
+
+
+# ==========================================
+# 4. TESTS DE SESIONES (UNA POR HILO)
+# ==========================================
+
+class TestSesiones:
+    """Verifica el scoped_session y la unidad de trabajo"""
+
+    def test_cada_hilo_tiene_su_sesion(self, session):
+        """Dos hilos no comparten sesión (ni identity map)."""
+        propias = []
+
+        def trabajo():
+            propias.append(session())
+            cerrar_sesion()
+
+        hilo = threading.Thread(target=trabajo)
+        hilo.start()
+        hilo.join()
+
+        assert propias[0] is not session()
+
+    def test_hilo_ve_lo_confirmado_por_otro(self, session):
+        session.add(Cliente(nombre="Compartido", dni="HILO1"))
+        session.commit()
+        vistos = []
+
+        def trabajo():
+            vistos.append(session.query(Cliente).filter_by(dni="HILO1").count())
+            cerrar_sesion()
+
+        hilo = threading.Thread(target=trabajo)
+        hilo.start()
+        hilo.join()
+
+        assert vistos == [1]
+
+    def test_sesion_de_pagina_cierra_aunque_se_interrumpa(self, session):
+        """st.rerun()/st.stop() salen con una excepción: la sesión se cierra igual."""
+        sesiones = []
+
+        def trabajo():
+            try:
+                with sesion_de_pagina():
+                    sesiones.append(session())
+                    raise RuntimeError("st.rerun()")
+            except RuntimeError:
+                pass
+            sesiones.append(session())
+            cerrar_sesion()
+
+        hilo = threading.Thread(target=trabajo)
+        hilo.start()
+        hilo.join()
+
+        assert sesiones[0] is not sesiones[1]
+
+    def test_sesion_de_trabajo_confirma(self, session):
+        with sesion_de_trabajo() as s:
+            s.add(Cliente(nombre="UoW", dni="UOW1"))
+
+        session.rollback()  # no deshace nada: ya se hizo commit
+        assert session.query(Cliente).filter_by(dni="UOW1").count() == 1
+
+    def test_sesion_de_trabajo_deshace_si_falla(self, session):
+        with pytest.raises(ValueError):
+            with sesion_de_trabajo() as s:
+                s.add(Cliente(nombre="UoW", dni="UOW2"))
+                s.flush()
+                raise ValueError("fallo a mitad")
+
+        assert session.query(Cliente).filter_by(dni="UOW2").count() == 0
+
+    def test_crear_engine_con_pool_propio(self, tmp_path):
+        motor = crear_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=2, max_overflow=0)
+        assert motor.pool.size() == 2
+        with motor.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+        motor.dispose()
+
+    @pytest.mark.parametrize("perfil, journal, synchronous", [
+        ("compatible", "delete", 2),    # FULL
+        ("concurrente", "wal", 1),      # NORMAL
+    ])
+    def test_perfiles_sqlite(self, tmp_path, perfil, journal, synchronous):
+        motor = crear_engine(f"sqlite:///{tmp_path / 'perfil.db'}", perfil=perfil)
+        with motor.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == journal
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == synchronous
+            assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+        motor.dispose()
+
+    def test_perfil_desconocido(self):
+        with pytest.raises(ValueError):
+            crear_engine("sqlite://", perfil="turbo")
+
+
+# ==========================================
+# 5. TESTS DE CONFIGURACIÓN (ENGINE PEREZOSO)
+# ==========================================
+
+class TestConfiguracion:
+    """Verifica que la BD se elige por configuración y se abre al primer uso"""
+
+    def test_tests_usan_bd_en_memoria(self, session):
+        assert url_base_datos() == "sqlite://"
+        assert session.bind is obtener_engine()
+        assert obtener_engine().url.database is None
+
+    def test_importar_no_abre_la_bd(self, tmp_path):
+        """Importar los módulos no crea el engine ni el fichero de la BD."""
+        ruta = tmp_path / "perezosa.db"
+        codigo = (
+            "import src.clientes, src.utils, src.database as d\n"
+            "assert d._engine is None\n"
+            "d.session.query(d.Cliente).count()\n"
+            "assert d._engine is not None\n"
+        )
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        entorno = dict(os.environ, CLINICA_DB_URL=f"sqlite:///{ruta}")
+        subprocess.run([sys.executable, "-c", codigo], cwd=raiz, env=entorno, check=True)
+        assert ruta.exists()
+
+    def test_reconfigurar_desconecta_las_sesiones_de_otros_hilos(self, tmp_path):
+        """Tras configurar_base_datos() otro hilo ya no usa la sesión del engine viejo."""
+        codigo = (
+            "import threading, src.database as d\n"
+            "listo, reconfigurado, vistos = threading.Event(), threading.Event(), []\n"
+            "def hilo():\n"
+            "    vistos.append(d.session.bind); listo.set(); reconfigurado.wait()\n"
+            "    vistos.append(d.session.bind)\n"
+            "t = threading.Thread(target=hilo); t.start(); listo.wait()\n"
+            f"d.configurar_base_datos({str('sqlite:///' + str(tmp_path / 'nueva.db'))!r})\n"
+            "reconfigurado.set(); t.join()\n"
+            "assert vistos[0] is not vistos[1] and vistos[1] is d.obtener_engine()\n"
+        )
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        entorno = dict(os.environ, CLINICA_DB_URL=f"sqlite:///{tmp_path / 'vieja.db'}")
+        subprocess.run([sys.executable, "-c", codigo], cwd=raiz, env=entorno, check=True)
+
+
+# ==========================================
+# 6. TESTS DE VERSIONES DE DATOS
+# ==========================================
+
+class TestVersiones:
+    """Cada escritura sube la versión de las tablas que cambia (y solo esas)"""
+
+    def cambios(self, antes):
+        despues = obtener_versiones()
+        return {t for t in despues if despues[t] != antes[t]}
+
+    def test_alta_y_modificacion(self, session):
+        antes = obtener_versiones()
+        cliente = Cliente(nombre="Ana", dni="VER1")
+        session.add(cliente)
+        session.commit()
+        assert self.cambios(antes) == {"clientes"}
+
+        antes = obtener_versiones()
+        cliente.telefono = "600000000"
+        session.commit()
+        assert self.cambios(antes) == {"clientes"}
+        # Leer no cambia nada
+        antes = obtener_versiones()
+        session.query(Cliente).all()
+        assert self.cambios(antes) == set()
+
+    def test_borrado_cambia_tablas_dependientes(self, session, mascota_default, veterinario_default):
+        antes = obtener_versiones()
+        session.delete(veterinario_default)
+        session.commit()
+        assert self.cambios(antes) == {"veterinarios", "citas", "series_citas"}  # SET NULL en sus citas
+
+    def test_escrituras_masivas(self, session, cliente_default):
+        from sqlalchemy import insert
+        antes = obtener_versiones()
+        session.execute(insert(Mascota), [{"nombre": "A", "especie": "Gato", "cliente_id": cliente_default.id}])
+        session.commit()
+        assert self.cambios(antes) == {"mascotas"}
+
+        antes = obtener_versiones()
+        session.query(Cliente).delete()
+        session.commit()
+        assert self.cambios(antes) == {"clientes", "mascotas", "series_citas", "citas"}
+
+    def test_una_subida_por_transaccion_y_rollback(self, session):
+        version = version_datos("clientes")
+        session.add(Cliente(nombre="A", dni="VER2"))
+        session.flush()
+        session.add(Cliente(nombre="B", dni="VER3"))
+        session.commit()
+        assert version_datos("clientes") == version + 1
+
+        session.add(Cliente(nombre="C", dni="VER4"))
+        session.flush()
+        session.rollback()
+        assert version_datos("clientes") == version + 1
+
+    def test_suscriptores(self, session):
+        avisos = []
+        suscribir_cambios(avisos.append)
+        try:
+            session.add(Veterinario(nombre="V", dni="VER5"))
+            session.rollback()
+            session.add(Veterinario(nombre="V", dni="VER5"))
+            session.commit()
+        finally:
+            cancelar_suscripcion(avisos.append)
+        assert avisos == [frozenset({"veterinarios"})]
@@ -0,0 +1,117 @@
+import pytest
+from datetime import date, time, timedelta
+from src.disponibilidad import (
+    obtener_huecos_libres, obtener_huecos_libres_veterinario, hueco_libre,
+    obtener_metricas_cache_disponibilidad, HUECOS
+)
+from src.citas import crear_cita, modificar_cita, cancelar_cita, eliminar_cita
+from src.veterinarios import eliminar_veterinario
+from src.database import Veterinario
+from src.exceptions import ValidacionException
+
+MANANA = date.today() + timedelta(days=1)
+
+# ==========================================
+# FIXTURE: DATOS
+# ==========================================
+
+@pytest.fixture
+def segundo_veterinario(session):
+    vet = Veterinario(nombre="Dr. Luis", dni="22222222L")
+    session.add(vet)
+    session.commit()
+    return vet
+
+def selects(sentencias):
+    """Cuántas de las sentencias recogidas con contar_sql son SELECT"""
+    return sum(s.lstrip().upper().startswith("SELECT") for s in sentencias)
+
+# ==========================================
+# TESTS DE DISPONIBILIDAD
+# ==========================================
+
+def test_dia_libre_tiene_todos_los_huecos(session, veterinario_default):
+    huecos = obtener_huecos_libres_veterinario(veterinario_default.id, MANANA)
+    assert huecos == HUECOS
+    assert (huecos[0], huecos[-1], len(huecos)) == (time(9, 0), time(16, 30), 16)
+
+def test_cita_ocupa_su_hueco(session, mascota_default, veterinario_default):
+    crear_cita(mascota_default.id, veterinario_default.id, MANANA, time(10, 30))
+
+    huecos = obtener_huecos_libres_veterinario(veterinario_default.id, MANANA)
+    assert time(10, 30) not in huecos and len(huecos) == 15
+    assert not hueco_libre(veterinario_default.id, MANANA, time(10, 30))
+    assert hueco_libre(veterinario_default.id, MANANA, time(11, 0))
+
+def test_cita_fuera_de_la_rejilla_ocupa_los_dos_huecos(session, mascota_default, veterinario_default):
+    """Una cita a las 10:15 choca con las de 10:00 y 10:30: ninguno de los dos se ofrece."""
+    crear_cita(mascota_default.id, veterinario_default.id, MANANA, time(10, 15))
+
+    huecos = obtener_huecos_libres_veterinario(veterinario_default.id, MANANA)
+    assert time(10, 0) not in huecos and time(10, 30) not in huecos and len(huecos) == 14
+    for hora in (time(10, 0), time(10, 30)):
+        assert not hueco_libre(veterinario_default.id, MANANA, hora)
+        with pytest.raises(ValidacionException):
+            crear_cita(mascota_default.id, veterinario_default.id, MANANA, hora)
+    # Lo que se ofrece se puede reservar
+    assert hueco_libre(veterinario_default.id, MANANA, time(11, 0))
+    crear_cita(mascota_default.id, veterinario_default.id, MANANA, time(11, 0))
+
+def test_varios_veterinarios_y_dias_en_una_consulta(session, mascota_default, veterinario_default, segundo_veterinario, contar_sql):
+    crear_cita(mascota_default.id, segundo_veterinario.id, MANANA + timedelta(days=2), time(9, 0))
+    vets = [veterinario_default.id, segundo_veterinario.id]
+    fin = MANANA + timedelta(days=6)
+
+    with contar_sql() as sentencias:
+        obtener_huecos_libres(vets, MANANA, fin)
+    resultado = obtener_huecos_libres(vets, MANANA, fin)
+
+    assert selects(sentencias) == 2  # citas del rango + series del rango, sean cuantos sean los días
+    assert len(resultado[veterinario_default.id]) == 7
+    assert time(9, 0) not in resultado[segundo_veterinario.id][MANANA + timedelta(days=2)]
+    # Segunda llamada: todo sale de la caché
+    with contar_sql() as sentencias:
+        obtener_huecos_libres(vets, MANANA, fin)
+    assert selects(sentencias) == 0
+
+def test_cache_se_invalida_al_modificar_y_cancelar(session, mascota_default, veterinario_default):
+    cita = crear_cita(mascota_default.id, veterinario_default.id, MANANA, time(12, 0))
+    assert time(12, 0) not in obtener_huecos_libres_veterinario(veterinario_default.id, MANANA)
+
+    modificar_cita(cita.id, hora=time(13, 0))
+    huecos = obtener_huecos_libres_veterinario(veterinario_default.id, MANANA)
+    assert time(12, 0) in huecos and time(13, 0) not in huecos
+
+    cancelar_cita(cita.id)
+    assert time(13, 0) in obtener_huecos_libres_veterinario(veterinario_default.id, MANANA)
+
+def test_cache_se_invalida_al_eliminar(session, mascota_default, veterinario_default):
+    cita = crear_cita(mascota_default.id, veterinario_default.id, MANANA, time(9, 30))
+    obtener_huecos_libres_veterinario(veterinario_default.id, MANANA)
+
+    eliminar_cita(cita.id)
+    assert time(9, 30) in obtener_huecos_libres_veterinario(veterinario_default.id, MANANA)
+
+def test_hueco_cancelado_se_puede_reservar(session, mascota_default, veterinario_default):
+    """verificar_disponibilidad y el motor coinciden: una cita cancelada no ocupa hueco."""
+    cita = crear_cita(mascota_default.id, veterinario_default.id, MANANA, time(15, 0))
+    with pytest.raises(ValidacionException):
+        crear_cita(mascota_default.id, veterinario_default.id, MANANA, time(15, 0))
+
+    cancelar_cita(cita.id)
+    assert crear_cita(mascota_default.id, veterinario_default.id, MANANA, time(15, 0)).id != cita.id
+
+def test_hoy_no_ofrece_huecos_pasados(session, veterinario_default):
+    ayer = date.today() - timedelta(days=1)
+    assert obtener_huecos_libres_veterinario(veterinario_default.id, ayer) == []
+    assert len(obtener_huecos_libres_veterinario(veterinario_default.id, ayer, incluir_pasados=True)) == 16
+
+def test_metricas(session, veterinario_default):
+    antes = obtener_metricas_cache_disponibilidad()
+    obtener_huecos_libres_veterinario(veterinario_default.id, MANANA)
+    obtener_huecos_libres_veterinario(veterinario_default.id, MANANA)
+    despues = obtener_metricas_cache_disponibilidad()
+    assert despues["fallos"] == antes["fallos"] + 1
+    assert despues["aciertos"] == antes["aciertos"] + 1
+    eliminar_veterinario(veterinario_default.id)
+    assert obtener_metricas_cache_disponibilidad()["entradas"] == 0
@@ -0,0 +1,73 @@
+import dataclasses
+import pickle
+import pytest
+from datetime import date, time, timedelta
+from src.dto import a_dto, ClienteDTO, MascotaDTO, CitaDTO, PropietarioDTO
+from src.clientes import buscar_cliente_por_dni, modificar_cliente, obtener_cliente_por_id
+from src.mascotas import obtener_mascotas_por_cliente, obtener_mascota_por_id
+from src.citas import crear_cita, obtener_citas_por_veterinario, obtener_citas_por_estado, obtener_citas_por_fecha, modificar_cita
+from src.series import crear_serie
+
+MANANA = date.today() + timedelta(days=1)
+
+# ==========================================
+# TESTS DE LOS DTO
+# ==========================================
+
+def test_cliente_dto_inmutable_y_sin_dict(session, cliente_default):
+    cliente = buscar_cliente_por_dni("00000000A", dto=True)
+
+    assert cliente == ClienteDTO(cliente_default.id, "Cliente Test", "00000000A", "600000000", "cliente@test.com")
+    assert not hasattr(cliente, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        cliente.nombre = "Otro"
+    # Hashable y serializable: se puede compartir en cachés
+    assert pickle.loads(pickle.dumps(cliente)) == cliente and hash(cliente) == hash(cliente)
+    assert buscar_cliente_por_dni("NOEXISTE", dto=True) is None
+
+def test_dto_no_depende_de_la_sesion(session, mascota_default):
+    [mascota] = obtener_mascotas_por_cliente(mascota_default.cliente_id, dto=True)
+    session.expunge_all()
+    session.close()
+
+    assert isinstance(mascota, MascotaDTO)
+    assert mascota.cliente == PropietarioDTO(mascota_default.cliente_id, "Cliente Test", "00000000A")
+
+def test_obtener_por_id_con_el_mismo_dto(session, cliente_default, mascota_default):
+    assert obtener_cliente_por_id(cliente_default.id, dto=True) == buscar_cliente_por_dni("00000000A", dto=True)
+    mascota = obtener_mascota_por_id(mascota_default.id, dto=True)
+    assert mascota == obtener_mascotas_por_cliente(cliente_default.id, dto=True)[0]
+
+    # La mascota cacheada lleva a su propietario: renombrarlo la invalida
+    modificar_cliente(cliente_default.id, nombre="Cliente Nuevo")
+    assert obtener_mascota_por_id(mascota_default.id, dto=True).cliente.nombre == "Cliente Nuevo"
+
+def test_modificar_devuelve_dto(session, cliente_default, mascota_default, veterinario_default):
+    assert modificar_cliente(cliente_default.id, telefono="699999999", dto=True).telefono == "699999999"
+    cita = crear_cita(mascota_default.id, veterinario_default.id, MANANA, time(10, 0))
+    modificada = modificar_cita(cita.id, motivo="Revisión", dto=True)
+    assert isinstance(modificada, CitaDTO) and modificada.motivo == "Revisión"
+
+def test_citas_dto_anidadas_en_una_consulta(session, mascota_default, veterinario_default, contar_sql):
+    for hora in (time(9, 0), time(10, 0), time(11, 0)):
+        crear_cita(mascota_default.id, veterinario_default.id, MANANA, hora)
+    session.expunge_all()
+
+    with contar_sql() as sentencias:
+        citas = obtener_citas_por_veterinario(veterinario_default.id, dto=True)
+
+    assert len(sentencias) == 1
+    assert {c.mascota.cliente.nombre for c in citas} == {"Cliente Test"}
+    assert {c.veterinario.nombre for c in citas} == {"Dra. Ana"}
+
+    with contar_sql() as sentencias:
+        assert obtener_citas_por_estado(citas[0].estado, dto=True) == citas
+    assert len(sentencias) == 1
+
+def test_ocurrencia_de_serie_como_dto(session, mascota_default, veterinario_default):
+    serie = crear_serie(mascota_default.id, veterinario_default.id, MANANA, time(12, 0), "DIARIA", repeticiones=2)
+    [ocurrencia] = obtener_citas_por_fecha(MANANA, dto=True)
+
+    assert (ocurrencia.id, ocurrencia.serie_id, ocurrencia.fecha_serie) == (None, serie.id, MANANA)
+    assert ocurrencia.mascota.nombre == "Firulais"
+    assert a_dto(None) is None and a_dto([]) == []
@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+import pytest
+from datetime import date
+from src.exportacion import (
+    exportar_citas, iterar_citas_exportacion, formatos_disponibles, main, NOMBRES_COLUMNAS
+)
+from src.database import Cita, Veterinario
+from src.exceptions import ValidacionException
+
+# ==========================================
+# FIXTURE: DATOS
+# ==========================================
+
+@pytest.fixture
+def historial(session, mascota_default, veterinario_default):
+    """Tres citas: dos del veterinario por defecto y una sin veterinario."""
+    session.add_all([
+        Cita(fecha=date(2025, 1, 10), hora="10:00", estado="Realizada", motivo="Vacuna, anual",
+             mascota_id=mascota_default.id, veterinario_id=veterinario_default.id),
+        Cita(fecha=date(2025, 3, 5), hora="09:30", estado="Cancelada",
+             mascota_id=mascota_default.id, veterinario_id=veterinario_default.id),
+        Cita(fecha=date(2025, 6, 1), hora="12:00", estado="Realizada", mascota_id=mascota_default.id),
+    ])
+    session.commit()
+    return veterinario_default
+
+# ==========================================
+# TESTS DE EXPORTACIÓN
+# ==========================================
+
+def test_exportar_csv_con_detalle(session, historial, tmp_path):
+    ruta = tmp_path / "citas.csv"
+
+    assert exportar_citas(str(ruta), tamano_lote=2) == 3
+
+    with open(ruta, encoding="utf-8") as f:
+        filas = list(csv.DictReader(f))
+    assert list(filas[0].keys()) == NOMBRES_COLUMNAS
+    assert [f["fecha"] for f in filas] == ["2025-01-10", "2025-03-05", "2025-06-01"]
+    assert filas[0]["motivo"] == "Vacuna, anual"
+    assert (filas[0]["mascota"], filas[0]["cliente"], filas[0]["veterinario"]) == ("Firulais", "Cliente Test", "Dra. Ana")
+    assert filas[2]["veterinario"] == ""  # cita sin veterinario: se exporta igualmente
+
+def test_filtros(session, historial):
+    realizadas = list(iterar_citas_exportacion(estado="Realizada"))
+    assert [c["fecha"] for c in realizadas] == [date(2025, 1, 10), date(2025, 6, 1)]
+
+    del_vet = list(iterar_citas_exportacion(veterinario_id=historial.id, fecha_desde=date(2025, 2, 1)))
+    assert [c["estado"] for c in del_vet] == ["Cancelada"]
+
+    assert list(iterar_citas_exportacion(fecha_hasta=date(2024, 12, 31))) == []
+
+def test_exportar_jsonl_a_fichero_abierto(session, historial):
+    buffer = io.BytesIO()
+
+    assert exportar_citas(buffer, "jsonl", fecha_desde=date(2025, 3, 1)) == 2
+
+    lineas = [json.loads(l) for l in buffer.getvalue().decode("utf-8").splitlines()]
+    assert [l["hora"] for l in lineas] == ["09:30", "12:00"]
+    assert lineas[1]["veterinario_id"] is None
+    assert not buffer.closed
+
+def test_parquet(session, historial, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    ruta = tmp_path / "citas.parquet"
+    exportar_citas(str(ruta), tamano_lote=2)
+    tabla = pq.read_table(ruta)
+    assert tabla.num_rows == 3
+    assert tabla.column("fecha").to_pylist()[0] == date(2025, 1, 10)
+
+def test_formato_invalido(session, tmp_path):
+    with pytest.raises(ValidacionException):
+        exportar_citas(str(tmp_path / "citas.xlsx"))
+    assert "csv" in formatos_disponibles() and "jsonl" in formatos_disponibles()
+
+def test_cli(session, historial, tmp_path, capsys):
+    main([str(tmp_path / "citas.jsonl"), "--estado", "Cancelada"])
+    assert "1 citas exportadas" in capsys.readouterr().out
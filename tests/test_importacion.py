@@ -0,0 +1,129 @@
+import csv
+import json
+import pytest
+from src.importacion import importar, importar_clientes, importar_mascotas, importar_veterinarios, main
+from src.importacion import _ImportadorMasivo, _LectorFilas
+from src.database import Cliente, Mascota, Veterinario
+from src.exceptions import ValidacionException, ImportacionInterrumpidaException
+from src.transacciones import transaccion
+
+# ==========================================
+# FIXTURE: FICHEROS
+# ==========================================
+
+def escribir_csv(ruta, cabecera, filas):
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(cabecera)
+        escritor.writerows(filas)
+    return str(ruta)
+
+def escribir_jsonl(ruta, filas):
+    with open(ruta, "w", encoding="utf-8") as f:
+        for fila in filas:
+            f.write((fila if isinstance(fila, str) else json.dumps(fila)) + "\n")
+    return str(ruta)
+
+def leer_rechazos(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+# ==========================================
+# TESTS DE IMPORTACIÓN
+# ==========================================
+
+def test_importar_clientes_csv(session, tmp_path):
+    ruta = escribir_csv(tmp_path / "clientes.csv", ["nombre", "dni", "telefono", "email"], [
+        ["Ana López", "12345678a", "600 111 222", "ANA@correo.es"],
+        ["Luis Gil", "87654321B", "", ""],
+        ["Sin Dni", "", "", ""],                              # falta DNI
+        ["Repetido", "12345678A", "", ""],                    # DNI repetido en el fichero
+        ["Mal Teléfono", "11111111C", "12", ""],              # teléfono inválido
+    ])
+
+    r = importar_clientes(ruta, tamano_lote=1)
+
+    assert (r.leidas, r.insertadas, r.rechazadas) == (5, 2, 3)
+    ana = session.query(Cliente).filter_by(dni="12345678A").one()
+    assert (ana.telefono, ana.email) == ("600111222", "ana@correo.es")
+    assert session.query(Cliente).filter_by(dni="87654321B").one().telefono is None
+
+    rechazos = leer_rechazos(r.ruta_rechazos)
+    assert [f["linea"] for f in rechazos] == ["4", "5", "6"]
+    assert "dni" in rechazos[0]["motivo"] and "ya existe" in rechazos[1]["motivo"]
+
+def test_dni_ya_existente_en_bd(session, tmp_path, cliente_default):
+    ruta = escribir_csv(tmp_path / "c.csv", ["nombre", "dni"], [["Otro", cliente_default.dni]])
+    r = importar_clientes(ruta)
+    assert (r.insertadas, r.rechazadas) == (0, 1)
+
+def test_importar_mascotas_jsonl_resuelve_dni(session, tmp_path, cliente_default):
+    ruta = escribir_jsonl(tmp_path / "mascotas.jsonl", [
+        {"nombre": "Toby", "especie": "Perro", "edad": 3, "peso": "12,5", "cliente_dni": cliente_default.dni.lower()},
+        {"nombre": "Misi", "especie": "Gato", "cliente_dni": "99999999Z"},     # dueño inexistente
+        {"nombre": "Viejo", "especie": "Perro", "edad": 80, "cliente_dni": cliente_default.dni},
+        "esto no es json",
+    ])
+
+    r = importar_mascotas(ruta, ruta_rechazos=str(tmp_path / "errores.csv"))
+
+    assert (r.insertadas, r.rechazadas) == (1, 3)
+    toby = session.query(Mascota).one()
+    assert (toby.cliente_id, toby.edad, toby.peso) == (cliente_default.id, 3, 12.5)
+    assert r.ruta_rechazos == str(tmp_path / "errores.csv")
+    assert [f["linea"] for f in leer_rechazos(r.ruta_rechazos)] == ["2", "3", "4"]
+
+def test_importar_veterinarios_en_varias_transacciones(session, tmp_path):
+    filas = [{"nombre": f"Vet {chr(65 + i)}", "dni": f"{i:08d}V", "especialidad": "Felinos"} for i in range(7)]
+    ruta = escribir_jsonl(tmp_path / "vets.jsonl", filas)
+    commits = []
+
+    r = _ImportadorMasivo.importar("veterinarios", ruta, tamano_lote=2, tamano_transaccion=4, progreso=commits.append)
+
+    assert r.insertadas == 7 and r.rechazadas == 0 and r.ruta_rechazos is None
+    assert commits == [4]
+    assert session.query(Veterinario).filter_by(especialidad="Felinos").count() == 7
+
+def test_error_a_mitad_informa_de_lo_confirmado(session, tmp_path, monkeypatch):
+    filas = [{"nombre": f"Vet {chr(65 + i)}", "dni": f"{i:08d}V"} for i in range(7)]
+    ruta = escribir_jsonl(tmp_path / "vets.jsonl", filas)
+    leer = _LectorFilas.leer
+    def leer_y_fallar(*args):
+        for i, fila in enumerate(leer(*args)):
+            if i == 3:
+                raise OSError("disco desconectado")
+            yield fila
+    monkeypatch.setattr(_LectorFilas, "leer", leer_y_fallar)
+
+    with pytest.raises(ImportacionInterrumpidaException) as error:
+        importar("veterinarios", ruta, tamano_lote=1, tamano_transaccion=2)
+
+    assert error.value.confirmadas == 2
+    assert session.query(Veterinario).count() == 2  # la tercera fila, sin commit, se deshace
+
+def test_dentro_de_transaccion_no_confirma(session, tmp_path):
+    filas = [{"nombre": f"Vet {chr(65 + i)}", "dni": f"{i:08d}V"} for i in range(5)]
+    ruta = escribir_jsonl(tmp_path / "vets.jsonl", filas)
+
+    with pytest.raises(RuntimeError):
+        with transaccion():
+            assert importar("veterinarios", ruta, tamano_lote=2, tamano_transaccion=2).insertadas == 5
+            raise RuntimeError("falla después")
+    assert session.query(Veterinario).count() == 0
+
+def test_sin_rechazos_no_crea_fichero(session, tmp_path):
+    ruta = escribir_csv(tmp_path / "c.csv", ["nombre", "dni"], [["Ana", "12345678A"]])
+    importar_veterinarios(ruta)
+    assert not (tmp_path / "c.csv.rechazos.csv").exists()
+
+def test_formato_y_entidad_invalidos(session, tmp_path):
+    with pytest.raises(ValidacionException):
+        importar_clientes(str(tmp_path / "clientes.xlsx"))
+    with pytest.raises(ValidacionException):
+        importar("citas", escribir_csv(tmp_path / "c.csv", ["nombre"], []))
+
+def test_cli(session, tmp_path, capsys):
+    ruta = escribir_csv(tmp_path / "c.csv", ["nombre", "dni"], [["Ana", "12345678A"], ["", ""]])
+    main(["clientes", ruta])
+    salida = capsys.readouterr().out
+    assert "1 clientes importados" in salida and "1 filas rechazadas" in salida
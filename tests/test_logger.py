@@ -0,0 +1,79 @@
+import threading
+import pytest
+from src.logger import Logger
+
+# ==========================================
+# FIXTURE: LOGGER EN UN DIRECTORIO TEMPORAL
+# ==========================================
+
+@pytest.fixture
+def log_temporal(tmp_path):
+    """Redirige el logger a tmp_path y restaura la configuración al terminar"""
+    archivo_original, opciones_originales = Logger._logfile, dict(Logger._opciones)
+    ruta = tmp_path / "app.log"
+    yield ruta
+    Logger.detener()
+    Logger._logfile, Logger._opciones = archivo_original, opciones_originales
+
+def _leer(ruta):
+    Logger.vaciar()
+    return ruta.read_text(encoding="utf-8")
+
+# ==========================================
+# TESTS
+# ==========================================
+
+def test_modo_asincrono_escribe_desde_otro_hilo(log_temporal):
+    Logger.configurar_logger(archivo=str(log_temporal), asincrono=True, muestreo_debug=1)
+    Logger.info("Cliente creado")
+
+    assert Logger._listener is not None
+    assert Logger._listener._thread is not threading.current_thread()
+    assert "Cliente creado" in _leer(log_temporal)
+
+def test_modo_sincrono_sin_hilo(log_temporal):
+    Logger.configurar_logger(archivo=str(log_temporal), asincrono=False)
+    Logger.warning("Aviso directo")
+
+    assert Logger._listener is None
+    assert "Aviso directo" in log_temporal.read_text(encoding="utf-8")
+
+def test_excepcion_con_traceback(log_temporal):
+    Logger.configurar_logger(archivo=str(log_temporal), asincrono=True)
+    try:
+        raise ValueError("dato malo")
+    except ValueError as e:
+        Logger.log_excepcion(e, "importar")
+
+    contenido = _leer(log_temporal)
+    assert "Error en importar: dato malo" in contenido
+    assert "Traceback" in contenido
+
+def test_muestreo_debug(log_temporal):
+    Logger.configurar_logger(archivo=str(log_temporal), asincrono=True, muestreo_debug=10)
+    for i in range(100):
+        Logger.debug(f"detalle {i}")
+    Logger.info("resumen")
+
+    contenido = _leer(log_temporal)
+    assert contenido.count("detalle") == 10
+    assert "resumen" in contenido  # los demás niveles no se muestrean
+
+def test_rotacion_por_tamano(log_temporal):
+    Logger.configurar_logger(archivo=str(log_temporal), asincrono=True, rotacion="tamano", max_bytes=2_000, copias=2)
+    for i in range(200):
+        Logger.info(f"mensaje {i:04d} " + "x" * 50)
+    Logger.vaciar()
+
+    rotados = sorted(p.name for p in log_temporal.parent.iterdir())
+    assert rotados == ["app.log", "app.log.1", "app.log.2"]
+    assert log_temporal.stat().st_size <= 2_000
+
+def test_detener_vacia_la_cola(log_temporal):
+    Logger.configurar_logger(archivo=str(log_temporal), asincrono=True)
+    for i in range(500):
+        Logger.info(f"pendiente {i}")
+    Logger.detener()
+
+    assert log_temporal.read_text(encoding="utf-8").count("pendiente") == 500
+    assert Logger._logger is None and Logger._listener is None
@@ -3,8 +3,9 @@ from src.mascotas import (
     registrar_mascota, listar_mascotas, obtener_mascota_por_id,
     obtener_mascotas_por_cliente, obtener_mascotas_por_especie, 
     modificar_mascota, eliminar_mascota, contar_mascotas,
-    ver_historial_mascota
+    ver_historial_mascota, listar_opciones_mascotas
 )
+from src.clientes import modificar_cliente
 from src.exceptions import MascotaNoEncontradaException, ClienteNoEncontradoException, ValidacionException
 
 # =======================================================
@@ -79,6 +80,22 @@ def test_obtener_mascotas_por_especie(session, cliente_default):
     assert len(gatos) == 1
     assert perros[0].especie == "Perro"
 
+def test_listar_opciones_mascotas(session, cliente_default):
+    """(id, etiqueta) con el propietario, ordenado por nombre; cacheado hasta que cambien los datos."""
+    rex = registrar_mascota("Rex", "Perro", cliente_default.id)
+    luna = registrar_mascota("Luna", "Gato", cliente_default.id)
+
+    opciones = listar_opciones_mascotas()
+    assert opciones == (
+        (luna.id, "Luna (Propietario: Cliente Test (00000000A))"),
+        (rex.id, "Rex (Propietario: Cliente Test (00000000A))"),
+    )
+    assert listar_opciones_mascotas() is opciones
+
+    # Cambiar el propietario también cambia las etiquetas
+    modificar_cliente(cliente_default.id, nombre="Clienta Nueva")
+    assert listar_opciones_mascotas()[0][1] == "Luna (Propietario: Clienta Nueva (00000000A))"
+
 def test_ver_historial_mascota_vacio(session, mascota_default):
     """Verifica que devuelva una lista (vacía al inicio)."""
     historial = ver_historial_mascota(mascota_default.id)
@@ -0,0 +1,124 @@
+import pytest
+from datetime import date, time, timedelta
+from src.clientes import listar_clientes_paginado, listar_clientes, ResumenCliente
+from src.citas import listar_citas_paginado, listar_citas, ResumenCita
+from src.mascotas import listar_mascotas_paginado
+from src.paginacion import Paginador
+from src.database import Cliente, Mascota, Veterinario, Cita
+from src.exceptions import ValidacionException
+
+# ==========================================
+# FIXTURE: DATOS
+# ==========================================
+
+@pytest.fixture
+def clientes_varios(session):
+    """7 clientes, dos con el mismo nombre para probar el desempate por ID."""
+    nombres = ["Ana", "Bea", "Bea", "Carlos", "Diana", "Elena", "Fran"]
+    session.add_all([Cliente(nombre=n, dni=f"P{i:02d}") for i, n in enumerate(nombres)])
+    session.commit()
+    return [c.id for c in session.query(Cliente).order_by(Cliente.nombre, Cliente.id)]
+
+# ==========================================
+# TESTS
+# ==========================================
+
+def test_recorrer_todas_las_paginas(session, clientes_varios):
+    """Avanzando con cursor_siguiente se ven todos los clientes una sola vez y en orden."""
+    vistos = []
+    pagina = listar_clientes_paginado(tamano_pagina=3)
+    assert pagina.cursor_anterior is None
+    while True:
+        vistos += [c.id for c in pagina.elementos]
+        if not pagina.cursor_siguiente:
+            break
+        pagina = listar_clientes_paginado(tamano_pagina=3, cursor=pagina.cursor_siguiente)
+
+    assert vistos == clientes_varios
+
+def test_volver_a_pagina_anterior(session, clientes_varios):
+    primera = listar_clientes_paginado(tamano_pagina=3)
+    segunda = listar_clientes_paginado(tamano_pagina=3, cursor=primera.cursor_siguiente)
+
+    de_vuelta = listar_clientes_paginado(tamano_pagina=3, cursor=segunda.cursor_anterior, hacia_atras=True)
+
+    assert [c.id for c in de_vuelta.elementos] == [c.id for c in primera.elementos]
+    assert de_vuelta.cursor_anterior is None
+    assert de_vuelta.cursor_siguiente is not None
+
+def test_paginado_con_filtro(session, clientes_varios):
+    cliente_id = clientes_varios[0]
+    session.add_all([
+        Mascota(nombre="Toby", especie="Perro", cliente_id=cliente_id),
+        Mascota(nombre="Misi", especie="Gato", cliente_id=cliente_id),
+    ])
+    session.commit()
+
+    pagina = listar_mascotas_paginado(tamano_pagina=10, especie="Gato")
+    assert [m.nombre for m in pagina.elementos] == ["Misi"]
+    assert pagina.cursor_siguiente is None
+
+def test_citas_paginadas_descendente(session, clientes_varios):
+    """Citas de la más reciente a la más antigua, clave (fecha, hora, id)."""
+    vet = Veterinario(nombre="Vet", dni="PV1")
+    session.add(vet)
+    session.flush()
+    mascota = Mascota(nombre="Rex", especie="Perro", cliente_id=clientes_varios[0])
+    session.add(mascota)
+    session.flush()
+    hoy = date.today()
+    for dias, hora in [(0, "09:00"), (0, "10:00"), (1, "09:00"), (2, "12:00"), (2, "13:00")]:
+        session.add(Cita(fecha=hoy + timedelta(days=dias), hora=hora, mascota_id=mascota.id, veterinario_id=vet.id))
+    session.commit()
+
+    primera = listar_citas_paginado(tamano_pagina=2)
+    segunda = listar_citas_paginado(tamano_pagina=2, cursor=primera.cursor_siguiente)
+
+    assert [c.hora for c in primera.elementos] == [time(13, 0), time(12, 0)]
+    assert [(c.fecha, c.hora) for c in segunda.elementos] == [(hoy + timedelta(days=1), time(9, 0)), (hoy, time(10, 0))]
+
+def test_modo_resumen_misma_paginacion(session, clientes_varios):
+    """resumen=True recorre las mismas filas, como namedtuples y sin pasar por el identity map."""
+    session.expunge_all()
+    vistos = []
+    pagina = listar_clientes_paginado(tamano_pagina=3, resumen=True)
+    while True:
+        assert all(isinstance(c, ResumenCliente) for c in pagina.elementos)
+        vistos += [c.id for c in pagina.elementos]
+        if not pagina.cursor_siguiente:
+            break
+        pagina = listar_clientes_paginado(tamano_pagina=3, cursor=pagina.cursor_siguiente, resumen=True)
+
+    resumenes = listar_clientes(resumen=True)
+    assert len(session.identity_map) == 0
+    assert vistos == clientes_varios and sorted(c.id for c in resumenes) == clientes_varios
+    assert [c.nombre for c in resumenes] == [c.nombre for c in listar_clientes()]
+
+def test_citas_en_modo_resumen(session, clientes_varios):
+    mascota = Mascota(nombre="Rex", especie="Perro", cliente_id=clientes_varios[0])
+    session.add(mascota)
+    session.flush()
+    hoy = date.today()
+    session.add_all([Cita(fecha=hoy, hora="09:00", mascota_id=mascota.id),
+                     Cita(fecha=hoy, hora="10:00", mascota_id=mascota.id, estado="Realizada")])
+    session.commit()
+
+    # Sin veterinario también sale (OUTER JOIN)
+    assert listar_citas(resumen=True)[0] == ResumenCita(
+        listar_citas()[0].id, hoy, time(10, 0), "Realizada", None, "Rex", None
+    )
+    pagina = listar_citas_paginado(tamano_pagina=1, estado="Pendiente", resumen=True)
+    assert [(c.hora, c.mascota) for c in pagina.elementos] == [(time(9, 0), "Rex")]
+
+def test_cursor_invalido(session):
+    with pytest.raises(ValidacionException):
+        listar_clientes_paginado(cursor="esto-no-es-un-cursor")
+
+def test_tamano_fuera_de_rango(session):
+    with pytest.raises(ValidacionException):
+        listar_clientes_paginado(tamano_pagina=0)
+
+def test_cursor_conserva_fechas():
+    """(Edge Case): las fechas y horas sobreviven a la ida y vuelta por el token."""
+    cursor = Paginador.codificar_cursor([date(2025, 12, 8), time(10, 0), 7])
+    assert Paginador.decodificar_cursor(cursor, [Cita.fecha, Cita.hora, Cita.id]) == [date(2025, 12, 8), time(10, 0), 7]
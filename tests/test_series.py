@@ -0,0 +1,216 @@
+import pytest
+from datetime import date, time, timedelta
+from src.series import (
+    crear_serie, listar_series, finalizar_serie, eliminar_serie, fechas_serie, expandir_series,
+    obtener_serie_por_id, HORIZONTE_SERIES_DIAS
+)
+from src.citas import (
+    crear_cita, obtener_citas_por_fecha, obtener_proximas_citas, modificar_ocurrencia,
+    marcar_ocurrencia_realizada, cancelar_ocurrencia, contar_citas,
+    obtener_citas_por_rango, contar_citas_por_dia, version_datos_citas,
+    crear_citas_lote, modificar_cita
+)
+from src.disponibilidad import obtener_huecos_libres_veterinario
+from src.analisis import obtener_proximas_citas_semana, obtener_proximas_citas_mes
+from src.database import Cita
+from src.exceptions import ValidacionException, SerieNoEncontradaException
+
+# Lunes de la semana que viene: así la serie nunca empieza en el pasado
+LUNES = date.today() + timedelta(days=7 - date.today().weekday())
+
+# ==========================================
+# FIXTURE: DATOS
+# ==========================================
+
+@pytest.fixture
+def fisioterapia(session, mascota_default, veterinario_default):
+    """10 sesiones semanales los lunes a las 10:00."""
+    return crear_serie(mascota_default.id, veterinario_default.id, LUNES, time(10, 0), "SEMANAL",
+                       repeticiones=10, motivo="Fisioterapia")
+
+# ==========================================
+# TESTS DE LA REGLA
+# ==========================================
+
+def test_fechas_semanales_con_repeticiones(session, fisioterapia):
+    fechas = fechas_serie(fisioterapia, LUNES, LUNES + timedelta(days=365))
+    assert len(fechas) == 10
+    assert fechas[1] == LUNES + timedelta(weeks=1) and fechas[-1] == LUNES + timedelta(weeks=9)
+    # Ventana a mitad de la serie: solo las ocurrencias de esa ventana
+    assert fechas_serie(fisioterapia, LUNES + timedelta(days=20), LUNES + timedelta(days=30)) == [
+        LUNES + timedelta(weeks=3), LUNES + timedelta(weeks=4)
+    ]
+
+def test_fechas_mensuales_fin_de_mes(session, mascota_default, veterinario_default):
+    """El día 31 cae el último día de los meses más cortos."""
+    inicio = date(date.today().year + 1, 1, 31)
+    serie = crear_serie(mascota_default.id, veterinario_default.id, inicio, time(9, 0), "MENSUAL")
+    assert fechas_serie(serie, inicio, date(inicio.year, 4, 30)) == [
+        inicio, date(inicio.year, 2, 28 + (inicio.year % 4 == 0)), date(inicio.year, 3, 31), date(inicio.year, 4, 30)
+    ]
+
+def test_serie_sin_final_ventana_lejana(session, mascota_default, veterinario_default):
+    """Una serie infinita solo se calcula en la ventana pedida, esté donde esté."""
+    serie = crear_serie(mascota_default.id, veterinario_default.id, LUNES, time(11, 0), "DIARIA", intervalo=2)
+    lejos = LUNES + timedelta(days=20000)
+    assert fechas_serie(serie, lejos, lejos + timedelta(days=3)) == [lejos, lejos + timedelta(days=2)]
+
+def test_validaciones(session, mascota_default, veterinario_default):
+    with pytest.raises(ValidacionException):
+        crear_serie(mascota_default.id, veterinario_default.id, LUNES, time(10, 0), "ANUAL")
+    with pytest.raises(ValidacionException):
+        crear_serie(mascota_default.id, veterinario_default.id, LUNES, time(10, 0), "SEMANAL", intervalo=0)
+    with pytest.raises(ValidacionException):
+        crear_serie(mascota_default.id, veterinario_default.id, LUNES, time(20, 0), "SEMANAL")
+    with pytest.raises(ValidacionException):
+        crear_serie(mascota_default.id, veterinario_default.id, LUNES, time(10, 0), "SEMANAL", fecha_fin=LUNES - timedelta(days=1))
+    with pytest.raises(SerieNoEncontradaException):
+        obtener_serie_por_id(999)
+
+# ==========================================
+# TESTS DE EXPANSIÓN
+# ==========================================
+
+def test_las_ocurrencias_no_se_guardan(session, fisioterapia):
+    assert contar_citas() == 0
+    citas = obtener_citas_por_fecha(LUNES + timedelta(weeks=2))
+    assert len(citas) == 1
+    ocurrencia = citas[0]
+    assert ocurrencia.id is None and ocurrencia.serie_id == fisioterapia.id
+    assert (ocurrencia.hora, ocurrencia.estado, ocurrencia.motivo) == (time(10, 0), "Pendiente", "Fisioterapia")
+    assert ocurrencia.mascota.nombre == "Firulais" and ocurrencia.veterinario.nombre == "Dra. Ana"
+    assert obtener_citas_por_fecha(LUNES + timedelta(days=1)) == []
+    assert obtener_citas_por_fecha(LUNES, incluir_series=False) == []
+
+def test_citas_y_ocurrencias_mezcladas_por_hora(session, fisioterapia, mascota_default, veterinario_default):
+    crear_cita(mascota_default.id, veterinario_default.id, LUNES, time(9, 0), "Vacuna")
+    assert [c.motivo for c in obtener_citas_por_fecha(LUNES)] == ["Vacuna", "Fisioterapia"]
+
+def test_proximas_citas_y_analisis(session, fisioterapia):
+    assert len(obtener_proximas_citas()) == min(10, HORIZONTE_SERIES_DIAS // 7 + 1)
+    # La semana y el mes de analisis empiezan hoy: el primer lunes está dentro
+    assert sum(c.serie_id == fisioterapia.id for c in obtener_proximas_citas_semana()) == 1
+    assert sum(c.serie_id == fisioterapia.id for c in obtener_proximas_citas_mes()) >= 4
+
+def test_rango_y_recuentos_incluyen_series(session, fisioterapia):
+    fin_de_mes = LUNES + timedelta(days=27)
+    assert len(obtener_citas_por_rango(LUNES, fin_de_mes)) == 4
+    assert obtener_citas_por_rango(LUNES, fin_de_mes, estado="Realizada") == []
+    assert [r.total for r in contar_citas_por_dia(LUNES, fin_de_mes)] == [1, 1, 1, 1]
+    assert contar_citas_por_dia(LUNES, fin_de_mes, incluir_series=False) == []
+
+def test_expansion_con_consultas_fijas(session, fisioterapia, contar_sql):
+    """Dos consultas (series del rango + materializadas) sea cual sea el tamaño de la ventana."""
+    with contar_sql() as sentencias:
+        expandir_series(LUNES, LUNES + timedelta(days=365))
+    assert len(sentencias) == 2
+
+def test_finalizar_y_eliminar_serie(session, fisioterapia):
+    version = version_datos_citas()
+    finalizar_serie(fisioterapia.id, LUNES + timedelta(weeks=1))
+    assert version_datos_citas() > version  # el calendario cacheado deja de valer
+    assert len(expandir_series(LUNES, LUNES + timedelta(days=365))) == 2
+    eliminar_serie(fisioterapia.id)
+    assert listar_series() == []
+    assert expandir_series(LUNES) == []
+
+# ==========================================
+# TESTS DE MATERIALIZACIÓN
+# ==========================================
+
+def test_modificar_ocurrencia_la_materializa(session, fisioterapia):
+    semana_3 = LUNES + timedelta(weeks=3)
+
+    cita = modificar_ocurrencia(fisioterapia.id, semana_3, hora=time(12, 0))
+
+    assert cita.id is not None and (cita.serie_id, cita.fecha_serie) == (fisioterapia.id, semana_3)
+    assert contar_citas() == 1
+    [de_ese_dia] = obtener_citas_por_fecha(semana_3)
+    assert (de_ese_dia.id, de_ese_dia.hora) == (cita.id, time(12, 0))
+    # El resto de la serie sigue sin filas
+    assert len(expandir_series(LUNES, LUNES + timedelta(days=365))) == 9
+
+def test_ocurrencia_movida_de_dia_no_se_duplica(session, fisioterapia):
+    martes = LUNES + timedelta(days=1)
+    modificar_ocurrencia(fisioterapia.id, LUNES, fecha=martes, hora=time(10, 0))
+    assert obtener_citas_por_fecha(LUNES) == []
+    assert [c.fecha_serie for c in obtener_citas_por_fecha(martes)] == [LUNES]
+
+def test_realizada_y_cancelada(session, fisioterapia):
+    realizada = marcar_ocurrencia_realizada(fisioterapia.id, LUNES)
+    assert realizada.estado == "Realizada"
+    cancelada = cancelar_ocurrencia(fisioterapia.id, LUNES + timedelta(weeks=1))
+    assert cancelada.estado == "Cancelada"
+    # Las canceladas no salen en analisis; la serie sigue la semana siguiente
+    semana = obtener_proximas_citas_mes()
+    assert LUNES + timedelta(weeks=1) not in [c.fecha for c in semana]
+    assert LUNES + timedelta(weeks=2) in [c.fecha for c in semana]
+    # Materializar dos veces la misma ocurrencia reutiliza su cita
+    assert marcar_ocurrencia_realizada(fisioterapia.id, LUNES).id == realizada.id
+    assert session.query(Cita).count() == 2
+
+def test_ocurrencia_invalida_no_crea_cita(session, fisioterapia, mascota_default, veterinario_default):
+    with pytest.raises(ValidacionException):
+        modificar_ocurrencia(fisioterapia.id, LUNES + timedelta(days=1), estado="Realizada")  # no es lunes
+    crear_cita(mascota_default.id, veterinario_default.id, LUNES, time(12, 0))
+    with pytest.raises(ValidacionException):
+        modificar_ocurrencia(fisioterapia.id, LUNES, hora=time(12, 0))  # hueco ocupado
+    assert contar_citas() == 1
+    assert obtener_citas_por_fecha(LUNES)[0].id is None  # la ocurrencia sigue sin materializar
+
+# ==========================================
+# TESTS DE CHOQUES CON LAS OCURRENCIAS
+# ==========================================
+
+def test_huecos_libres_excluyen_ocurrencias(session, fisioterapia):
+    semana_1 = LUNES + timedelta(weeks=1)
+    assert time(10, 0) not in obtener_huecos_libres_veterinario(fisioterapia.veterinario_id, semana_1)
+    assert time(10, 30) in obtener_huecos_libres_veterinario(fisioterapia.veterinario_id, semana_1)
+    # Cancelada, la ocurrencia deja libre su hueco
+    cancelar_ocurrencia(fisioterapia.id, semana_1)
+    assert time(10, 0) in obtener_huecos_libres_veterinario(fisioterapia.veterinario_id, semana_1)
+
+def test_crear_y_mover_cita_sobre_ocurrencia(session, fisioterapia, mascota_default):
+    semana_2 = LUNES + timedelta(weeks=2)
+    with pytest.raises(ValidacionException):
+        crear_cita(mascota_default.id, fisioterapia.veterinario_id, semana_2, time(10, 0))
+    cita = crear_cita(mascota_default.id, fisioterapia.veterinario_id, semana_2, time(11, 0))
+    with pytest.raises(ValidacionException):
+        modificar_cita(cita.id, hora=time(10, 0))
+    assert contar_citas() == 1
+
+def test_lote_sobre_ocurrencia(session, fisioterapia, mascota_default):
+    lote = [dict(mascota_id=mascota_default.id, veterinario_id=fisioterapia.veterinario_id,
+                 fecha=LUNES + timedelta(weeks=3), hora=hora) for hora in (time(10, 0), time(11, 0))]
+    resultados = crear_citas_lote(lote)
+    assert resultados[0].error and resultados[0].cita is None
+    assert resultados[1].error is None
+    assert contar_citas() == 1
+
+def test_serie_no_puede_chocar(session, fisioterapia, mascota_default, veterinario_default):
+    vet = veterinario_default.id
+    # Mismo hueco que otra serie, aunque el primer choque llegue más tarde (el lunes de la semana 1)
+    with pytest.raises(ValidacionException):
+        crear_serie(mascota_default.id, vet, LUNES, time(10, 0), "SEMANAL")
+    with pytest.raises(ValidacionException):
+        crear_serie(mascota_default.id, vet, LUNES + timedelta(days=1), time(10, 0), "DIARIA")
+    # Con una cita guardada
+    crear_cita(mascota_default.id, vet, LUNES + timedelta(days=16), time(12, 0))
+    with pytest.raises(ValidacionException):
+        crear_serie(mascota_default.id, vet, LUNES + timedelta(days=2), time(12, 0), "SEMANAL")
+    # Otra hora u otros días: sin choque
+    crear_serie(mascota_default.id, vet, LUNES, time(11, 0), "SEMANAL")
+    crear_serie(mascota_default.id, vet, LUNES + timedelta(days=1), time(10, 0), "SEMANAL")
+    assert len(listar_series()) == 3
+
+def test_series_invalidan_disponibilidad(session, mascota_default, veterinario_default):
+    vet, semana_2 = veterinario_default.id, LUNES + timedelta(weeks=2)
+    assert time(12, 0) in obtener_huecos_libres_veterinario(vet, semana_2)  # queda en caché
+
+    serie = crear_serie(mascota_default.id, vet, LUNES, time(12, 0), "SEMANAL")
+    assert time(12, 0) not in obtener_huecos_libres_veterinario(vet, semana_2)
+    finalizar_serie(serie.id, LUNES + timedelta(weeks=1))
+    assert time(12, 0) in obtener_huecos_libres_veterinario(vet, semana_2)
+    assert time(12, 0) not in obtener_huecos_libres_veterinario(vet, LUNES)
+    eliminar_serie(serie.id)
+    assert time(12, 0) in obtener_huecos_libres_veterinario(vet, LUNES)
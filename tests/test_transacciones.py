@@ -0,0 +1,107 @@
+import pytest
+from datetime import date, time, timedelta
+from sqlalchemy import event
+from src.transacciones import transaccion
+from src.clientes import crear_cliente, obtener_cliente_por_id, contar_clientes
+from src.mascotas import registrar_mascota, contar_mascotas
+from src.citas import crear_cita, contar_citas, crear_citas_lote, modificar_ocurrencia
+from src.series import crear_serie
+from src.analisis import obtener_estadisticas_generales
+from src.exceptions import ClienteNoEncontradoException, DNIDuplicadoException, ValidacionException
+import src.citas as citas
+
+MANANA = date.today() + timedelta(days=1)
+
+# ==========================================
+# FIXTURE: CONTADOR DE COMMITS
+# ==========================================
+
+@pytest.fixture
+def commits(session):
+    """Lista que recibe un elemento por cada commit de la sesión"""
+    hechos = []
+    escuchar = lambda s: hechos.append(s)
+    actual = session()
+    event.listen(actual, "after_commit", escuchar)
+    yield hechos
+    event.remove(actual, "after_commit", escuchar)
+
+# ==========================================
+# TESTS
+# ==========================================
+
+def test_alta_completa_en_un_commit(session, veterinario_default, commits):
+    with transaccion():
+        cliente = crear_cliente("Laura Gil", "44444444L")
+        mascotas = [registrar_mascota(n, "Gato", cliente.id) for n in ("Misi", "Tom", "Nala")]
+        for i, mascota in enumerate(mascotas):
+            crear_cita(mascota.id, veterinario_default.id, MANANA, time(9 + i, 0), "Primera visita")
+        assert commits == []  # los IDs ya existen (flush), pero nada está confirmado
+
+    assert len(commits) == 1
+    assert (contar_clientes(), contar_mascotas(), contar_citas()) == (1, 3, 3)
+
+def test_error_deshace_todo_el_bloque(session, cliente_default, veterinario_default, commits):
+    with pytest.raises(DNIDuplicadoException):
+        with transaccion():
+            mascota = registrar_mascota("Rex", "Perro", cliente_default.id)
+            crear_cita(mascota.id, veterinario_default.id, MANANA, time(10, 0))
+            crear_cliente("Otro", cliente_default.dni)
+
+    assert commits == []
+    assert (contar_mascotas(), contar_citas()) == (0, 0)
+
+def test_transaccion_anidada_se_une_a_la_exterior(session, commits):
+    with pytest.raises(RuntimeError):
+        with transaccion():
+            with transaccion():
+                crear_cliente("Interior", "55555555I")
+            assert commits == []
+            raise RuntimeError("falla la exterior")
+    assert contar_clientes() == 0
+
+def test_las_caches_no_guardan_datos_sin_confirmar(session):
+    antes = obtener_estadisticas_generales()["total_clientes"]
+    with pytest.raises(RuntimeError):
+        with transaccion():
+            cliente = crear_cliente("Fantasma", "66666666F")
+            assert obtener_cliente_por_id(cliente.id, dto=True).nombre == "Fantasma"
+            assert obtener_estadisticas_generales()["total_clientes"] == antes + 1
+            raise RuntimeError("deshacer")
+
+    with pytest.raises(ClienteNoEncontradoException):
+        obtener_cliente_por_id(cliente.id, dto=True)
+    assert obtener_estadisticas_generales()["total_clientes"] == antes
+
+def test_servicio_fallido_no_deja_nada_aunque_se_capture(session, mascota_default, veterinario_default):
+    """modificar_ocurrencia ya ha materializado la cita cuando falla: su SAVEPOINT la deshace."""
+    serie = crear_serie(mascota_default.id, veterinario_default.id, MANANA, time(10, 0), "DIARIA", repeticiones=3)
+    crear_cita(mascota_default.id, veterinario_default.id, MANANA, time(12, 0))
+
+    with transaccion():
+        with pytest.raises(ValidacionException):
+            modificar_ocurrencia(serie.id, MANANA, hora=time(12, 0))  # choca con la cita de las 12
+        crear_cliente("Sigue", "77777777S")  # la transacción sigue viva
+
+    assert contar_citas() == 1 and contar_clientes() == 2  # + cliente_default
+
+def test_punto_de_guardado_al_principio_no_confirma(session, mascota_default, veterinario_default, monkeypatch):
+    """Aunque lo primero del bloque sea un SAVEPOINT, el rollback final lo deshace todo."""
+    lote = [dict(mascota_id=mascota_default.id, veterinario_id=veterinario_default.id, fecha=MANANA, hora=time(9, 0))]
+    with pytest.raises(RuntimeError):
+        with transaccion():
+            crear_citas_lote(lote)
+            raise RuntimeError("falla después")
+    assert contar_citas() == 0
+
+    # Y un lote que falla tras el flush no deja sus citas en la transacción
+    crear_varias = citas._RepositorioCita.crear_varias
+    def crear_y_fallar(datos):
+        crear_varias(datos)
+        raise RuntimeError("fallo tras el flush")
+    monkeypatch.setattr(citas._RepositorioCita, "crear_varias", crear_y_fallar)
+    with transaccion():
+        crear_cliente("Sigue", "88888888S")
+        with pytest.raises(RuntimeError):
+            crear_citas_lote(lote)
+    assert contar_citas() == 0 and contar_clientes() == 2  # + cliente_default
@@ -76,6 +76,15 @@ def test_obtener_veterinarios_por_especialidad(session):
     assert len(cirujanos) == 1
     assert cirujanos[0].dni == "111"
 
+def test_listar_opciones_veterinarios(session):
+    """(id, etiqueta) por nombre; la caché se renueva al crear o modificar."""
+    ana = crear_veterinario("Ana", "1A", especialidad="Felinos")
+    assert listar_opciones_veterinarios() == ((ana.id, "Ana (Felinos)"),)
+
+    beto = crear_veterinario("Beto", "2B")
+    modificar_veterinario(ana.id, especialidad="Exóticos")
+    assert listar_opciones_veterinarios() == ((ana.id, "Ana (Exóticos)"), (beto.id, "Beto (General)"))
+
 # ==========================================
 # TESTS DE MODIFICACIÓN (LOS QUE FALTABAN)
 # ==========================================